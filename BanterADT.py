@@ -1,34 +1,61 @@
+from _thread import allocate_lock
 from dataclasses import dataclass, field
-from typing import Union, List, Optional
+from typing import Union, Tuple, Optional
 
-@dataclass
+# Operator tables shared by every node instead of being rebuilt per construction
+BINARY_OPERATORS = frozenset({'+', '-', '*', '/'})
+UNARY_OPERATORS = frozenset({'neg'})
+COMPARISON_OPERATORS = frozenset({'==', '!=', '>', '<', '>=', '<='})
+
+# Nodes are frozen and slotted: programs can hold hundreds of thousands of them
+
+@dataclass(frozen=True, slots=True)
 class Mneumonic:
     name: str
-    value: any
 
     def __repr__(self):
         return self.name
 
-@dataclass
+    @classmethod
+    def intern(cls, name):
+        """Return the shared node for a name, creating it on first use."""
+        node = _mneumonics.get(name)
+        if node is None:
+            node = _mneumonics.setdefault(name, cls(name))
+        return node
+
+_mneumonics = {}
+
+@dataclass(frozen=True, slots=True)
+class Local:
+    """A mneumonic resolved to a slot in a frame.Frame (see frame.resolve)."""
+    name: str
+    slot: int
+
+    def __repr__(self):
+        return self.name
+
+@dataclass(frozen=True, slots=True)
 class Operation:
     operator: str  # The operator symbol, e.g., '+', '-', '*', '/'
-    operands: List[Union[int, float, 'Operation']] = field(default_factory=list)
+    operands: Tuple[Union[int, float, 'Operation'], ...] = ()
+    proven: bool = field(default=False, compare=False, repr=False)  # Operand types checked statically
 
     def __post_init__(self):
         # Validate the number of operands for binary operations
-        if self.is_binary() and len(self.operands) != 2:
+        if self.operator in BINARY_OPERATORS and len(self.operands) != 2:
             raise ValueError("Binary operations must have exactly two operands.")
 
-        if self.is_unary() and len(self.operands) != 1:
+        if self.operator in UNARY_OPERATORS and len(self.operands) != 1:
             raise ValueError("Unary operations must have exactly one operand.")
 
     def is_binary(self) -> bool:
         """Determine if the operation is binary based on the operator."""
-        return self.operator in {'+', '-', '*', '/'}
+        return self.operator in BINARY_OPERATORS
 
     def is_unary(self) -> bool:
         """Determine if the operation is unary (e.g., negation)."""
-        return self.operator in {'neg'}
+        return self.operator in UNARY_OPERATORS
 
     def __repr__(self):
       if self.operator == '-' and self.is_unary():  # Unary operator
@@ -36,10 +63,11 @@ class Operation:
       else:  # Binary operators
          return f"({f' {self.operator} '.join(map(str, self.operands))})"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Comparison:
     operator: str  # The comparison operator, e.g., '==', '!=', '>', '<', '>=', '<='
-    operands: List[Union[int, float, bool, 'Comparison']] = field(default_factory=list)
+    operands: Tuple[Union[int, float, bool, 'Comparison'], ...] = ()
+    proven: bool = field(default=False, compare=False, repr=False)  # Operand types checked statically
 
     def __post_init__(self):
         # Validate that comparisons always have exactly two operands
@@ -47,28 +75,31 @@ class Comparison:
             raise ValueError("Comparisons must have exactly two operands.")
         
         # Ensure the operator is valid
-        if not self.is_valid_operator():
+        if self.operator not in COMPARISON_OPERATORS:
             raise ValueError(f"Invalid operator: {self.operator}")
 
     def is_valid_operator(self) -> bool:
         """Checks if the operator is a valid comparison operator."""
-        return self.operator in {'==', '!=', '>', '<', '>=', '<='}
+        return self.operator in COMPARISON_OPERATORS
 
     def __repr__(self):
         return f"{self.operands[0]} {self.operator} {self.operands[1]}"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LetStatement:
     mneumonic: str
-    value: Union[Operation, int, float, bool, str]
+    value: Union[Operation, int, float, bool, 'BanterString']
+    slot: Optional[int] = field(default=None, compare=False, repr=False)  # Set by frame.resolve
+    lineno: Optional[int] = field(default=None, compare=False, repr=False)  # Set by the parser
 
     def __repr__(self):
         return f"let {self.mneumonic} be {self.value}"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class IfStatement:
     expr: Comparison
     do: 'Statement'
+    lineno: Optional[int] = field(default=None, compare=False, repr=False)  # Set by the parser
 
     def __repr__(self):
 
@@ -81,11 +112,12 @@ class IfStatement:
 
         return f"if {self.expr}, then\n{do}"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class IfElseStatement:
     expr: Comparison  # The condition to evaluate
     do: 'Statement'       # Statement to execute if the condition is True
     alternate: Optional['Statement'] = None  # Statement to execute if False (optional)
+    lineno: Optional[int] = field(default=None, compare=False, repr=False)  # Set by the parser
 
     def __repr__(self):
 
@@ -102,40 +134,211 @@ class IfElseStatement:
                 for stmt in self.alternate:
                     alt += f"      {stmt}\n"
             else:
-                stmt = f"      {self.alternate}\n"
+                alt = f"      {self.alternate}\n"
         else:
             alt = ""
         
         return f"if {self.expr}, then\n{do}\n{alt}"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ReturnStatement:
-    value: Union[Operation, Mneumonic, int, float, bool, str]
+    value: Union[Operation, Mneumonic, int, float, bool, 'BanterString']
+    lineno: Optional[int] = field(default=None, compare=False, repr=False)  # Set by the parser
 
     def __repr__(self):
         return f"return {self.value}"
 
-@dataclass 
+@dataclass(frozen=True, slots=True)
 class PrintStatement:
-    value: Union[Operation, Mneumonic, int, float, bool, str]
+    value: Union[Operation, Mneumonic, int, float, bool, 'BanterString']
+    lineno: Optional[int] = field(default=None, compare=False, repr=False)  # Set by the parser
 
     def __repr__(self):
         return f"print {self.value}"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GotoStatement:
     label: Union[int, float]
+    lineno: Optional[int] = field(default=None, compare=False, repr=False)  # Set by the parser
 
     def __repr__(self):
         return f"goto instruction {self.label}"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MarkerStatement:
     label: Union[int, float]
+    lineno: Optional[int] = field(default=None, compare=False, repr=False)  # Set by the parser
 
     def __str__(self):
         return f"@{self.label}"
 
+@dataclass(frozen=True, slots=True)
+class LoopStatement:
+    """A goto loop found by loops.optimize, which replaces the statements after
+    its marker. `run` executes the whole loop on a variables mapping, then
+    `exit`, if any, runs as the statements that left the loop would have."""
+    label: Union[int, float]  # The loop's marker
+    expr: Comparison
+    exit_when: bool  # The loop ends once expr evaluates to this
+    test_first: bool  # Whether expr is tested before the first iteration
+    body: list  # LetStatements
+    exit: Optional['Statement'] = None
+    run: Optional[object] = field(default=None, compare=False, repr=False)
+    lineno: Optional[int] = field(default=None, compare=False, repr=False)
+
+    def __repr__(self):
+        test = f"until {self.expr}" if self.exit_when else f"while {self.expr}"
+        body = "".join(f"\n      {stmt}" for stmt in self.body)
+        return f"loop @{self.label} {test}{'' if self.test_first else ' after each pass'}:{body}"
+
+class BanterString:
+    """A string value, held without the quotes of its literal; they only appear
+    once it is printed or converted with str().
+
+    Concatenating onto the latest string built on a buffer appends to the
+    buffer, which the strings built before it share, each knowing its length.
+    Building a string in a loop therefore takes linear time overall, where
+    copying both strings on every + took quadratic time. The text is joined
+    when first needed.
+
+    A string made from text, such as a literal, never gets a buffer: programs
+    are shared between sessions, so + copies it into a new buffer owned by the
+    result. Buffers lock while they change, as strings built on them can reach
+    other threads.
+    """
+    __slots__ = ('_buffer', '_length', '_text')
+
+    def __init__(self, text=''):
+        self._buffer = None  # The buffer this string was built on, if any
+        self._length = len(text)
+        self._text = text
+
+    def text(self):
+        """The string's characters, without quotes."""
+        text = self._text
+        if text is None:
+            text = self._text = self._buffer.join(self._length)
+        return text
+
+    def __add__(self, other):
+        if type(other) is not BanterString:
+            return NotImplemented
+        addition = other.text()
+        buffer = self._buffer
+        if buffer is None or not buffer.extend(self._length, addition):
+            # Strings built on this buffer before keep its end
+            buffer = _Buffer(self.text())
+            buffer.extend(self._length, addition)
+        result = BanterString.__new__(BanterString)
+        result._buffer = buffer
+        result._length = self._length + len(addition)
+        result._text = None
+        return result
+
+    # Other arithmetic fails as it did when strings were str
+    def __sub__(self, other):
+        if type(other) is not BanterString:
+            return NotImplemented
+        return self.text() - other.text()
+
+    def __mul__(self, other):
+        if type(other) is not BanterString:
+            return NotImplemented
+        return self.text() * other.text()
+
+    def __truediv__(self, other):
+        if type(other) is not BanterString:
+            return NotImplemented
+        return self.text() / other.text()
+
+    def __len__(self):
+        return self._length
+
+    def __eq__(self, other):
+        if type(other) is not BanterString:
+            return NotImplemented
+        return self._length == other._length and self.text() == other.text()
+
+    def __hash__(self):
+        return hash(self.text())
+
+    # Ordered as the quoted text is, which a closing quote can decide. The
+    # engines compare strings with other types through plain_text.
+    def __lt__(self, other):
+        if type(other) is not BanterString:
+            return NotImplemented
+        return self.text() + '"' < other.text() + '"'
+
+    def __le__(self, other):
+        if type(other) is not BanterString:
+            return NotImplemented
+        return self.text() + '"' <= other.text() + '"'
+
+    def __gt__(self, other):
+        if type(other) is not BanterString:
+            return NotImplemented
+        return self.text() + '"' > other.text() + '"'
+
+    def __ge__(self, other):
+        if type(other) is not BanterString:
+            return NotImplemented
+        return self.text() + '"' >= other.text() + '"'
+
+    def __str__(self):
+        return f'"{self.text()}"'
+
+    __repr__ = __str__
+
+    def __format__(self, spec):
+        return format(str(self), spec)
+
+    def __sizeof__(self):
+        # As much as the quoted text would take as a str
+        width = self._buffer.width if self._buffer is not None and self._text is None else char_width(self._text)
+        return object.__sizeof__(self) + (self._length + 2) * width
+
+def plain_text(value):
+    """A value with any BanterString replaced by its str, for comparing against
+    other types as strings were before, with the same errors."""
+    return value.text() if type(value) is BanterString else value
+
+def char_width(text):
+    """Bytes per character of a str holding text."""
+    if text.isascii():
+        return 1
+    top = ord(max(text))
+    return 1 if top < 0x100 else 2 if top < 0x10000 else 4
+
+class _Buffer:
+    __slots__ = ('chunks', 'length', 'width', 'lock')
+
+    def __init__(self, text):
+        self.chunks = [text]
+        self.length = len(text)
+        self.width = char_width(text)
+        self.lock = allocate_lock()
+
+    def extend(self, length, text):
+        """Append text if the buffer still ends `length` characters in; returns
+        whether it did."""
+        with self.lock:
+            if self.length != length:
+                return False
+            self.chunks.append(text)
+            self.length += len(text)
+            if text:
+                self.width = max(self.width, char_width(text))
+            return True
+
+    def join(self, length):
+        """The first `length` characters."""
+        with self.lock:
+            chunks = self.chunks
+            if len(chunks) > 1:
+                chunks[:] = ["".join(chunks)]
+            text = chunks[0]
+        return text if len(text) == length else text[:length]
+
 Statement = Union[ReturnStatement, IfStatement, IfElseStatement, LetStatement, GotoStatement, MarkerStatement]
 
 Program = Union[Statement, Operation, Comparison]
@@ -0,0 +1,226 @@
+from BanterADT import *
+from interpreter import assignments, eval_operation, eval_comparison
+
+#################### Static Type Inference ####################
+#
+# Types are tracked flow-insensitively: a mneumonic's type set is the union of
+# the types of every value assigned to it anywhere in the program, plus the type
+# of its current binding. That is coarse, but it is sound for gotos, which can
+# reach any marker in any order.
+
+LITERAL_TYPES = (bool, int, float, str, BanterString)
+
+NUMERIC = frozenset({int, float})
+
+def operands_compatible(left, right):
+    """Whether eval_operation's same-type check passes for these operand types."""
+    return left is right or (left in NUMERIC and right in NUMERIC)
+
+def operation_type(operator, left, right):
+    """Result type of a checked operation on operand types, or None if it raises."""
+    if not operands_compatible(left, right):
+        return None
+    if left is BanterString:
+        return BanterString if operator == '+' else None
+    if operator == '/':
+        return float
+    if float in (left, right):
+        return float
+    return int  # int or bool arithmetic yields int
+
+def comparison_needs_check(left, right):
+    """Whether comparing values of two types takes the engines' checked comparison:
+    bool with int compares unequal, and strings with other types fail as str did."""
+    return {left, right} == {bool, int} or left is not right and BanterString in (left, right)
+
+class TypeEnvironment:
+    """Possible runtime types of each mneumonic in a program."""
+
+    def __init__(self, types):
+        self.types = types
+
+    def __getitem__(self, name):
+        return self.types.get(name, frozenset())
+
+    def __repr__(self):
+        return repr({name: sorted(t.__name__ for t in types) for name, types in self.types.items()})
+
+    def expression_types(self, expression):
+        """Return the set of types an expression may evaluate to."""
+        if isinstance(expression, LITERAL_TYPES):
+            return frozenset({type(expression)})
+
+        elif isinstance(expression, (Mneumonic, Local)):
+            return self[expression.name]
+
+        elif isinstance(expression, Operation) and len(expression.operands) == 2:
+            left, right = map(self.expression_types, expression.operands)
+            results = {operation_type(expression.operator, l, r) for l in left for r in right}
+            results.discard(None)
+            return frozenset(results)
+
+        elif isinstance(expression, Comparison):
+            return frozenset({bool})
+
+        return frozenset()
+
+    def proves_operation(self, operands):
+        left, right = map(self.expression_types, operands)
+        return all(operands_compatible(l, r) for l in left for r in right)
+
+    def proves_comparison(self, operands):
+        left, right = map(self.expression_types, operands)
+        return not any(comparison_needs_check(l, r) for l in left for r in right)
+
+def infer_types(program, variables=None):
+    """Infer the possible types of every mneumonic in a program.
+
+    The current bindings in `variables` are taken into account, so the result
+    only holds for runs starting from those bindings.
+    """
+    types = {}
+    for name, value in (variables or {}).items():
+        types[name] = frozenset({type(value)})
+
+    lets = list(assignments(program))
+    env = TypeEnvironment(types)
+    changed = True
+    while changed:
+        changed = False
+        for let in lets:
+            before = env[let.mneumonic]
+            after = before | env.expression_types(let.value)
+            if after != before:
+                types[let.mneumonic] = after
+                changed = True
+    return env
+
+def reads(expression):
+    """Yield the names an expression reads."""
+    if isinstance(expression, (Mneumonic, Local)):
+        yield expression.name
+    elif isinstance(expression, (Operation, Comparison)):
+        for operand in expression.operands:
+            yield from reads(operand)
+
+class GrowingTypes:
+    """Possible types of every mneumonic in a program that grows, such as the
+    inputs to a REPL session, inferred as it grows.
+
+    Types only widen: the types of assignments and bindings that are gone are
+    kept, which is coarse but sound.
+    """
+
+    def __init__(self):
+        self.types = {}
+        self.env = TypeEnvironment(self.types)
+        self.read = set()  # Names read by any assignment added
+
+    def widen(self, lets, variables, held):
+        """Add new assignments and the current bindings, and return the environment.
+
+        `held` is called for every assignment that may still run, new ones
+        included, if the new types can change what earlier ones assign.
+        """
+        lets = list(lets)
+        for let in lets:
+            self.read.update(reads(let.value))
+        changed = self.join((name, frozenset({type(value)})) for name, value in variables.items())
+        changed |= self.settle(lets)
+        if not changed.isdisjoint(self.read):
+            self.settle(list(held()))
+        return self.env
+
+    def join(self, pairs):
+        changed = set()
+        for name, types in pairs:
+            before = self.types.get(name, frozenset())
+            if not types <= before:
+                self.types[name] = before | types
+                changed.add(name)
+        return changed
+
+    def settle(self, lets):
+        """Widen until the assignments add no types; return the names widened."""
+        widened = set()
+        while True:
+            changed = self.join((let.mneumonic, self.env.expression_types(let.value)) for let in lets)
+            if not changed:
+                return widened
+            widened |= changed
+
+    def clear(self):
+        self.types.clear()
+        self.read.clear()
+
+#################### Constant Folding ####################
+
+def fold_expression(expression, env, fold_root=True):
+    """Fold constant subexpressions and mark operations with proven operand types."""
+    if isinstance(expression, Operation) and len(expression.operands) == 2:
+        operands = tuple(fold_expression(operand, env) for operand in expression.operands)
+        if fold_root and all(isinstance(operand, LITERAL_TYPES) for operand in operands):
+            try:
+                value = eval_operation(Operation(operator=expression.operator, operands=operands), {})
+            except Exception:
+                pass  # Leave the error for runtime
+            else:
+                # Like a literal, a folded string must not share a buffer with the strings built from it
+                return BanterString(value.text()) if isinstance(value, BanterString) else value
+        return Operation(operator=expression.operator, operands=operands,
+                         proven=env.proves_operation(operands))
+
+    elif isinstance(expression, Comparison):
+        operands = tuple(fold_expression(operand, env) for operand in expression.operands)
+        if fold_root and all(isinstance(operand, LITERAL_TYPES) for operand in operands):
+            try:
+                return eval_comparison(Comparison(operator=expression.operator, operands=operands), {})
+            except Exception:
+                pass
+        return Comparison(operator=expression.operator, operands=operands,
+                          proven=env.proves_comparison(operands))
+
+    return expression
+
+def fold_statement(stmt, env, top_level=False):
+    if isinstance(stmt, list):
+        return [fold_statement(s, env, top_level) for s in stmt]
+
+    elif isinstance(stmt, LetStatement):
+        return LetStatement(mneumonic=stmt.mneumonic, value=fold_expression(stmt.value, env),
+                            slot=stmt.slot, lineno=stmt.lineno)
+
+    elif isinstance(stmt, IfElseStatement):
+        alternate = fold_statement(stmt.alternate, env) if stmt.alternate else stmt.alternate
+        return IfElseStatement(expr=fold_expression(stmt.expr, env, fold_root=False),
+                               do=fold_statement(stmt.do, env), alternate=alternate,
+                               lineno=stmt.lineno)
+
+    elif isinstance(stmt, IfStatement):
+        return IfStatement(expr=fold_expression(stmt.expr, env, fold_root=False),
+                           do=fold_statement(stmt.do, env), lineno=stmt.lineno)
+
+    elif isinstance(stmt, ReturnStatement):
+        return ReturnStatement(value=fold_expression(stmt.value, env), lineno=stmt.lineno)
+
+    elif isinstance(stmt, PrintStatement):
+        if stmt.value is None:
+            return stmt
+        return PrintStatement(value=fold_expression(stmt.value, env), lineno=stmt.lineno)
+
+    elif isinstance(stmt, (Operation, Comparison)):
+        # A bare expression's result type is observable, so keep its root
+        return fold_expression(stmt, env, fold_root=not top_level)
+
+    return stmt
+
+def analyze(program, variables=None, env=None):
+    """Return a copy of a program with constants folded and proven operations marked.
+
+    The analysis assumes the run starts from the given variable bindings; analyze
+    the program again before running it from different ones. An `env` given
+    replaces the types inferred from the program and bindings.
+    """
+    if env is None:
+        env = infer_types(program, variables)
+    return fold_statement(program, env, top_level=True)
@@ -1,22 +1,29 @@
 #!/usr/bin/env python3
 import sys
 import re
-import readline
-import atexit
 import os
+import argparse
+import time
 
 from BanterADT import *
-import banterlang
-from interpreter import eval_program
+import interpreter
+from limits import Limits
+from session import ENGINES, ParseFailed, Session
 
 # Global state
-variables = {}
-context = []
-program_history = []  # Store only valid commands
+session = None  # The Session input runs in, made from the command line in __main__
 
 HISTORY_FILE = os.path.expanduser('~/.banter_history')
 
+readline = None  # Imported by init_readline; running a script never needs it
+
 def init_readline():
+    global readline
+    if readline is not None:
+        return
+    import readline
+    import atexit
+
     if not os.path.exists(HISTORY_FILE):
         try:
             open(HISTORY_FILE, 'w').close()
@@ -31,11 +38,13 @@ def init_readline():
     readline.set_history_length(1000)
     atexit.register(readline.write_history_file, HISTORY_FILE)
 
-def concrete2abstract(s: str, parser) -> Program:
+def concrete2abstract(s: str, session, filename=None):
+    """Parse s into a cache entry holding its program, or print why it failed."""
     try:
-        parser.parse(s)
-        return banterlang.global_ast
-    except Exception as e:
+        return session.parse(s, filename)
+    except ParseFailed as e:
+        if e.detail:
+            print(e.detail)
         print("Syntax error in input")
         return None
 
@@ -43,33 +52,18 @@ def process_input(input_string, filename=None):
     """Process the input and evaluate, maintaining program context."""
 
     try:
-        ast = concrete2abstract(input_string, banterlang.parser)
-        
-        if ast is None:
+        entry = concrete2abstract(input_string, session, filename)
+
+        if entry is None:
             return False  # Indicate parsing failure
-        
-        if isinstance(ast, list):
-            program = ast
-        else:
-            program = [ast]
-            
+
         try:
-                
-            # Update program context
-            if not context:
-                context.insert(0, program)
-                
-            # Now evaluate the full program
-            result = eval_program(program, variables, context)
+            result = session.execute(entry, filename)
 
+            if isinstance(result, interpreter.ReturnValue):
+                result = result.value
             if result is not None:
                 print(result)
-                # If evaluation succeeded, add to program history
-
-            if isinstance(ast, list):
-                program_history.extend(ast)
-            else:
-                program_history.append(ast)
 
             return True
             
@@ -81,9 +75,56 @@ def process_input(input_string, filename=None):
         print(f"Error: {str(e)}")
         return False
 
-def start_repl(first=True, filename=None):
-    init_readline()
+def emit_python(filename):
+    """Print the Python translation of a Banter file."""
+    import transpiler
+    with open(filename, 'r') as file:
+        entry = concrete2abstract(file.read(), session)
+    if entry is None:
+        return False
+    sys.stdout.write(transpiler.generate_source(entry.program, source_name=os.path.basename(filename)))
+    return True
 
+def run_batch(args):
+    """Run a directory of programs in parallel; returns the number that failed."""
+    import batch
+    programs = batch.find_programs(args.batch)
+    start = time.perf_counter()
+    if args.report:
+        with open(args.report, 'w') as report:
+            failures = batch.run_batch(programs, report, args.jobs, args.engine, args.cache,
+                                       session.limits, args.memo)
+    else:
+        failures = batch.run_batch(programs, None, args.jobs, args.engine, args.cache, session.limits,
+                                   args.memo)
+    print(f"Ran {len(programs)} programs in {time.perf_counter() - start:.2f}s, {failures} failed",
+          file=sys.stderr)
+    return failures
+
+def run_lanes(args):
+    """Run a file once per line of JSON bindings in args.lanes; returns the
+    number of lanes that failed."""
+    import json
+    import vectorized
+    with open(args.lanes, 'r') as file:
+        bindings = [json.loads(line) for line in file if line.strip()]
+    for row in bindings:
+        for name, value in row.items():
+            if isinstance(value, str):
+                row[name] = BanterString(value)
+    with open(args.filename, 'r') as file:
+        entry = concrete2abstract(file.read(), session)
+    if entry is None:
+        return len(bindings)
+    failures = 0
+    for lane, result in enumerate(vectorized.eval_lanes(entry.program, bindings)):
+        error = None if result.error is None else f"{type(result.error).__name__}: {result.error}"
+        failures += error is not None
+        value = str(result.result) if isinstance(result.result, BanterString) else result.result
+        print(json.dumps({'lane': lane, 'result': value, 'output': result.output, 'error': error}))
+    return failures
+
+def start_repl(first=True, filename=None, interactive=False):
     if first:
         print("Welcome to the Banter Interpreter!\n")
         print("Type 'exit' to quit.")
@@ -95,7 +136,7 @@ def start_repl(first=True, filename=None):
             with open(filename, 'r') as file:
                 content = file.read()
                 process_input(content, filename)
-            if '-i' in sys.argv:
+            if interactive:
                 print()
                 start_repl(first=False)
             return
@@ -103,6 +144,7 @@ def start_repl(first=True, filename=None):
             print(f"Error loading file: {str(e)}")
             return
 
+    init_readline()
     while True:
         try:
             input_lines = []
@@ -125,15 +167,13 @@ def start_repl(first=True, filename=None):
                     print("\nExiting Banter.")
                     exit()
                 elif line.strip().lower() == 'clear':
-                    program_history.clear()
-                    context.clear()
-                    variables.clear()
+                    session.clear()
                     print("Program context cleared.")
                     break
                 elif line.strip().lower() == 'history':
                     print("\nValid command history:")
-                    for i, cmd in enumerate(program_history, 1):
-                        print(f"{i}.{(lambda x: "  " if x < 10 else " ")(i)}{cmd}")
+                    for i, cmd in enumerate(session.history, 1):
+                        print(f"{i}.{'  ' if i < 10 else ' '}{cmd}")
                     break
                 
                 if line.strip() == "":
@@ -164,16 +204,95 @@ def start_repl(first=True, filename=None):
         except Exception as e:
             print(f"Error: {str(e)}")
 
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="The Banter interpreter.")
+    arg_parser.add_argument('filename', nargs='?', help="Banter program to run")
+    arg_parser.add_argument('-i', dest='interactive', action='store_true',
+                            help="stay in interactive mode after running the file")
+    arg_parser.add_argument('--engine', choices=sorted(ENGINES), default='tree',
+                            help="evaluation engine (default: tree)")
+    arg_parser.add_argument('--no-cache', dest='cache', action='store_false',
+                            help="don't read or write the __bantercache__ directory")
+    arg_parser.add_argument('--batch', metavar='DIR',
+                            help="run every .banter file under DIR and report the results as JSON lines")
+    arg_parser.add_argument('--jobs', type=int, default=None,
+                            help="worker processes for --batch (default: one per CPU)")
+    arg_parser.add_argument('--report', metavar='FILE',
+                            help="write the --batch report to FILE instead of stdout")
+    arg_parser.add_argument('--memo', metavar='DIR',
+                            help="reuse the results of programs --batch has run before, kept in DIR")
+    arg_parser.add_argument('--lanes', metavar='FILE',
+                            help="run the file once per line of JSON variable bindings in FILE, vectorized")
+    arg_parser.add_argument('--emit-python', action='store_true',
+                            help="print the program translated to Python instead of running it")
+    arg_parser.add_argument('--max-steps', type=int, metavar='N',
+                            help="stop a run after N statements")
+    arg_parser.add_argument('--timeout', type=float, metavar='SECONDS',
+                            help="stop a run after SECONDS of wall-clock time")
+    arg_parser.add_argument('--max-memory', type=int, metavar='BYTES',
+                            help="stop a run once its variables hold more than BYTES")
+    arg_parser.add_argument('--lsp', action='store_true',
+                            help="run a language server for editors on stdin and stdout")
+    arg_parser.add_argument('--profile', action='store_true',
+                            help="print time and hit counts per statement, marker and goto to stderr")
+    arg_parser.add_argument('--profile-stacks', metavar='FILE',
+                            help="write the profile as collapsed stacks for flame graph tools")
+    args = arg_parser.parse_args(argv)
+    if (args.profile or args.profile_stacks) and args.engine != 'tree':
+        arg_parser.error("profiling needs --engine tree")
+    if (args.profile or args.profile_stacks) and args.batch:
+        arg_parser.error("--batch can't be profiled")
+    if args.emit_python and not args.filename:
+        arg_parser.error("--emit-python requires a filename")
+    if args.memo and not args.batch:
+        arg_parser.error("--memo needs --batch")
+    if args.lanes and not args.filename:
+        arg_parser.error("--lanes requires a filename")
+    if args.lanes and (args.profile or args.profile_stacks):
+        arg_parser.error("--lanes can't be profiled")
+    if args.lanes and (args.max_steps is not None or args.timeout is not None or args.max_memory is not None):
+        arg_parser.error("--lanes runs without limits")
+    if args.batch and args.filename:
+        arg_parser.error("--batch takes a directory instead of a filename")
+    if args.lsp and (args.filename or args.batch):
+        arg_parser.error("--lsp reads documents from the editor instead of files")
+    return args
+
+def write_profile(profiler, args):
+    if args.profile:
+        sys.stderr.write(profiler.report())
+    if args.profile_stacks:
+        with open(args.profile_stacks, 'w') as file:
+            file.write(profiler.collapsed())
+
+def limits_from_args(args):
+    if args.max_steps is None and args.timeout is None and args.max_memory is None:
+        return None
+    return Limits(max_steps=args.max_steps, timeout=args.timeout, max_memory=args.max_memory)
+
 if __name__ == "__main__":
-    if '-i' in sys.argv:
-        if len(sys.argv) > 2:
-            filename = sys.argv[2]
-            start_repl(first=False, filename=filename)
-        else:
-            start_repl(first=True)
-    else:
-        if len(sys.argv) > 1:
-            filename = sys.argv[1]
-            start_repl(first=False, filename=filename)
+    args = parse_args()
+    if args.lsp:
+        import lsp
+        sys.exit(lsp.serve())
+    profiler = None
+    if args.profile or args.profile_stacks:
+        from profiler import Profiler
+        profiler = Profiler(os.path.basename(args.filename) if args.filename else "repl")
+    session = Session(engine=args.engine, use_cache=args.cache, limits=limits_from_args(args),
+                      profiler=profiler)
+
+    if args.emit_python:
+        sys.exit(0 if emit_python(args.filename) else 1)
+    elif args.batch:
+        sys.exit(0 if run_batch(args) == 0 else 1)
+    elif args.lanes:
+        sys.exit(0 if run_lanes(args) == 0 else 1)
+    try:
+        if args.filename:
+            start_repl(first=False, filename=args.filename, interactive=args.interactive)
         else:
             start_repl(first=True)
+    finally:
+        if profiler is not None:
+            write_profile(profiler, args)
@@ -1,3 +1,7 @@
+import importlib
+import os
+import re
+
 import ply.lex as lex
 from ply.lex import LexToken
 import ply.yacc as yacc
@@ -237,11 +241,83 @@ def filter(lexer, add_endmarker=False):
             lineno = token.lineno
         yield _new_token("ENDMARKER", lineno, 0)
 
+#################### Prebuilt Tables ####################
+#
+# lextab.py and parsetab.py are generated from the rules in this module and
+# shipped with the interpreter. Loading them directly skips PLY's reflection
+# and validation, which otherwise dominate the start-up time of short scripts.
+# Each table is checked against the rules it was built from, and a stale table
+# falls back to PLY's normal construction, which writes a fresh one.
+
+TABLE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def lexer_master_regex():
+    """The master regex PLY builds from the t_ rules, in PLY's rule order."""
+    functions, strings = [], []
+    for name, rule in globals().items():
+        if not name.startswith('t_') or name == 't_error':
+            continue
+        if callable(rule):
+            functions.append((rule.__code__.co_firstlineno, name, rule.__doc__))
+        else:
+            strings.append((name, rule))
+    functions.sort()
+    strings.sort(key=lambda rule: len(rule[1]), reverse=True)
+    rules = [(name, regex) for _, name, regex in functions] + strings
+    return '|'.join(f'(?P<{name}>{regex})' for name, regex in rules)
+
+def grammar_signature():
+    """The signature PLY stores in parsetab.py for the p_ rules."""
+    rules = sorted((rule.__code__.co_firstlineno, name, rule.__doc__)
+                   for name, rule in globals().items()
+                   if name.startswith('p_') and name != 'p_error' and callable(rule))
+    parts = ["input", ''.join(''.join(level) for level in precedence), ' '.join(sorted(tokens))]
+    return ''.join(parts + [doc for _, _, doc in rules if doc])
+
+def load_lexer(lextab='lextab', reflags=0):
+    """Build the PLY lexer from lextab.py, or return None if it is missing or stale."""
+    try:
+        table = importlib.import_module(lextab)
+    except ImportError:
+        return None
+    if (getattr(table, '_tabversion', None) != lex.__tabversion__
+            or table._lexreflags != reflags
+            or table._lextokens != set(tokens)
+            or '|'.join(regex for regex, _ in table._lexstatere['INITIAL']) != lexer_master_regex()):
+        return None
+
+    lexer = lex.Lexer()
+    lexer.readtab(table, globals())
+    return lexer
+
+def write_lextab(lexer, lextab='lextab'):
+    try:
+        lexer.writetab(lextab, TABLE_DIR)
+    except IOError:
+        pass  # Read-only install; keep building the lexer at start-up
+
+def load_parser(tabmodule='parsetab'):
+    """Build the LR parser from parsetab.py, or return None if it is missing or stale."""
+    try:
+        table = importlib.import_module(tabmodule)
+    except ImportError:
+        return None
+    if getattr(table, '_tabversion', None) != yacc.__tabversion__ or table._lr_signature != grammar_signature():
+        return None
+
+    lr = yacc.LRTable()
+    lr.read_table(table)
+    lr.bind_callables(globals())
+    return yacc.LRParser(lr, p_error)
+
 class IndentLexer(object):
 
     def __init__(self, debug=0, optimize=0, lextab='lextab', reflags=0):
-        self.lexer = lex.lex(debug=debug, optimize=optimize,
-                             lextab=lextab, reflags=reflags)
+        self.lexer = None if debug else load_lexer(lextab, reflags)
+        if self.lexer is None:
+            self.lexer = lex.lex(debug=debug, optimize=optimize,
+                                 lextab=lextab, reflags=reflags)
+            write_lextab(self.lexer, lextab)
         self.token_stream = None
 
     def input(self, s, add_endmarker=True):
@@ -255,7 +331,175 @@ class IndentLexer(object):
         except StopIteration:
             return None
 
-lexer = IndentLexer()
+#################### Single-Pass Scanner ####################
+#
+# Scanner produces the same token stream as IndentLexer, but scans the source
+# and resolves NEWLINE, INDENT and DEDENT in one loop instead of running PLY's
+# lexer through three generator filters.
+
+PUNCTUATION = {
+    ',': 'COMMA', '@': 'MARKER', '(': 'LP', ')': 'RP',
+    '+': 'PLUS', '-': 'MINUS', '*': 'TIMES', '/': 'DIVIDE',
+}
+
+# Equivalent to the t_ rules above; the first character decides the rule.
+# Spaces after a token on the same line never matter, so they are skipped as
+# part of its match, and anything no rule accepts is an ERROR.
+TOKEN_PATTERN = re.compile('|'.join([
+    r'(?:(?P<MNEUMONIC>[a-zA-Z_][a-zA-Z0-9_]*)',
+    r'(?P<NUMBER>\d+\.\d+|\d+)',
+    r'(?P<STRING>"(?:[^"\\\n]|\\.)*")',
+    r'(?P<COMP_OP><=|>=|==|!=|<|>)',
+    r'(?P<PUNCTUATION>[,@()+\-*/]))[ \t]*',
+    r'(?P<WS> +|\t+)',
+    r'(?P<NEWLINE>\n+)',
+    r'(?P<COMMENT>\#[^\n]*)',
+    r'(?P<ERROR>.)',
+]))
+
+class Token:
+    """A lightweight stand-in for PLY's LexToken."""
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'lexer')
+
+    def __init__(self, type, value, lineno, lexpos):
+        self.type = type
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+
+    def __repr__(self):
+        return f"LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})"
+
+def at_line(error, lineno):
+    """Record the line an error was found on as error.line, leaving its message as is."""
+    error.line = lineno
+    return error
+
+def scan(s, add_endmarker=True):
+    """Yield the tokens of a source string, with indentation already resolved."""
+    reserved_type = reserved.get
+    levels = [0]
+    lineno = 1
+    paren_count = 0
+    at_line_start = True
+    indent = NO_INDENT
+    depth = 0
+    last_lineno = None   # Line of the last token the indentation rules saw
+    yielded_lineno = 1
+
+    for m in TOKEN_PATTERN.finditer(s):
+        kind = m.lastgroup
+
+        if kind == 'MNEUMONIC':
+            value = m.group(kind)
+            type = reserved_type(value, kind)
+
+        elif kind == 'WS':
+            # Only indentation counts; other whitespace separates tokens
+            if not at_line_start or paren_count:
+                continue
+            if depth:
+                raise at_line(IndentationError("inconsistent use of tabs and spaces in indentation"), lineno)
+            depth = len(m.group(kind))
+            last_lineno = lineno
+            continue
+
+        elif kind == 'NEWLINE':
+            token_lineno = lineno
+            value = m.group(kind)
+            lineno += len(value)
+            if paren_count:
+                continue
+            last_lineno = token_lineno
+            depth = 0
+            if indent == MAY_INDENT:
+                indent = MUST_INDENT
+            if at_line_start:
+                continue  # Blank line
+            at_line_start = True
+            yielded_lineno = token_lineno
+            yield Token('NEWLINE', value, token_lineno, m.start())
+            continue
+
+        elif kind == 'NUMBER':
+            type = kind
+            value = m.group(kind)
+            value = float(value) if '.' in value else int(value)
+
+        elif kind == 'PUNCTUATION':
+            value = m.group(kind)
+            type = PUNCTUATION[value]
+            if type == 'LP':
+                paren_count += 1
+            elif type == 'RP':
+                paren_count -= 1
+
+        elif kind == 'COMMENT':
+            continue
+
+        elif kind == 'ERROR':
+            raise at_line(SyntaxError("Unknown symbol %r" % (m.group(kind),)), lineno)
+
+        else:
+            type = kind
+            value = m.group(kind)
+
+        token = Token(type, value, lineno, m.start())
+        last_lineno = lineno
+
+        if type == "THEN" or type == "ELSE":
+            must_indent = False
+            next_indent = MAY_INDENT
+        else:
+            must_indent = indent == MUST_INDENT
+            next_indent = NO_INDENT
+
+        if must_indent:
+            # The current depth must be larger than the previous level
+            if not (depth > levels[-1]):
+                raise at_line(IndentationError("expected an indented block"), lineno)
+            levels.append(depth)
+            yield Token("INDENT", None, lineno, 0)
+
+        elif at_line_start:
+            if depth > levels[-1]:
+                raise at_line(IndentationError("indentation increase but not in new block"), lineno)
+            elif depth < levels[-1]:
+                # Back up; but only if it matches a previous level
+                try:
+                    i = levels.index(depth)
+                except ValueError:
+                    raise at_line(IndentationError("inconsistent indentation"), lineno)
+                for _ in range(i + 1, len(levels)):
+                    yield Token("DEDENT", None, lineno, 0)
+                    levels.pop()
+
+        at_line_start = False
+        indent = next_indent
+        yielded_lineno = lineno
+        yield token
+
+    # Must dedent any remaining levels
+    for _ in range(1, len(levels)):
+        yielded_lineno = last_lineno
+        yield Token("DEDENT", None, last_lineno, 0)
+
+    if add_endmarker:
+        yield Token("ENDMARKER", None, yielded_lineno, 0)
+
+class Scanner(object):
+    """Tokenizer for BanterParser; a faster, drop-in replacement for IndentLexer."""
+
+    def __init__(self):
+        self.token_stream = None
+
+    def input(self, s, add_endmarker=True):
+        self.token_stream = scan(s, add_endmarker)
+
+    def token(self):
+        return next(self.token_stream, None)
+
+lexer = Scanner()
 
 ### sample='''
 ### let x be 0
@@ -292,8 +536,6 @@ precedence = (
     ('left', 'TIMES', 'DIVIDE'),
 )
 
-global_ast = ""
-
 # Grammar rules
 # View parser.out for a more comprehensive understanding of the grammar
 def p_input(p):
@@ -306,16 +548,14 @@ def p_program(p):
                | command
                | expression'''  # Add this line to allow expressions as valid programs
 
-    global global_ast
     if len(p) == 2:
         if isinstance(p[1], list):  # Multiple statements
-            global_ast = p[1]
+            p[0] = p[1]
         else:
-            global_ast = [p[1]]  # Single statement or expression, create a list
+            p[0] = [p[1]]  # Single statement or expression, create a list
     else:
-        global_ast = p[1] + [p[2]] # Multiple statements, concatenate lists
-
-    p[0] = global_ast
+        p[1].append(p[2]) # Multiple statements, extend the list in place
+        p[0] = p[1]
 
 def p_command(p):
     '''command : stmt'''
@@ -332,13 +572,11 @@ def p_stmts(p):
              | stmt'''
     if len(p) == 2:
         p[0] = p[1]
-    #else:
-    #    #p[0] = [p[1]] + [p[2]]
-    #    p[0] = p[1] + [p[2]]
     elif isinstance(p[1], list):
-        p[0] = p[1] + [p[2]]
+        p[1].append(p[2])
+        p[0] = p[1]
     else:
-        p[0] = [p[1]] + [p[2]]
+        p[0] = [p[1], p[2]]
 
 
 def p_block(p):
@@ -352,35 +590,35 @@ def p_block(p):
 
 def p_statement_let(p):
     '''statement : LET MNEUMONIC BE expression'''
-    p[0] = LetStatement(mneumonic=p[2], value=p[4])
+    p[0] = LetStatement(mneumonic=p[2], value=p[4], lineno=p.lineno(1))
 
 def p_statement_if(p):
     '''statement : IF comparison COMMA THEN block
                  | IF comparison COMMA THEN block ELSE block'''
     if len(p) == 6:
-        p[0] = IfStatement(expr=p[2], do=p[5])
+        p[0] = IfStatement(expr=p[2], do=p[5], lineno=p.lineno(1))
     else:
-        p[0] = IfElseStatement(expr=p[2], do=p[5], alternate=p[7])
+        p[0] = IfElseStatement(expr=p[2], do=p[5], alternate=p[7], lineno=p.lineno(1))
 
 def p_statement_return(p):
     '''statement : RETURN expression'''
-    p[0] = ReturnStatement(value=p[2])
+    p[0] = ReturnStatement(value=p[2], lineno=p.lineno(1))
 
 def p_statement_print(p):
     '''statement : PRINT expression
                  | PRINT'''
     if len(p) == 2:
-        p[0] = PrintStatement(value=None)
+        p[0] = PrintStatement(value=None, lineno=p.lineno(1))
     else:
-        p[0] = PrintStatement(value=p[2])
+        p[0] = PrintStatement(value=p[2], lineno=p.lineno(1))
 
 def p_statement_goto(p):
     '''statement : GOTO INSTRUCTION NUMBER'''
-    p[0] = GotoStatement(label=p[3])
+    p[0] = GotoStatement(label=p[3], lineno=p.lineno(1))
 
 def p_statement_marker(p):
     '''statement : MARKER NUMBER'''
-    p[0] = MarkerStatement(label=p[2])
+    p[0] = MarkerStatement(label=p[2], lineno=p.lineno(1))
 
 # Expressions
 def p_expression_binop(p):
@@ -390,9 +628,9 @@ def p_expression_binop(p):
                   | expression DIVIDE expression
                   | MINUS expression'''
     if len(p) == 3:
-        p[0] = Operation(operator="*", operands=[-1, p[2]])
+        p[0] = Operation(operator="*", operands=(-1, p[2]))
     else:
-        p[0] = Operation(operator=p[2], operands=[p[1], p[3]])
+        p[0] = Operation(operator=p[2], operands=(p[1], p[3]))
 
 def p_expression_number(p):
     '''expression : NUMBER'''
@@ -400,11 +638,11 @@ def p_expression_number(p):
 
 def p_expression_string(p):
     '''expression : STRING'''
-    p[0] = p[1]  
+    p[0] = BanterString(p[1][1:-1])
 
 def p_expression_mneumonic(p):
     '''expression : MNEUMONIC'''
-    p[0] = Mneumonic(name=p[1], value=None)
+    p[0] = Mneumonic.intern(p[1])
 
 def p_expression_bool(p):
     '''expression : BOOL'''
@@ -423,22 +661,26 @@ def p_expression_comparison(p):
 
 def p_comparison(p):
     '''comparison : expression COMP_OP expression'''
-    p[0] = Comparison(operator=p[2], operands=[p[1], p[3]])
+    p[0] = Comparison(operator=p[2], operands=(p[1], p[3]))
+
+class ParseError(SyntaxError):
+    """Raised by the parser for input that does not match the grammar; `line`
+    is the line of the offending token, or None at the end of the input."""
+    line = None
 
 def p_error(p):
     if p:
-        print(f"Syntax error at '{p.value}'")
+        raise at_line(ParseError(f"Syntax error at '{p.value}'"), p.lineno)
     else:
-        print("Syntax error at EOF")
-    raise Exception
+        raise ParseError("Syntax error at EOF")
 
 class BanterParser:
 
     def __init__(self, lexer=None):
         if lexer is None:
-            lexer = IndentLexer()
+            lexer = Scanner()
         self.lexer = lexer
-        self.parser = yacc.yacc(start="input")
+        self.parser = load_parser() or yacc.yacc(start="input")
 
     def parse(self, code):
         self.lexer.input(code)
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from BanterADT import BanterString
+from interpreter import ReturnValue
+from limits import LimitExceeded
+from output import CaptureSink
+from session import ParseFailed, Session
+
+#################### Batch Runner ####################
+#
+# Runs every .banter file under a directory on a pool of worker processes and
+# writes one JSON object per program as soon as it finishes. Each worker builds
+# its parser once, in the pool initializer, and gives every program a fresh
+# Session around it.
+
+_worker = {}
+
+def find_programs(directory):
+    """Return the .banter files under a directory, sorted by path."""
+    programs = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('__'))
+        programs.extend(os.path.join(root, name) for name in files if name.endswith('.banter'))
+    return sorted(programs)
+
+def init_worker(engine, use_cache, limits=None, memo=None):
+    import banterlang
+    _worker['parser'] = banterlang.BanterParser(banterlang.Scanner())
+    _worker['engine'] = engine
+    _worker['use_cache'] = use_cache
+    _worker['limits'] = limits
+    _worker['results'] = None
+    if memo is not None:
+        import memo as results
+        _worker['results'] = results.ResultCache(memo)
+
+def run_file(path):
+    """Run one program and return its report record."""
+    record = {'file': path, 'status': 'ok', 'result': None, 'output': '', 'error': None,
+              'parse_time': 0.0, 'run_time': 0.0}
+    session = Session(engine=_worker['engine'], output=CaptureSink(),
+                      use_cache=_worker['use_cache'], parser=_worker['parser'],
+                      limits=_worker['limits'])
+    try:
+        with open(path, 'r') as file:
+            source = file.read()
+
+        start = time.perf_counter()
+        try:
+            entry = session.parse(source, path)
+        finally:
+            record['parse_time'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            result = execute(session, entry, path, record)
+        finally:
+            record['run_time'] = time.perf_counter() - start
+
+        result = result.value if isinstance(result, ReturnValue) else result
+        record['result'] = str(result) if isinstance(result, BanterString) else result
+    except ParseFailed as e:
+        record['status'] = 'syntax_error'
+        record['error'] = str(e.__cause__ or e)
+    except LimitExceeded as e:
+        record['status'] = 'limit_exceeded'
+        record['error'] = str(e)
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['output'] = session.output.getvalue()
+    return record
+
+def execute(session, entry, path, record):
+    """Run a program on a fresh session, replaying an identical program's
+    result when the worker keeps them."""
+    results = _worker['results']
+    if results is None:
+        return session.execute(entry, path)
+    import memo
+    key = results.key(entry.program, None, _worker['engine'], memo.limits_key(_worker['limits']))
+    found = results.get(key)
+    record['cached'] = found is not None
+    if found is not None:
+        session.output.write(found.output)
+        return found.result
+    result = session.execute(entry, path)
+    results.put(key, memo.Result(result, session.output.getvalue(), dict(session.variables)))
+    return result
+
+def run_batch(paths, report=None, jobs=None, engine='tree', use_cache=False, limits=None, memo=None):
+    """Run programs in parallel, writing a JSON line to report as each one finishes.
+    With `memo`, a directory, results of programs run before are replayed from
+    it (see memo.py).
+
+    Returns the number of programs that did not run successfully.
+    """
+    report = sys.stdout if report is None else report
+    failures = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=(engine, use_cache, limits, memo)) as pool:
+        futures = {pool.submit(run_file, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                # The worker itself died, e.g. from running out of memory
+                record = {'file': futures[future], 'status': 'error', 'result': None, 'output': '',
+                          'error': f"worker failed: {e}", 'parse_time': 0.0, 'run_time': 0.0}
+            failures += record['status'] != 'ok'
+            report.write(json.dumps(record) + "\n")
+            report.flush()
+    return failures
@@ -0,0 +1,105 @@
+"""Responsiveness of cooperative runs next to a runaway program.
+
+Runs `sessions` short counting programs concurrently on one event loop with
+cooperative.eval_program_async, beside a goto loop that never ends and is
+stopped by its run_time budget. A heartbeat task records how late the event
+loop wakes it: at most a couple of yield intervals per running program, however
+long the programs run. Also times one counting program with eval_program and with
+eval_program_async alone, for the cost of yielding.
+
+    python benchmarks/bench_async.py [sessions] [run_time]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import banterlang
+import cooperative
+import interpreter
+from limits import LimitExceeded
+from output import CaptureSink, NullSink
+
+COUNT = """\
+let i be 0
+let total be 0
+@1
+if i < 20000, then
+    let total be total + i
+    let i be i + 1
+    goto instruction 1
+print total
+return total
+"""
+
+RUNAWAY = """\
+let n be 0
+@1
+let n be n + 1
+goto instruction 1
+"""
+
+HEARTBEAT = 0.001  # Seconds between heartbeats
+
+async def heartbeat(lags, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT
+        await asyncio.sleep(HEARTBEAT)
+        lags.append(loop.time() - expected)
+
+async def session(program, finished):
+    start = time.perf_counter()
+    output = cooperative.AsyncSink(CaptureSink())
+    result = await cooperative.eval_program_async(program, {}, output=output)
+    finished.append(time.perf_counter() - start)
+    return result.value
+
+async def runaway(program, run_time):
+    start = time.perf_counter()
+    try:
+        await cooperative.eval_program_async(program, {}, output=cooperative.AsyncSink(NullSink()),
+                                             run_time=run_time)
+    except LimitExceeded as error:
+        return error, time.perf_counter() - start
+    sys.exit("the runaway loop finished")
+
+async def concurrent(sessions, run_time):
+    count = banterlang.parser.parse(COUNT)
+    lags, finished, stop = [], [], asyncio.Event()
+    ticker = asyncio.create_task(heartbeat(lags, stop))
+    stopped = asyncio.create_task(runaway(banterlang.parser.parse(RUNAWAY), run_time))
+    results = await asyncio.gather(*(session(count, finished) for _ in range(sessions)))
+    error, elapsed = await stopped
+    stop.set()
+    await ticker
+    if set(results) != {sum(range(20000))}:
+        sys.exit("wrong results")
+    return lags, finished, error, elapsed
+
+def alone():
+    program = banterlang.parser.parse(COUNT)
+    start = time.perf_counter()
+    interpreter.eval_program(program, {}, output=NullSink())
+    plain = time.perf_counter() - start
+    start = time.perf_counter()
+    asyncio.run(cooperative.eval_program_async(program, {}, output=cooperative.AsyncSink(NullSink())))
+    return plain, time.perf_counter() - start
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    run_time = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    plain, cooperative_run = alone()
+    print(f"one program    eval_program {plain * 1e3:.1f} ms, eval_program_async {cooperative_run * 1e3:.1f} ms")
+
+    lags, finished, error, elapsed = asyncio.run(concurrent(sessions, run_time))
+    lags.sort()
+    print(f"{sessions} sessions   finished in {min(finished) * 1e3:.0f}-{max(finished) * 1e3:.0f} ms")
+    print(f"runaway        {error} ({elapsed:.2f} s wall-clock for {run_time:.2f} s of run time)")
+    print(f"heartbeat lag  median {lags[len(lags) // 2] * 1e3:.2f} ms, max {lags[-1] * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Batch mode against one interpreter process per program.
+
+Copies the examples into a temporary directory several times over and times
+running each file with its own `banter.py` process, as a shell loop would,
+and running the whole directory with `banter.py --batch`.
+
+    python benchmarks/bench_batch.py [copies] [jobs]
+"""
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BANTER = os.path.join(ROOT, 'banter.py')
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    jobs = sys.argv[2] if len(sys.argv) > 2 else str(os.cpu_count())
+
+    examples = [path for path in glob.glob(os.path.join(ROOT, 'examples', '*.banter'))
+                if not path.endswith('prime.banter')]
+    directory = tempfile.mkdtemp()
+    try:
+        for copy in range(copies):
+            for path in examples:
+                shutil.copy(path, os.path.join(directory, f"{copy}_{os.path.basename(path)}"))
+        programs = sorted(glob.glob(os.path.join(directory, '*.banter')))
+
+        start = time.perf_counter()
+        for path in programs:
+            subprocess.run([sys.executable, BANTER, '--no-cache', path], stdout=subprocess.DEVNULL)
+        loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, BANTER, '--no-cache', '--batch', directory, '--jobs', jobs],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        batch = time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{len(programs)} programs")
+    print(f"process per file  {loop:7.2f}s")
+    print(f"--batch --jobs {jobs:<3}{batch:7.2f}s  ({loop / batch:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Running a file from the program cache against parsing it again.
+
+Writes a generated program to a temporary directory and times banter.py on it
+in fresh processes: with --no-cache, on the first (cache-filling) run, and on
+cache hits.
+
+    python benchmarks/bench_cache.py [statements] [--engine=vm|python]
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def generate_program(statements):
+    lines = ["let total be 0"]
+    for n in range(statements // 3):
+        lines.append(f"let x{n % 100} be total + {n}")
+        lines.append(f"if x{n % 100} > total, then")
+        lines.append(f"   let total be x{n % 100} - 1")
+    lines.append("return total")
+    return "\n".join(lines) + "\n"
+
+def timed(command):
+    start = time.perf_counter()
+    subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    statements = int(args[0]) if args else 5000
+
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, 'program.banter')
+        with open(filename, 'w') as file:
+            file.write(generate_program(statements))
+        command = [sys.executable, os.path.join(ROOT, 'banter.py'), *options, filename]
+
+        uncached = statistics.median(timed(command + ['--no-cache']) for _ in range(5))
+        first = timed(command)
+        hit = statistics.median(timed(command) for _ in range(5))
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{statements} statements")
+    print(f"--no-cache   {uncached * 1000:8.1f} ms")
+    print(f"first run    {first * 1000:8.1f} ms")
+    print(f"cache hit    {hit * 1000:8.1f} ms  ({uncached / hit:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Cost of the evaluation hook API.
+
+Runs examples/fib.banter and examples/prime.banter (capped at a number of
+primes) on the tree-walker three ways: through a copy of eval_program's plain
+loop as it was before hooks existed, through eval_program without hooks, and
+through eval_program with hooks that do nothing. The first two should match
+within noise; the third shows what the instrumented loop costs.
+
+    python benchmarks/bench_hooks.py [primes] [repeats]
+"""
+import os
+import re
+import sys
+import time
+from collections import deque
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import banterlang
+import analysis
+import interpreter
+from frame import Frame, resolve
+from hooks import Hooks
+from output import NullSink
+
+def reference_eval_program(program, variables, context, output):
+    """eval_program's loop without any hook, limit or profiler dispatch."""
+    context.insert(0, program)
+    markers = interpreter.MarkerIndex(context[0])
+    execution_queue = deque(program)
+    result = None
+    while execution_queue:
+        stmt = execution_queue.popleft()
+        result = interpreter.eval_statement_iter(stmt, variables, context, execution_queue, output,
+                                                 False, markers)
+        if isinstance(result, interpreter.ReturnValue):
+            break
+    output.flush()
+    return result
+
+def load(name, primes):
+    with open(os.path.join(ROOT, 'examples', name)) as file:
+        source = file.read()
+    if name == 'prime.banter':
+        source = re.sub(r"let maxPrimes be \d+", f"let maxPrimes be {primes}", source)
+    return banterlang.parser.parse(source)
+
+def run(ast, repeats, hooks=None, reference=False):
+    best = float('inf')
+    for _ in range(repeats):
+        variables = Frame()
+        program = resolve(analysis.analyze(ast, variables), variables)
+        start = time.perf_counter()
+        if reference:
+            reference_eval_program(program, variables, [], NullSink())
+        else:
+            interpreter.eval_program(program, variables, [], output=NullSink(), hooks=hooks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    primes = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print(f"{'program':<14}{'reference':>11}{'no hooks':>11}{'change':>9}{'hooks':>11}{'overhead':>10}")
+    for name in ('fib.banter', 'prime.banter'):
+        ast = load(name, primes)
+        reference = run(ast, repeats, reference=True)
+        plain = run(ast, repeats)
+        hooked = run(ast, repeats, hooks=Hooks())
+        print(f"{name:<14}{reference:11.4f}{plain:11.4f}{(plain / reference - 1) * 100:8.1f}%"
+              f"{hooked:11.4f}{(hooked / reference - 1) * 100:9.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Tiered evaluation against the plain tree-walker.
+
+Runs every program in examples/ (prime.banter capped at a number of primes)
+with and without `tiered`, after the same analysis and slot resolution, and
+reports the best time of each. Short programs should take as long either way;
+programs that loop for long should run at compiled speed once tiered. Exits
+with status 1 if the two runs of a program print different lines.
+
+    python benchmarks/bench_jit.py [primes] [repeats]
+"""
+import glob
+import io
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import banterlang
+import analysis
+import interpreter
+from frame import Frame, resolve
+
+def load(path, primes):
+    with open(path) as file:
+        source = file.read()
+    if os.path.basename(path) == 'prime.banter':
+        source = re.sub(r"let maxPrimes be \d+", f"let maxPrimes be {primes}", source)
+    return banterlang.parser.parse(source)
+
+def run(ast, repeats, tiered):
+    best = float('inf')
+    for _ in range(repeats):
+        variables = Frame()
+        program = resolve(analysis.analyze(ast, variables), variables)
+        output = io.StringIO()
+        start = time.perf_counter()
+        try:
+            interpreter.eval_program(program, variables, [], output=output, tiered=tiered)
+        except Exception as error:
+            output.write(f"{type(error).__name__}: {error}\n")
+        best = min(best, time.perf_counter() - start)
+    return best, output.getvalue()
+
+def main():
+    primes = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    status = 0
+    print(f"{'program':<18}{'tree ms':>10}{'tiered ms':>11}{'speedup':>9}")
+    for path in sorted(glob.glob(os.path.join(ROOT, 'examples', '*.banter'))):
+        name = os.path.basename(path)
+        ast = load(path, primes)
+        plain, printed = run(ast, repeats, False)
+        tiered, tiered_printed = run(ast, repeats, True)
+        if printed != tiered_printed:
+            print(f"{name}: tiered run printed different lines")
+            status = 1
+        print(f"{name:<18}{plain * 1e3:10.3f}{tiered * 1e3:11.3f}{plain / tiered:8.1f}x")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Gain from running one program over many input bindings as vectorized lanes.
+
+Runs each program below once per lane with a different `n`, first with
+vectorized.eval_lanes and then lane by lane with interpreter.eval_program, and
+checks every lane's result and output are the same both ways.
+
+    python benchmarks/bench_lanes.py [lanes] [repeats]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import banterlang
+import interpreter
+import vectorized
+from output import CaptureSink
+
+PROGRAMS = {
+    'sum': """
+let total be 0
+@1
+if n > 0, then
+   let total be total + n
+   let n be n - 1
+   goto instruction 1
+return total
+""",
+    'squares': """
+let k be 0
+@1
+if (k + 1) * (k + 1) <= n, then
+   let k be k + 1
+   goto instruction 1
+return k
+""",
+    'branches': """
+let total be 0
+let i be 0
+@1
+if i * i > 3 * n, then
+   let total be total + i
+else
+   let total be total - 1
+let i be i + 1
+if i < n, then
+   goto instruction 1
+print total / n
+return total
+""",
+}
+
+def scalar(program, bindings):
+    results = []
+    for row in bindings:
+        output = CaptureSink()
+        try:
+            result = interpreter.eval_program(program, dict(row), [], output=output)
+            results.append((result.value if isinstance(result, interpreter.ReturnValue) else result,
+                            output.getvalue(), None))
+        except Exception as e:
+            results.append((None, output.getvalue(), repr(e)))
+    return results
+
+def vector(program, bindings):
+    return [(lane.result, lane.output, None if lane.error is None else repr(lane.error))
+            for lane in vectorized.eval_lanes(program, bindings)]
+
+def best(function, program, bindings, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = function(program, bindings)
+        times.append(time.perf_counter() - start)
+    return min(times), results
+
+def main():
+    lanes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    if vectorized.np is None:
+        sys.exit("numpy is not installed")
+
+    print(f"{'program':<10}{'lanes':>8}{'per lane':>10}{'vector':>10}{'speedup':>10}")
+    for name, source in PROGRAMS.items():
+        program = banterlang.parser.parse(source)
+        bindings = [{'n': 1 + lane % 97} for lane in range(lanes)]
+        plain, expected = best(scalar, program, bindings, repeats)
+        fast, results = best(vector, program, bindings, repeats)
+        if results != expected:
+            sys.exit(f"{name}: lanes differ from per-lane runs")
+        print(f"{name:<10}{lanes:>8}{plain:>10.3f}{fast:>10.3f}{plain / fast:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Lexing throughput of the single-pass Scanner against the PLY filter chain.
+
+Tokenizes a large generated program with both lexers, checks that they produce
+the same token stream, and reports tokens per second.
+
+    python benchmarks/bench_lexer.py [statements]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import banterlang
+
+def generate_program(statements):
+    lines = ['let total be 0', 'let name be "banter"', '@1']
+    for n in range(statements // 4):
+        lines.append(f'if total < {n * 3}, then  # keep counting')
+        lines.append(f'    let x{n % 50} be (total + {n}) * 2.5')
+        lines.append('    let total be total + 1')
+        lines.append('else')
+        lines.append('    print name')
+    return '\n'.join(lines) + '\n'
+
+def tokenize(lexer, source):
+    lexer.input(source)
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in iter(lexer.token, None)]
+
+def throughput(lexer, source, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        if hasattr(lexer, 'lexer'):
+            lexer.lexer.lineno = 1  # PLY keeps counting lines across inputs
+        start = time.perf_counter()
+        lexer.input(source)
+        count = sum(1 for _ in iter(lexer.token, None))
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    source = generate_program(statements)
+
+    chain = banterlang.IndentLexer()
+    scanner = banterlang.Scanner()
+    chain.lexer.lineno = 1
+    if tokenize(chain, source) != tokenize(scanner, source):
+        print("FAIL: token streams differ")
+        sys.exit(1)
+
+    print(f"{len(source) / 1e6:.1f} MB of source")
+    results = {}
+    for name, lexer in (('IndentLexer', chain), ('Scanner', scanner)):
+        count, seconds = throughput(lexer, source)
+        results[name] = count / seconds
+        print(f"{name:<12}{count:>10} tokens {seconds:8.3f}s {count / seconds / 1e6:8.2f} M tokens/s")
+    print(f"\nspeedup {results['Scanner'] / results['IndentLexer']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Overhead of execution limits.
+
+Runs examples/fib.banter and examples/prime.banter (capped at a number of
+primes) on every engine without limits and with step, time and memory limits
+all set high enough never to trip, and reports the best of several runs.
+
+    python benchmarks/bench_limits.py [primes] [repeats]
+"""
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import banterlang
+import analysis
+import interpreter
+import transpiler
+import vm
+from frame import Frame, resolve
+from limits import Limits
+from output import NullSink
+
+ENGINES = {'tree': interpreter, 'vm': vm, 'python': transpiler}
+
+LIMITS = Limits(max_steps=10**12, timeout=3600, max_memory=1 << 30)
+
+def load(name, primes):
+    with open(os.path.join(ROOT, 'examples', name)) as file:
+        source = file.read()
+    if name == 'prime.banter':
+        source = re.sub(r"let maxPrimes be \d+", f"let maxPrimes be {primes}", source)
+    return banterlang.parser.parse(source)
+
+def run(engine, ast, limits, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        variables = Frame()
+        program = resolve(analysis.analyze(ast, variables), variables)
+        start = time.perf_counter()
+        ENGINES[engine].eval_program(program, variables, [], output=NullSink(), limits=limits)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    primes = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print(f"{'program':<14}{'engine':<8}{'off':>10}{'on':>10}{'overhead':>10}")
+    for name in ('fib.banter', 'prime.banter'):
+        ast = load(name, primes)
+        for engine in ENGINES:
+            off = run(engine, ast, None, repeats)
+            on = run(engine, ast, LIMITS, repeats)
+            print(f"{name:<14}{engine:<8}{off:10.4f}{on:10.4f}{(on / off - 1) * 100:9.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Gain from running counted goto loops natively.
+
+Runs examples/sum.banter, examples/mult.banter and examples/prime.banter, with
+their loop bounds scaled, on the tree-walker with and without loops.optimize,
+and checks both runs print the same lines and leave the same variables.
+
+    python benchmarks/bench_loops.py [scale] [repeats]
+"""
+import io
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import banterlang
+import analysis
+import interpreter
+import loops
+from frame import Frame, resolve
+
+# Where each program's bound is, and how many times the scale it is set to
+SCALED = {
+    'sum.banter': (r"let n be \d+", "let n be {}", 1000),
+    'mult.banter': (r"if x < 3,", "if x < {},", 1000),
+    'prime.banter': (r"let maxPrimes be \d+", "let maxPrimes be {}", 1),
+}
+
+def load(name, scale):
+    with open(os.path.join(ROOT, 'examples', name)) as file:
+        source = file.read()
+    pattern, replacement, factor = SCALED[name]
+    return banterlang.parser.parse(re.sub(pattern, replacement.format(scale * factor), source))
+
+def run(ast, repeats, optimize):
+    best = float('inf')
+    for _ in range(repeats):
+        variables = Frame()
+        program = resolve(analysis.analyze(ast, variables), variables)
+        if optimize:
+            program = loops.optimize(program)
+        output = io.StringIO()
+        start = time.perf_counter()
+        interpreter.eval_program(program, variables, [], output=output)
+        best = min(best, time.perf_counter() - start)
+    return best, output.getvalue(), dict(variables)
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print(f"{'program':<14}{'tree':>10}{'loops':>10}{'speedup':>10}")
+    for name in SCALED:
+        ast = load(name, scale)
+        plain, printed, variables = run(ast, repeats, False)
+        optimized, optimized_printed, optimized_variables = run(ast, repeats, True)
+        if (printed, variables) != (optimized_printed, optimized_variables):
+            sys.exit(f"{name}: optimized run differs")
+        print(f"{name:<14}{plain:10.4f}{optimized:10.4f}{plain / optimized:9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Per-keystroke latency of the language server as documents grow.
+
+Opens machine-generated documents of doubling size in an lsp.Server, then
+types a new statement into the middle of each one key by key (Enter included),
+sending an incremental didChange per key. Each keystroke is timed from the
+change arriving to its diagnostics being published. Exits with status 1 if the
+median keystroke on the largest document is more than TOLERANCE times slower
+than on the smallest, i.e. if editing cost grows with the document.
+
+    python benchmarks/bench_lsp.py [largest lines] [doublings]
+"""
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import lsp
+
+TOLERANCE = 2.0
+
+URI = 'file:///bench.banter'
+
+TYPED = "\nif total < 10, then\n   goto instruction 1"
+
+def generate_document(lines):
+    source = ["let total be 0", "@1"]
+    n = 0
+    while len(source) < lines:
+        source.append(f"let x{n % 100} be total + {n}")
+        source.append(f"if x{n % 100} > total, then")
+        source.append(f"   let total be x{n % 100} - 1")
+        n += 1
+    return "\n".join(source[:lines]) + "\n"
+
+def change(line, character, text):
+    position = {'line': line, 'character': character}
+    return {'jsonrpc': '2.0', 'method': 'textDocument/didChange',
+            'params': {'textDocument': {'uri': URI},
+                       'contentChanges': [{'range': {'start': position, 'end': position}, 'text': text}]}}
+
+def keystrokes(server):
+    """Type TYPED at the end of the middle line, timing every key."""
+    document = server.documents[URI]
+    line = len(document.lines) // 2
+    while not document.lines[line].startswith('let'):
+        line += 1
+    character = len(document.lines[line])
+    times = []
+    for key in TYPED:
+        start = time.perf_counter()
+        server.handle(change(line, character, key))
+        times.append(time.perf_counter() - start)
+        if key == '\n':
+            line, character = line + 1, 0
+        else:
+            character += 1
+    return times
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    doublings = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print(f"{'lines':>8}{'open ms':>10}{'median us':>11}{'max us':>10}")
+    medians = []
+    for step in range(doublings, -1, -1):
+        lines = largest // 2 ** step
+        server = lsp.Server(io.BytesIO(), io.BytesIO())
+        start = time.perf_counter()
+        server.handle({'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+                       'params': {'textDocument': {'uri': URI, 'text': generate_document(lines)}}})
+        opened = time.perf_counter() - start
+        keystrokes(server)  # Warm up
+        times = keystrokes(server)
+        medians.append(statistics.median(times))
+        print(f"{lines:>8}{opened * 1e3:>10.1f}{medians[-1] * 1e6:>11.1f}{max(times) * 1e6:>10.1f}")
+
+    growth = medians[-1] / medians[0]
+    print(f"\nlargest/smallest median keystroke: {growth:.2f}x (tolerance {TOLERANCE}x)")
+    return 1 if growth > TOLERANCE else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Gain from replaying the results of identical runs.
+
+Runs the example programs (prime.banter scaled down) as a stream of submissions in which each program is
+resubmitted `copies` times, once with plain eval_program and once through a
+memo.ResultCache, and checks both give every submission the same result and
+output. With a directory argument the cache also stores results on disk there,
+and a second cache, as in a new process, replays them from disk.
+
+    python benchmarks/bench_memo.py [copies] [directory]
+"""
+import glob
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import banterlang
+import interpreter
+import memo
+from output import CaptureSink
+
+def submissions(copies):
+    programs = []
+    for path in sorted(glob.glob(os.path.join(ROOT, 'examples', '*.banter'))):
+        with open(path) as file:
+            source = file.read()
+        if path.endswith('prime.banter'):
+            source = re.sub(r"let maxPrimes be \d+", "let maxPrimes be 20", source)
+        programs.append(banterlang.parser.parse(source))
+    return [program for _ in range(copies) for program in programs]
+
+def run_all(run, programs):
+    results = []
+    start = time.perf_counter()
+    for program in programs:
+        output = CaptureSink()
+        result = run(program, {}, output=output)
+        results.append((result.value if isinstance(result, interpreter.ReturnValue) else result,
+                        output.getvalue()))
+    return time.perf_counter() - start, results
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    directory = sys.argv[2] if len(sys.argv) > 2 else None
+    programs = submissions(copies)
+
+    plain, expected = run_all(interpreter.eval_program, programs)
+    runs = [("eval_program", plain)]
+    cache = memo.ResultCache(directory)
+    cached, results = run_all(cache.run, programs)
+    if results != expected:
+        sys.exit("cached results differ")
+    runs.append(("memory", cached))
+    if directory is not None:
+        from_disk, results = run_all(memo.ResultCache(directory).run, programs)
+        if results != expected:
+            sys.exit("results from disk differ")
+        runs.append(("disk", from_disk))
+
+    print(f"{len(programs)} submissions, {cache.hits} replayed")
+    for name, seconds in runs:
+        print(f"{name:<14}{seconds * 1e3:>10.1f} ms{plain / seconds:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Per-node memory footprint and parse-time allocations of the AST.
+
+Compares the slotted, frozen nodes in BanterADT against the previous layout
+(plain dataclasses with a per-instance __dict__ and a fresh Mneumonic for every
+name occurrence), which is reconstructed below.
+
+    python benchmarks/bench_memory.py [statements]
+"""
+import os
+import sys
+import tracemalloc
+from dataclasses import InitVar, dataclass, field
+from typing import Any, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import BanterADT
+import banterlang
+
+#################### Previous Node Layout ####################
+
+@dataclass
+class LegacyMneumonic:
+    name: str
+    value: Any
+
+    @classmethod
+    def intern(cls, name):
+        return cls(name, None)  # The old parser built a new node per occurrence
+
+@dataclass
+class LegacyOperation:
+    operator: str
+    operands: List = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.operator in {'+', '-', '*', '/'} and len(self.operands) != 2:
+            raise ValueError("Binary operations must have exactly two operands.")
+        if self.operator in {'neg'} and len(self.operands) != 1:
+            raise ValueError("Unary operations must have exactly one operand.")
+
+@dataclass
+class LegacyComparison:
+    operator: str
+    operands: List = field(default_factory=list)
+
+    def __post_init__(self):
+        if len(self.operands) != 2:
+            raise ValueError("Comparisons must have exactly two operands.")
+        if self.operator not in {'==', '!=', '>', '<', '>=', '<='}:
+            raise ValueError(f"Invalid operator: {self.operator}")
+
+@dataclass
+class LegacyLetStatement:
+    mneumonic: str
+    value: Any
+    lineno: InitVar[Any] = None  # Not stored by the old parser
+
+@dataclass
+class LegacyIfStatement:
+    expr: Any
+    do: Any
+    lineno: InitVar[Any] = None  # Not stored by the old parser
+
+@dataclass
+class LegacyPrintStatement:
+    value: Any
+    lineno: InitVar[Any] = None  # Not stored by the old parser
+
+@dataclass
+class LegacyGotoStatement:
+    label: Any
+    lineno: InitVar[Any] = None  # Not stored by the old parser
+
+@dataclass
+class LegacyMarkerStatement:
+    label: Any
+    lineno: InitVar[Any] = None  # Not stored by the old parser
+
+LEGACY_NODES = {
+    'Mneumonic': LegacyMneumonic,
+    'Operation': LegacyOperation,
+    'Comparison': LegacyComparison,
+    'LetStatement': LegacyLetStatement,
+    'IfStatement': LegacyIfStatement,
+    'PrintStatement': LegacyPrintStatement,
+    'GotoStatement': LegacyGotoStatement,
+    'MarkerStatement': LegacyMarkerStatement,
+}
+
+#################### Measurements ####################
+
+def generate_program(statements):
+    lines = ["let total be 0", "let i be 0", "@1"]
+    for n in range(statements // 4):
+        lines.append(f"let value{n % 50} be (i + {n}) * 2 - -total")
+        lines.append(f"if value{n % 50} > {n}, then")
+        lines.append(f"   let total be total + value{n % 50} / 3")
+        lines.append("print total")
+    return "\n".join(lines) + "\n"
+
+def node_size(node):
+    size = sys.getsizeof(node)
+    if hasattr(node, '__dict__'):
+        size += sys.getsizeof(node.__dict__)
+    if isinstance(getattr(node, 'operands', None), (list, tuple)):
+        size += sys.getsizeof(node.operands)
+    return size
+
+def sample_nodes(module):
+    mneumonic = module.Mneumonic.intern('x')
+    operation = module.Operation('+', (mneumonic, 1) if module is BanterADT else [mneumonic, 1])
+    comparison = module.Comparison('<', (mneumonic, 1) if module is BanterADT else [mneumonic, 1])
+    return {
+        'Mneumonic': mneumonic,
+        'Operation': operation,
+        'Comparison': comparison,
+        'LetStatement': module.LetStatement('x', operation),
+        'PrintStatement': module.PrintStatement(mneumonic),
+    }
+
+class _Legacy:
+    pass
+
+def legacy_module():
+    module = _Legacy()
+    for name, cls in LEGACY_NODES.items():
+        setattr(module, name, cls)
+    return module
+
+def measure_parse(source):
+    """Parse a program, returning (allocated blocks, allocated bytes)."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    ast = banterlang.parser.parse(source)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    size = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    del ast
+    return blocks, size
+
+def with_legacy_nodes(function, *args):
+    saved = {name: getattr(banterlang, name) for name in LEGACY_NODES}
+    try:
+        for name, cls in LEGACY_NODES.items():
+            setattr(banterlang, name, cls)
+        return function(*args)
+    finally:
+        for name, cls in saved.items():
+            setattr(banterlang, name, cls)
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    source = generate_program(statements)
+
+    print("Per-node footprint (bytes)")
+    print(f"  {'node':<16}{'before':>8}{'after':>8}")
+    legacy, current = sample_nodes(legacy_module()), sample_nodes(BanterADT)
+    for name in current:
+        print(f"  {name:<16}{node_size(legacy[name]):>8}{node_size(current[name]):>8}")
+
+    banterlang.parser.parse(source)  # Warm up caches and the interning table
+    legacy_blocks, legacy_bytes = with_legacy_nodes(measure_parse, source)
+    blocks, size = measure_parse(source)
+
+    print(f"\nParsing a {statements}-statement program")
+    print(f"  {'':<16}{'before':>12}{'after':>12}")
+    print(f"  {'live blocks':<16}{legacy_blocks:>12}{blocks:>12}")
+    print(f"  {'bytes retained':<16}{legacy_bytes:>12}{size:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Print-heavy programs through each output sink.
+
+Runs a loop that prints N lines on every engine with output written to
+/dev/null line by line (as print() did), block buffered, captured, and
+discarded. Then checks that capturing scales linearly with the output size.
+
+    python benchmarks/bench_output.py [lines]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import banterlang
+import analysis
+import interpreter
+import transpiler
+import vm
+from frame import Frame, resolve
+from output import StdoutSink, CaptureSink, NullSink
+
+ENGINES = {'tree': interpreter, 'vm': vm, 'python': transpiler}
+
+def generate_program(lines):
+    return (f"let i be 0\n"
+            f"@1\n"
+            f"if i < {lines}, then\n"
+            f"    print i * 1000003\n"
+            f"    let i be i + 1\n"
+            f"    goto instruction 1\n")
+
+def run(engine, source, output, returnPrints=False):
+    variables = Frame()
+    program = resolve(analysis.analyze(banterlang.parser.parse(source), variables), variables)
+    start = time.perf_counter()
+    ENGINES[engine].eval_program(program, variables, [], returnPrints=returnPrints, output=output)
+    return time.perf_counter() - start
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    source = generate_program(lines)
+
+    with open(os.devnull, 'w') as devnull:
+        sinks = {
+            'line': lambda: StdoutSink(devnull, line_buffered=True),
+            'block': lambda: StdoutSink(devnull),
+            'capture': CaptureSink,
+            'null': NullSink,
+        }
+        print(f"{lines} printed lines, seconds")
+        print(f"{'engine':<8}" + "".join(f"{name:>10}" for name in sinks))
+        for engine in ENGINES:
+            row = [run(engine, source, make(), returnPrints=name == 'capture') for name, make in sinks.items()]
+            print(f"{engine:<8}" + "".join(f"{seconds:10.3f}" for seconds in row))
+
+    print("\ncapture scaling (vm)")
+    for size in (lines // 4, lines, lines * 4):
+        seconds = run('vm', generate_program(size), CaptureSink(), returnPrints=True)
+        print(f"{size:>10} lines {seconds:8.3f}s {seconds / size * 1e6:8.2f} us/line")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Parse time as a function of program size.
+
+Parses machine-generated programs of doubling size and checks that the time
+per statement stays roughly constant, i.e. that building the AST is linear.
+Exits with status 1 if the largest program is more than TOLERANCE times slower
+per statement than the smallest. tests/test_parse_scaling.py runs the same
+check on smaller programs; this sweep goes to larger ones.
+
+    python benchmarks/bench_parse_scaling.py [smallest] [doublings]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import banterlang
+
+TOLERANCE = 2.0
+
+def generate_program(statements):
+    lines = ["let total be 0", "@1"]
+    for n in range(statements // 3):
+        lines.append(f"let x{n % 100} be total + {n}")
+        lines.append(f"if x{n % 100} > total, then")
+        lines.append(f"   let total be x{n % 100} - 1")
+    return "\n".join(lines) + "\n"
+
+def time_parse(source, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        banterlang.parser.parse(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    smallest = int(sys.argv[1]) if len(sys.argv) > 1 else 6000
+    doublings = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    banterlang.parser.parse(generate_program(300))  # Warm up
+
+    print(f"{'statements':>12}{'seconds':>10}{'us/stmt':>10}")
+    per_statement = []
+    for step in range(doublings + 1):
+        statements = smallest * 2 ** step
+        seconds = time_parse(generate_program(statements))
+        per_statement.append(seconds / statements)
+        print(f"{statements:>12}{seconds:>10.3f}{seconds / statements * 1e6:>10.2f}")
+
+    growth = per_statement[-1] / per_statement[0]
+    print(f"\nper-statement cost grew {growth:.2f}x over a {2 ** doublings}x larger program")
+    if growth > TOLERANCE:
+        print(f"FAIL: parsing is not linear (tolerance {TOLERANCE}x)")
+        sys.exit(1)
+    print("OK: parsing scales linearly")
+
+if __name__ == "__main__":
+    main()
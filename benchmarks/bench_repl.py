@@ -0,0 +1,47 @@
+"""Cost of a long interactive session.
+
+Feeds a Session many small inputs, as typed at the REPL, each defining a
+marker and looping back to it, and reports the time per input and the number
+of statements held every few thousand inputs. Both should level off once the
+session holds its `retain` limit.
+
+    python benchmarks/bench_repl.py [inputs] [retain]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from interpreter import RETAIN
+from output import NullSink
+from session import Session
+
+INPUT = """@{n}
+let i be i + 1
+if i < 3, then
+   goto instruction {n}
+"""
+
+def main():
+    inputs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    retain = int(sys.argv[2]) if len(sys.argv) > 2 else RETAIN
+    every = max(inputs // 10, 1)
+
+    session = Session(output=NullSink(), retain=retain)
+    entries = [session.parse(INPUT.format(n=n % 50)) for n in range(50)]
+    session.run("let i be 0")
+
+    print(f"{'inputs':>8}{'us per input':>14}{'held':>8}")
+    start = time.perf_counter()
+    for n in range(1, inputs + 1):
+        session.execute(entries[n % 50])
+        session.variables['i'] = 0
+        if n % every == 0:
+            elapsed = time.perf_counter() - start
+            print(f"{n:8}{elapsed / every * 1e6:14.1f}{len(session.program.statements):8}")
+            start = time.perf_counter()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Start-up time of the interpreter on a tiny script.
+
+Runs `banter.py` on a one-line program in fresh processes and reports the
+best and median wall time over the time to start a bare Python interpreter.
+Exits with status 1 if the best-case overhead is above TARGET_MS; the best case
+is far less sensitive to machine noise than the median.
+
+    python benchmarks/bench_startup.py [runs] [--engine=vm|python]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Best-case overhead over a bare interpreter with bytecode caching on. Loading
+# the prebuilt lexer and parser tables and deferring readline and the unused
+# engines cut `import banter` from about 32 ms to 24 ms on the reference machine.
+TARGET_MS = 45
+
+def runtimes(command, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 41
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+
+    with tempfile.NamedTemporaryFile('w', suffix='.banter', delete=False) as script:
+        script.write('print "hello"\n')
+    try:
+        command = [sys.executable, os.path.join(ROOT, 'banter.py'), *options, script.name]
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True)  # Warm the bytecode cache
+
+        bare = runtimes([sys.executable, '-c', 'pass'], runs)
+        banter = runtimes(command, runs)
+    finally:
+        os.unlink(script.name)
+
+    overhead_ms = (banter[0] - bare[0]) * 1000
+    print(f"{'':16}{'best':>10}{'median':>10}")
+    print(f"{'python -c pass':16}{bare[0] * 1000:8.1f}ms{bare[1] * 1000:8.1f}ms")
+    print(f"{'banter.py':16}{banter[0] * 1000:8.1f}ms{banter[1] * 1000:8.1f}ms")
+    print(f"overhead {overhead_ms:.1f} ms (target {TARGET_MS} ms)")
+    if overhead_ms > TARGET_MS:
+        print("FAIL: start-up is over target")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Cost of building a string by concatenation in a goto loop.
+
+Builds strings of doubling size, up to 1 MB by default, 16 characters per
+iteration, on each engine through a Session, and checks each string comes out
+at the expected length. Exits with status 1 if going from the smallest to the
+largest string costs more than TOLERANCE times the growth in size, i.e. if
+concatenation is no longer amortized linear.
+
+    python benchmarks/bench_strings.py [largest bytes] [doublings]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from output import NullSink
+from session import Session
+
+TOLERANCE = 2.0
+
+PIECE = "0123456789abcdef"
+
+PROGRAM = f"""
+let s be ""
+let n be 0
+@1
+if n < {{count}}, then
+   let s be s + "{PIECE}"
+   let n be n + 1
+   goto instruction 1
+"""
+
+def build(engine, size):
+    session = Session(engine=engine, output=NullSink())
+    start = time.perf_counter()
+    session.run(PROGRAM.format(count=size // len(PIECE)))
+    elapsed = time.perf_counter() - start
+    if len(session.variables['s']) != size:
+        sys.exit(f"{engine}: built {len(session.variables['s'])} characters instead of {size}")
+    return elapsed
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1 << 20
+    doublings = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    sizes = [largest >> step for step in range(doublings, -1, -1)]
+    engines = ('tree', 'vm', 'python')
+    print(f"{'bytes':>10}" + "".join(f"{engine + ' ms':>12}" for engine in engines))
+    times = {engine: [] for engine in engines}
+    for size in sizes:
+        for engine in engines:
+            times[engine].append(build(engine, size))
+        print(f"{size:>10}" + "".join(f"{times[engine][-1] * 1e3:>12.1f}" for engine in engines))
+
+    status = 0
+    growth = sizes[-1] / sizes[0]
+    for engine in engines:
+        cost = times[engine][-1] / times[engine][0]
+        print(f"{engine}: {cost:.1f}x the time for {growth:.0f}x the size (tolerance {TOLERANCE * growth:.0f}x)")
+        status |= cost > TOLERANCE * growth
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
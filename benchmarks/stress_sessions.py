@@ -0,0 +1,67 @@
+"""Run many interpreter sessions concurrently and check they don't interfere.
+
+Each task creates its own Session, runs a program that prints values derived
+from a per-task seed, and captures the output. Every result must match the
+output of running the same task alone, for every engine.
+tests/test_sessions.py runs a reduced version of this check.
+
+    python benchmarks/stress_sessions.py [tasks] [threads]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from output import CaptureSink
+from session import ENGINES, Session
+
+def generate_program(seed):
+    return (f"let seed be {seed}\n"
+            f"let i be 0\n"
+            f"let total be 0\n"
+            f"@1\n"
+            f"if i < {50 + seed % 50}, then\n"
+            f"    let total be total + seed * i\n"
+            f"    print total\n"
+            f"    let i be i + 1\n"
+            f"    goto instruction 1\n"
+            f"return total\n")
+
+def run_task(engine, seed):
+    session = Session(engine=engine, output=CaptureSink())
+    try:
+        # Split over two runs, so the second depends on the session's variables
+        session.run(f"let offset be {seed}\n")
+        session.run(generate_program(seed).replace("let total be 0", "let total be offset"))
+    except Exception as error:
+        return repr(error), None
+    return session.output.getvalue(), dict(session.variables)
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible to expose races
+
+    failures = 0
+    for engine in ENGINES:
+        expected = [run_task(engine, seed) for seed in range(tasks)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(lambda seed: run_task(engine, seed), range(tasks)))
+        seconds = time.perf_counter() - start
+
+        mismatched = sum(result != want for result, want in zip(results, expected))
+        failures += mismatched
+        print(f"{engine:<8}{tasks} sessions on {threads} threads in {seconds:.2f}s, {mismatched} mismatched")
+
+    if failures:
+        print("FAIL: sessions interfered with each other")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
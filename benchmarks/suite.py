@@ -0,0 +1,183 @@
+"""Benchmark suite over examples/, timing each phase of running a program.
+
+For every program it times lexing with IndentLexer, scanning with Scanner,
+parsing with BanterParser.parse and evaluation with eval_program, each
+separately. Every phase is warmed up, then timed in `repeat` samples of enough
+iterations to take at least --min-time seconds each, and the per-iteration
+statistics are saved as a JSON baseline.
+
+    python benchmarks/suite.py run [-o baseline.json] [--engine vm] [--programs fib.banter ...]
+    python benchmarks/suite.py compare baseline.json [current.json] [--threshold 0.1]
+
+compare runs the suite now, on the baseline's engine, unless given a second
+file. It prints the change in every phase and exits with status 1 if any phase
+got slower than the baseline by more than the threshold.
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import banterlang
+from output import NullSink
+from session import ENGINES, load_engine
+
+PHASES = ('lex', 'scan', 'parse', 'eval')
+
+# Edits that bound programs which would otherwise run for minutes
+CAPS = {
+    'prime.banter': (r"let maxPrimes be \d+", "let maxPrimes be 100"),
+}
+
+def load(path):
+    with open(path) as file:
+        source = file.read()
+    cap = CAPS.get(os.path.basename(path))
+    if cap:
+        source = re.sub(cap[0], cap[1], source)
+    return source
+
+def drain(lexer, source):
+    lexer.input(source)
+    while lexer.token():
+        pass
+
+def phases(source, engine):
+    """Return a callable running each phase once for a program."""
+    indent_lexer = banterlang.IndentLexer()
+    scanner = banterlang.Scanner()
+    parser = banterlang.BanterParser(banterlang.Scanner())
+    program = parser.parse(source)
+    eval_program = load_engine(engine).eval_program
+    return {
+        'lex': lambda: drain(indent_lexer, source),
+        'scan': lambda: drain(scanner, source),
+        'parse': lambda: parser.parse(source),
+        'eval': lambda: eval_program(program, {}, [], output=NullSink()),
+    }
+
+def measure(function, repeat, warmup, min_time):
+    """Per-iteration statistics over `repeat` samples of one function."""
+    for _ in range(warmup):
+        function()
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    samples = [seconds / number for seconds in timer.repeat(repeat, number)]
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'iterations': number,
+        'samples': samples,
+    }
+
+def run_suite(paths, engine='tree', repeat=7, warmup=2, min_time=0.05, log=sys.stderr):
+    results = {}
+    for path in paths:
+        name = os.path.basename(path)
+        results[name] = {}
+        for phase, function in phases(load(path), engine).items():
+            stats = measure(function, repeat, warmup, min_time)
+            results[name][phase] = stats
+            log.write(f"{name:<18}{phase:<7}{stats['median'] * 1e3:10.4f} ms "
+                      f"(+-{stats['stdev'] / stats['median'] * 100:.1f}%)\n")
+    return {
+        'meta': {
+            'engine': engine,
+            'repeat': repeat,
+            'warmup': warmup,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+
+def compare(baseline, current, threshold, statistic='median'):
+    """Print each phase's change; return the (program, phase) pairs that regressed."""
+    regressions = []
+    print(f"{'program':<18}{'phase':<7}{'baseline ms':>12}{'current ms':>12}{'change':>9}")
+    for name, measured in sorted(current['results'].items()):
+        for phase in PHASES:
+            before = baseline['results'].get(name, {}).get(phase)
+            after = measured.get(phase)
+            if before is None or after is None:
+                continue
+            change = after[statistic] / before[statistic] - 1
+            flag = ""
+            if change > threshold:
+                regressions.append((name, phase))
+                flag = "  REGRESSED"
+            print(f"{name:<18}{phase:<7}{before[statistic] * 1e3:12.4f}{after[statistic] * 1e3:12.4f}"
+                  f"{change * 100:8.1f}%{flag}")
+    return regressions
+
+def programs(names):
+    paths = sorted(glob.glob(os.path.join(ROOT, 'examples', '*.banter')))
+    if names:
+        paths = [path for path in paths if os.path.basename(path) in names or path in names]
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Phase-split benchmarks over examples/.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_run_options(command):
+        command.add_argument('--repeat', type=int, default=7, help="samples per phase (default: 7)")
+        command.add_argument('--warmup', type=int, default=2, help="untimed runs first (default: 2)")
+        command.add_argument('--min-time', type=float, default=0.05,
+                             help="minimum seconds per sample (default: 0.05)")
+        command.add_argument('--programs', nargs='*', default=[],
+                             help="example file names to run (default: all)")
+
+    run = commands.add_parser('run', help="run the suite and save the results")
+    add_run_options(run)
+    run.add_argument('--engine', choices=sorted(ENGINES), default='tree')
+    run.add_argument('-o', '--output', help="write the results to this JSON file")
+
+    check = commands.add_parser('compare', help="compare results against a baseline")
+    check.add_argument('baseline')
+    check.add_argument('current', nargs='?', help="saved results (default: run the suite now)")
+    check.add_argument('--threshold', type=float, default=0.10,
+                       help="allowed slowdown per phase, as a fraction (default: 0.10)")
+    check.add_argument('--statistic', choices=('min', 'median', 'mean'), default='median')
+    add_run_options(check)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_suite(programs(args.programs), args.engine, args.repeat, args.warmup, args.min_time)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(results, file, indent=1)
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if args.current:
+        with open(args.current) as file:
+            current = json.load(file)
+    else:
+        names = args.programs or list(baseline['results'])
+        current = run_suite(programs(names), baseline['meta']['engine'], args.repeat, args.warmup,
+                            args.min_time)
+    regressions = compare(baseline, current, args.threshold, args.statistic)
+    if regressions:
+        print(f"\n{len(regressions)} phases regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
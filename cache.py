@@ -0,0 +1,198 @@
+import hashlib
+import marshal
+import os
+import sys
+
+from BanterADT import *
+
+#################### Program Cache ####################
+#
+# Parsed programs are kept in a __bantercache__ directory next to the source
+# file, one entry per distinct source text. An entry holds the program as
+# nested tuples of builtins, and, once a file has been run with the python
+# engine, the code object of its transpiled source. Both are marshalled, so a
+# hit needs neither the parser nor PLY.
+#
+# Each file starts with a header identifying the interpreter that wrote it and
+# a checksum of the payload. Entries from another version of the interpreter,
+# or that fail to load for any reason, are treated as misses and replaced.
+
+CACHE_DIR = '__bantercache__'
+SUFFIX = '.bcache'
+MAGIC = b'BNTRC\x01'
+MAX_CACHE_SIZE = 16 * 1024 * 1024  # Bytes per cache directory
+
+# Modules whose changes can alter a cached program or its compiled code
+VERSION_SOURCES = (
+    'cache.py', 'BanterADT.py', 'banterlang.py', 'analysis.py', 'frame.py',
+    'interpreter.py', 'compiler.py', 'vm.py', 'transpiler.py',
+)
+
+_versions = {}  # Sources -> digest
+
+def interpreter_version(sources=VERSION_SOURCES):
+    """A digest of the interpreter sources and the Python version running them."""
+    version = _versions.get(sources)
+    if version is None:
+        digest = hashlib.blake2b(sys.implementation.cache_tag.encode(), digest_size=16)
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in sources:
+            with open(os.path.join(directory, name), 'rb') as file:
+                digest.update(file.read())
+        version = _versions[sources] = digest.digest()
+    return version
+
+#################### Encoding ####################
+#
+# A node becomes a tuple of its type's tag and its fields, a Python tuple gets
+# tag 0, a string literal is tagged with its text, and statement lists and other
+# literals are stored as they are.
+
+NODE_TYPES = (
+    None, Mneumonic, Local, Operation, Comparison, LetStatement, IfStatement,
+    IfElseStatement, ReturnStatement, PrintStatement, GotoStatement, MarkerStatement,
+    BanterString,
+)
+
+NODE_TAGS = {node_type: tag for tag, node_type in enumerate(NODE_TYPES) if node_type}
+
+def encode(node):
+    if isinstance(node, list):
+        return [encode(item) for item in node]
+    elif isinstance(node, tuple):
+        return (0,) + tuple(encode(item) for item in node)
+    tag = NODE_TAGS.get(type(node))
+    if tag is None:
+        return node  # Literal
+    elif tag == NODE_TAGS[BanterString]:
+        return (tag, node.text())
+    return (tag,) + tuple(encode(getattr(node, name)) for name in type(node).__slots__)
+
+def decode(value):
+    if type(value) is list:
+        return [decode(item) for item in value]
+    elif type(value) is not tuple:
+        return value
+    fields = [decode(item) for item in value[1:]]
+    node_type = NODE_TYPES[value[0]]
+    if node_type is None:
+        return tuple(fields)
+    elif node_type is Mneumonic:
+        return Mneumonic.intern(*fields)
+    return node_type(*fields)
+
+#################### Cache Directory ####################
+
+class CacheEntry:
+    """A cached program and, if it has been transpiled, its Python code object."""
+    __slots__ = ('key', 'program', 'code')
+
+    def __init__(self, key, program, code=None):
+        self.key = key
+        self.program = program
+        self.code = code
+
+class ProgramCache:
+    """A directory of cached programs, bounded in size by evicting the least recently used."""
+    suffix = SUFFIX
+    sources = VERSION_SOURCES  # Entries written by other versions of these are stale
+
+    def __init__(self, directory, max_size=MAX_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    @classmethod
+    def for_file(cls, filename, max_size=MAX_CACHE_SIZE):
+        """The cache next to a source file, like __pycache__."""
+        return cls(os.path.join(os.path.dirname(os.path.abspath(filename)), CACHE_DIR), max_size)
+
+    @staticmethod
+    def key(source):
+        return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def load(self, key):
+        """Return the entry for a key, or None if it is missing, stale or corrupt."""
+        payload = self.read(key)
+        if payload is None:
+            return None
+        try:
+            program, code = marshal.loads(payload)
+            return CacheEntry(key, decode(program), code)
+        except Exception:
+            self.remove(self.path(key))
+            return None
+
+    def store(self, entry):
+        """Write an entry, then evict old ones if the directory is over its limit.
+
+        Failures are ignored; the cache is only ever an optimization.
+        """
+        self.write(entry.key, marshal.dumps((encode(entry.program), entry.code)))
+
+    def read(self, key):
+        """Return the payload stored under a key, or None if it is missing, stale
+        or corrupt."""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        header = len(MAGIC) + 32
+        payload = data[header:]
+        if (data[:len(MAGIC)] != MAGIC or data[len(MAGIC):len(MAGIC) + 16] != interpreter_version(self.sources)
+                or hashlib.blake2b(payload, digest_size=16).digest() != data[len(MAGIC) + 16:header]):
+            self.remove(path)
+            return None
+
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        return payload
+
+    def write(self, key, payload):
+        import tempfile  # Only writers pay for its import
+        checksum = hashlib.blake2b(payload, digest_size=16).digest()
+        temporary = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # A file of its own, so writers of the same key in other threads or processes don't collide
+            descriptor, temporary = tempfile.mkstemp('.tmp', key, self.directory)
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(MAGIC + interpreter_version(self.sources) + checksum + payload)
+            os.replace(temporary, self.path(key))
+        except OSError:
+            if temporary is not None:
+                self.remove(temporary)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for item in scan:
+                    if item.name.endswith(self.suffix):
+                        stat = item.stat()
+                        entries.append((stat.st_mtime, stat.st_size, item.path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            self.remove(path)
+            total -= size
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
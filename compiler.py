@@ -0,0 +1,188 @@
+from BanterADT import *
+
+#################### Flat Instruction Set ####################
+#
+# A program is lowered into a list of (opcode, a, b) tuples. Expressions are
+# left as AST nodes so each backend can decide how to evaluate them.
+#
+# Blocks keep the tree-walker's goto semantics: entering a block normally bumps
+# a depth counter, and END_BLOCK either returns to the statement after the
+# enclosing if (depth > 0) or halts, since a goto throws away everything queued
+# after the marker's own block.
+
+LET = 0         # a: mneumonic name, or its Local when resolved, b: expression
+IF = 1          # a: comparison, b: target when False
+IF_ELSE = 2     # a: comparison, b: start of the alternate block
+END_BLOCK = 3   # a: continuation target
+GOTO = 4        # a: target
+PRINT = 5       # a: expression, or None for an empty print
+RETURN = 6      # a: expression
+EXPR = 7        # a: expression, b: True if its value is the program result
+ENTER = 8       # nested statement list
+FAIL = 9        # a: exception raised when executed
+HALT = 10
+MARKER = 11     # a: label; only in code compiled to count steps
+
+OPCODE_NAMES = {
+    LET: 'LET', IF: 'IF', IF_ELSE: 'IF_ELSE', END_BLOCK: 'END_BLOCK',
+    GOTO: 'GOTO', PRINT: 'PRINT', RETURN: 'RETURN', EXPR: 'EXPR',
+    ENTER: 'ENTER', FAIL: 'FAIL', HALT: 'HALT', MARKER: 'MARKER',
+}
+
+# Statement types the tree-walker evaluates as bare expressions
+EXPRESSION_TYPES = (Local, Mneumonic, Operation, Comparison, bool, int, str, BanterString)
+
+class Code:
+    """A lowered program: the instruction list plus marker label targets."""
+    def __init__(self, instructions, labels):
+        self.instructions = instructions
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.instructions)
+
+    def __repr__(self):
+        lines = []
+        targets = {pc: label for label, pc in self.labels.items() if pc is not None}
+        for pc, (op, a, b) in enumerate(self.instructions):
+            if pc in targets:
+                lines.append(f"@{targets[pc]}")
+            args = " ".join(repr(arg) for arg in (a, b) if arg is not None)
+            lines.append(f"{pc:5}  {OPCODE_NAMES[op]:<10}{args}")
+        return "\n".join(lines)
+
+class _Lowering:
+
+    def __init__(self, markers=False):
+        self.markers = markers
+        self.instructions = []
+        self.labels = {}
+        self.gotos = []
+
+    def emit(self, op, a=None, b=None):
+        self.instructions.append([op, a, b])
+        return len(self.instructions) - 1
+
+    def here(self):
+        return len(self.instructions)
+
+    def block(self, stmts, top_level=False):
+        for i, stmt in enumerate(stmts):
+            last = top_level and i == len(stmts) - 1
+            self.statement(stmt, in_list=True, last=last)
+
+    def body(self, stmt):
+        if isinstance(stmt, list):
+            self.block(stmt)
+        else:
+            self.statement(stmt, in_list=False)
+        return self.emit(END_BLOCK)
+
+    def statement(self, stmt, in_list, last=False):
+        if isinstance(stmt, LetStatement):
+            target = stmt.mneumonic if stmt.slot is None else Local(stmt.mneumonic, stmt.slot)
+            self.emit(LET, target, stmt.value)
+
+        elif isinstance(stmt, IfElseStatement) and stmt.alternate:
+            branch = self.emit(IF_ELSE, stmt.expr)
+            do_end = self.body(stmt.do)
+            self.instructions[branch][2] = self.here()
+            alt_end = self.body(stmt.alternate)
+            self.instructions[do_end][1] = self.instructions[alt_end][1] = self.here()
+
+        elif isinstance(stmt, (IfStatement, IfElseStatement)):
+            branch = self.emit(IF, stmt.expr)
+            do_end = self.body(stmt.do)
+            self.instructions[branch][2] = self.instructions[do_end][1] = self.here()
+
+        elif isinstance(stmt, ReturnStatement):
+            self.emit(RETURN, stmt.value)
+
+        elif isinstance(stmt, PrintStatement):
+            self.emit(PRINT, stmt.value)
+
+        elif isinstance(stmt, GotoStatement):
+            self.gotos.append((self.emit(GOTO, None, stmt.label), stmt.label))
+
+        elif isinstance(stmt, MarkerStatement):
+            if self.markers:
+                self.emit(MARKER, stmt.label)  # Run only when falling through to it
+            # Only markers sitting in a statement list can be resumed from
+            self.labels.setdefault(stmt.label, self.here() if in_list else None)
+
+        elif isinstance(stmt, EXPRESSION_TYPES):
+            self.emit(EXPR, stmt, last)
+
+        elif isinstance(stmt, list):
+            self.emit(ENTER)
+            end = self.body(stmt)
+            self.instructions[end][1] = self.here()
+
+    def resolve_gotos(self):
+        for pc, label in self.gotos:
+            if label not in self.labels:
+                self.instructions[pc] = [FAIL, ValueError(f"Marker {label} not found"), None]
+            elif self.labels[label] is None:
+                self.instructions[pc] = [FAIL, ValueError("Marker's parent is not a list"), None]
+            else:
+                self.instructions[pc][1] = self.labels[label]
+
+def compile_program(program, markers=False):
+    """Lower a parsed program into a Code object. With `markers`, the markers
+    passed on the way become MARKER instructions, for engines counting steps."""
+    lowering = _Lowering(markers)
+    if isinstance(program, list):
+        lowering.block(program, top_level=True)
+    elif isinstance(program, MarkerStatement):
+        if markers:
+            lowering.emit(MARKER, program.label)  # A bare marker program has no block to resume in
+    else:
+        lowering.statement(program, in_list=False, last=True)
+    lowering.emit(HALT)
+    lowering.resolve_gotos()
+
+    instructions = [tuple(instruction) for instruction in lowering.instructions]
+    labels = {label: pc for label, pc in lowering.labels.items()}
+    return Code(instructions, labels)
+
+#################### Basic Blocks ####################
+
+# Instructions after which control doesn't continue to the next one
+TERMINATORS = frozenset({GOTO, END_BLOCK, RETURN, FAIL, HALT})
+
+def basic_blocks(code):
+    """Return the sorted start pcs of the basic blocks in a Code object."""
+    leaders = {0}
+    for pc, (op, a, b) in enumerate(code.instructions):
+        if op in (IF, IF_ELSE):
+            leaders.add(b)
+        elif op in (GOTO, END_BLOCK):
+            leaders.add(a)
+        if op in TERMINATORS:
+            leaders.add(pc + 1)
+    return sorted(pc for pc in leaders if pc < len(code.instructions))
+
+#################### Step Segments ####################
+#
+# Engines enforcing limits.Limits count the steps the tree-walker would: one
+# per statement run, and one per marker passed (a goto lands after its marker).
+# They charge them a segment at a time, a segment being a straight run of
+# instructions: basic blocks are split after each branch, so a branch's body is
+# only charged once it is entered. A segment that could cross the next check,
+# including the step limit, runs with a check before each of its steps instead.
+
+# Instructions that count as a step
+STEP_OPS = frozenset({LET, IF, IF_ELSE, GOTO, PRINT, RETURN, EXPR, ENTER, FAIL, MARKER})
+
+def segments(code, ends=()):
+    """Return the sorted start pcs of a Code object's step segments; `ends`
+    holds pcs of instructions that must also end one."""
+    starts = set(basic_blocks(code))
+    for pc, (op, a, b) in enumerate(code.instructions):
+        if op in (IF, IF_ELSE) or pc in ends:
+            starts.add(pc + 1)
+    return sorted(pc for pc in starts if pc < len(code.instructions))
+
+def segment_steps(code, start, end):
+    """Number of steps in instructions [start, end)."""
+    return sum(code.instructions[pc][0] in STEP_OPS for pc in range(start, end))
@@ -0,0 +1,143 @@
+import asyncio
+import math
+import time
+from collections import deque
+
+from BanterADT import *
+from interpreter import MarkerIndex, ReturnValue, eval_expression, eval_statement_iter
+from limits import LimitExceeded
+from output import default_sink
+
+#################### Cooperative Evaluation ####################
+#
+# eval_program_async runs the tree-walker's statement loop as a coroutine, so
+# one asyncio process can serve many sessions. It yields to the event loop once
+# it has run yield_steps statements or yield_interval seconds since it last
+# did, whichever comes first, and awaits its async sink on every print, so a
+# slow reader holds back only the program writing to it.
+#
+# Cancelling the task stops the program at its next yield or print, raising
+# CancelledError there; variables keep the values they had. Besides the usual
+# Limits, a run can be given `run_time`, the seconds it may spend running,
+# which leaves out the time it spent waiting on other tasks or its sink, so a
+# runaway goto loop is stopped without counting the load from other sessions
+# against it.
+
+YIELD_STEPS = 1000  # Statements between yields
+YIELD_INTERVAL = 0.005  # Seconds between yields
+CLOCK_STEPS = 64  # Statements between readings of the clock
+
+class AsyncSink:
+    """Adapts an output sink from output.py for eval_program_async."""
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    async def write(self, text):
+        self.sink.write(text)
+
+    async def flush(self):
+        self.sink.flush()
+
+    def getvalue(self):
+        return self.sink.getvalue()
+
+class QueueSink:
+    """Puts printed lines on an asyncio.Queue for another task to send on.
+    When the queue is bounded and full, the program waits for room."""
+
+    def __init__(self, queue=None):
+        self.queue = asyncio.Queue() if queue is None else queue
+
+    async def write(self, text):
+        await self.queue.put(text)
+
+    async def flush(self):
+        pass
+
+class StreamSink:
+    """Writes output to an asyncio StreamWriter, waiting for it to drain."""
+
+    def __init__(self, writer, encoding='utf-8'):
+        self.writer = writer
+        self.encoding = encoding
+
+    async def write(self, text):
+        self.writer.write(text.encode(self.encoding))
+        await self.writer.drain()
+
+    async def flush(self):
+        await self.writer.drain()
+
+async def eval_program_async(program, variables=None, context=None, output=None, limits=None, markers=None,
+                             run_time=None, yield_steps=YIELD_STEPS, yield_interval=YIELD_INTERVAL):
+    """Run a program like eval_program, as a coroutine that yields to the event
+    loop as it goes. Printed lines are awaited on `output`, an async sink with
+    write(text) and flush() coroutines; by default they go to stdout. Raises
+    LimitExceeded when the run goes over `limits`, a limits.Limits, or spends
+    more than `run_time` seconds running."""
+    if output is None:
+        output = AsyncSink(default_sink())
+    if variables is None:
+        variables = {}
+    if context is None:
+        context = []
+    if not context or context[0] is not program:
+        context.insert(0, program)
+    if markers is None:
+        markers = MarkerIndex(context[0])
+
+    execution_queue = deque(program if isinstance(program, list) else [program])
+    budget = limits.start() if limits is not None else None
+    check_values = limits is not None and limits.max_memory is not None
+    clock = time.perf_counter
+    executed = 0
+    next_check = 0 if budget is not None else math.inf
+    next_clock = CLOCK_STEPS
+    last_yield = 0  # Statements run when it last yielded
+    remaining = math.inf if run_time is None else run_time  # Seconds it may still run
+    marker = None
+    result = None
+    started = clock()
+    try:
+        while execution_queue:
+            if executed >= next_check:
+                next_check = budget.checkpoint(executed, variables)
+            if executed >= next_clock:
+                next_clock = executed + CLOCK_STEPS
+                now = clock()
+                if now - started >= remaining:
+                    raise LimitExceeded('time', executed)
+                if executed - last_yield >= yield_steps or now - started >= yield_interval:
+                    remaining -= now - started
+                    last_yield = executed
+                    await asyncio.sleep(0)
+                    started = clock()
+
+            stmt = execution_queue.popleft()
+            if isinstance(stmt, MarkerStatement):
+                marker = stmt.label
+            if isinstance(stmt, PrintStatement):
+                text = "\n" if stmt.value is None else f"{eval_expression(stmt.value, variables)}\n"
+                remaining -= clock() - started
+                await output.write(text)
+                started = clock()
+                result = None
+            else:
+                result = eval_statement_iter(stmt, variables, context, execution_queue, None, False, markers)
+            executed += 1
+
+            if isinstance(stmt, GotoStatement):
+                marker = stmt.label
+            elif check_values and isinstance(stmt, LetStatement):
+                if stmt.slot is not None:
+                    budget.check_value(variables.values[stmt.slot])
+                else:
+                    budget.check_value(variables[stmt.mneumonic])
+            if isinstance(result, ReturnValue):
+                break
+    except LimitExceeded as error:
+        raise error.at(executed, marker)
+    finally:
+        await output.flush()
+    return result
@@ -0,0 +1,102 @@
+from collections.abc import MutableMapping
+
+from BanterADT import *
+
+# Value of a slot whose variable has not been assigned yet
+UNDEFINED = type('Undefined', (), {'__repr__': lambda self: 'UNDEFINED'})()
+
+class Frame(MutableMapping):
+    """Variable storage backed by a list of slots.
+
+    Programs run through resolve() read and write slots by index. The frame also
+    behaves like the name-keyed dict it replaces, so the REPL and any unresolved
+    program can keep using it as one.
+    """
+
+    def __init__(self, bindings=None):
+        self.slots = {}
+        self.values = []
+        if bindings:
+            self.update(bindings)
+
+    def slot(self, name):
+        """Return the slot index for a name, allocating one if needed."""
+        index = self.slots.get(name)
+        if index is None:
+            index = self.slots[name] = len(self.values)
+            self.values.append(UNDEFINED)
+        return index
+
+    def __getitem__(self, name):
+        index = self.slots.get(name)
+        if index is None or self.values[index] is UNDEFINED:
+            raise KeyError(name)
+        return self.values[index]
+
+    def __setitem__(self, name, value):
+        self.values[self.slot(name)] = value
+
+    def __delitem__(self, name):
+        index = self.slots.get(name)
+        if index is None or self.values[index] is UNDEFINED:
+            raise KeyError(name)
+        self.values[index] = UNDEFINED
+
+    def __contains__(self, name):
+        index = self.slots.get(name)
+        return index is not None and self.values[index] is not UNDEFINED
+
+    def __iter__(self):
+        values = self.values
+        return (name for name, index in self.slots.items() if values[index] is not UNDEFINED)
+
+    def __len__(self):
+        return sum(value is not UNDEFINED for value in self.values)
+
+    def clear(self):
+        # Keep the slot layout so programs already resolved against it stay valid
+        self.values[:] = [UNDEFINED] * len(self.values)
+
+    def __repr__(self):
+        return f"Frame({dict(self)!r})"
+
+def resolve(program, frame):
+    """Return a copy of a program whose mneumonics read and write slots of frame."""
+    locals_ = {}
+
+    def local(name):
+        node = locals_.get(name)
+        if node is None:
+            node = locals_[name] = Local(name, frame.slot(name))
+        return node
+
+    def expression(node):
+        if isinstance(node, Mneumonic):
+            return local(node.name)
+        elif isinstance(node, Operation):
+            return Operation(operator=node.operator, proven=node.proven,
+                             operands=tuple(expression(operand) for operand in node.operands))
+        elif isinstance(node, Comparison):
+            return Comparison(operator=node.operator, proven=node.proven,
+                              operands=tuple(expression(operand) for operand in node.operands))
+        return node
+
+    def statement(node):
+        if isinstance(node, list):
+            return [statement(stmt) for stmt in node]
+        elif isinstance(node, LetStatement):
+            return LetStatement(mneumonic=node.mneumonic, value=expression(node.value),
+                                slot=frame.slot(node.mneumonic), lineno=node.lineno)
+        elif isinstance(node, IfElseStatement):
+            alternate = statement(node.alternate) if node.alternate else node.alternate
+            return IfElseStatement(expr=expression(node.expr), do=statement(node.do),
+                                   alternate=alternate, lineno=node.lineno)
+        elif isinstance(node, IfStatement):
+            return IfStatement(expr=expression(node.expr), do=statement(node.do), lineno=node.lineno)
+        elif isinstance(node, ReturnStatement):
+            return ReturnStatement(value=expression(node.value), lineno=node.lineno)
+        elif isinstance(node, PrintStatement):
+            return PrintStatement(value=expression(node.value), lineno=node.lineno)
+        return expression(node)
+
+    return statement(program)
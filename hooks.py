@@ -0,0 +1,70 @@
+from BanterADT import *
+
+#################### Evaluation Hooks ####################
+#
+# Tools such as debuggers, coverage and visualizers observe a run by passing a
+# Hooks object to interpreter.eval_program. Runs without hooks never reach any
+# of this: the tree-walker only switches to its instrumented loop when it is
+# given hooks, limits or a profiler.
+
+class Hooks:
+    """Callbacks made by the tree-walker as it runs; override the ones you need.
+
+    `stmt` is always the statement being run, and `marker` the label of the
+    marker region it runs in (the last marker reached), or None before any.
+    """
+
+    def statement(self, stmt, marker):
+        """Called before each statement runs, including nested blocks and markers."""
+
+    def assign(self, stmt, name, value):
+        """Called after a let statement binds a value to a name."""
+
+    def branch(self, stmt, taken):
+        """Called after an if decides; taken is whether its then-block runs."""
+
+    def goto(self, stmt, label):
+        """Called after a goto jumps to the marker with the given label."""
+
+    def print(self, stmt, text):
+        """Called after a print statement writes a line, given without its newline."""
+
+class PrintTap:
+    """An output sink that remembers the last text written through it."""
+
+    def __init__(self, output):
+        self.output = output
+        self.last = None
+
+    def write(self, text):
+        self.last = text
+        self.output.write(text)
+
+    def flush(self):
+        self.output.flush()
+
+    def getvalue(self):
+        return self.output.getvalue()
+
+def first_statement(block):
+    return block[0] if isinstance(block, list) and block else block
+
+def notify(hooks, stmt, variables, execution_queue, queued, printer):
+    """Make the callbacks for a statement that has just run.
+
+    `queued` is the length of the execution queue before it ran.
+    """
+    if isinstance(stmt, LetStatement):
+        if stmt.slot is not None:
+            hooks.assign(stmt, stmt.mneumonic, variables.values[stmt.slot])
+        else:
+            hooks.assign(stmt, stmt.mneumonic, variables[stmt.mneumonic])
+    elif isinstance(stmt, (IfStatement, IfElseStatement)):
+        # A taken branch queues the then-block in front of everything else
+        taken = (len(execution_queue) > queued
+                 and execution_queue[0] is first_statement(stmt.do))
+        hooks.branch(stmt, taken)
+    elif isinstance(stmt, GotoStatement):
+        hooks.goto(stmt, stmt.label)
+    elif isinstance(stmt, PrintStatement):
+        hooks.print(stmt, printer.last[:-1])
@@ -1,13 +1,27 @@
-import banterlang
+import math
+import time
+
 from BanterADT import *
 from collections import deque
-
-prints = False
-
-def eval_program(program, variables=None, context=None, returnPrints=False):
-    if returnPrints:
-        global prints
-        prints = True
+from frame import UNDEFINED
+from hooks import PrintTap, notify
+from limits import LimitExceeded
+from output import default_sink
+
+TIER_THRESHOLD = 50  # Jumps to a marker before a tiered run compiles its region
+
+def eval_program(program, variables=None, context=None, returnPrints=False, output=None, limits=None,
+                 profiler=None, hooks=None, markers=None, tiered=False):
+    """Run a program. Printed lines go to `output`, an output sink; by default
+    they are captured when returnPrints is set and written to stdout otherwise.
+    With `limits`, a limits.Limits, the run raises LimitExceeded if it goes over,
+    a profiler.Profiler given as `profiler` records where the time went, and
+    `hooks`, a hooks.Hooks, is called back as statements run. Gotos resolve
+    through `markers`, by default a MarkerIndex of the program. A `tiered` run
+    compiles the code after markers jumped to often (see jit.py); it is ignored
+    along with limits, a profiler or hooks."""
+    if output is None:
+        output = default_sink(returnPrints)
 
     # Setup for variables and context if not provided
     if variables is None:
@@ -15,9 +29,12 @@ def eval_program(program, variables=None, context=None, returnPrints=False):
     if context is None:
         context = []
 
-    if not context or context[0] != program:
+    if not context or context[0] is not program:
         context.insert(0, program)
 
+    if markers is None:
+        markers = MarkerIndex(context[0])
+
     # Convert program to a flat list of statements
     execution_queue = deque()
     if isinstance(program, list):
@@ -26,27 +43,278 @@ def eval_program(program, variables=None, context=None, returnPrints=False):
         execution_queue.append(program)
 
     result = None
-    captured_output = ""  # Variable to store captured prints
+    try:
+        if limits is not None or profiler is not None or hooks is not None:
+            result = eval_instrumented(execution_queue, variables, context, output, returnPrints,
+                                       markers, limits, profiler, hooks)
+        elif tiered:
+            result = eval_tiered(execution_queue, variables, context, output, returnPrints, markers)
+        else:
+            while execution_queue:
+                stmt = execution_queue.popleft()
+                result = eval_statement_iter(stmt, variables, context, execution_queue, output, returnPrints, markers)
+                if isinstance(result, ReturnValue):  # Special wrapper for return values
+                    if returnPrints:
+                        output.write(str(result.value))
+                    break
+                elif isinstance(result, (str, BanterString)) and returnPrints:
+                    output.write(str(result))  # Bare string expressions are part of the output
+    finally:
+        output.flush()
+
+    return output.getvalue() if returnPrints else result
+
+def eval_instrumented(execution_queue, variables, context, output, returnPrints, markers,
+                      limits=None, profiler=None, hooks=None):
+    """eval_program's loop for runs with limits, a profiler or hooks, which track
+    the marker region each statement runs in."""
+    budget = limits.start() if limits is not None else None
+    check_values = limits is not None and limits.max_memory is not None
+    clock = time.perf_counter
+    executed = 0
+    next_check = 0 if budget is not None else math.inf
+    marker = None
+    result = None
+    printer = PrintTap(output) if hooks is not None else output  # Lets hooks see printed lines
+    try:
+        while execution_queue:
+            if executed >= next_check:
+                next_check = budget.checkpoint(executed, variables)
+            stmt = execution_queue.popleft()
+            if isinstance(stmt, MarkerStatement):
+                marker = stmt.label
+            if hooks is not None:
+                hooks.statement(stmt, marker)
+                queued = len(execution_queue)
+            if profiler is not None:
+                start = clock()
+                result = eval_statement_iter(stmt, variables, context, execution_queue, printer, returnPrints, markers)
+                profiler.record(marker, stmt, clock() - start)
+            else:
+                result = eval_statement_iter(stmt, variables, context, execution_queue, printer, returnPrints, markers)
+            executed += 1
+            if hooks is not None:
+                notify(hooks, stmt, variables, execution_queue, queued, printer)
+            if isinstance(stmt, GotoStatement):
+                marker = stmt.label
+            elif check_values and isinstance(stmt, LetStatement):
+                if stmt.slot is not None:
+                    budget.check_value(variables.values[stmt.slot])
+                else:
+                    budget.check_value(variables[stmt.mneumonic])
+            if isinstance(result, ReturnValue):
+                if returnPrints:
+                    output.write(str(result.value))
+                break
+            elif isinstance(result, (str, BanterString)) and returnPrints:
+                output.write(str(result))
+    except LimitExceeded as error:
+        raise error.at(executed, marker)
+    return result
+
+def eval_tiered(execution_queue, variables, context, output, returnPrints, markers):
+    """eval_program's loop for tiered runs. Gotos are counted by label until one
+    is taken TIER_THRESHOLD times, when jit.run takes over; short runs never
+    load the JIT."""
+    jumps = {}  # label -> gotos taken to it
+    result = None
     while execution_queue:
         stmt = execution_queue.popleft()
-        result = eval_statement_iter(stmt, variables, context, execution_queue, captured_output, returnPrints)
-        if isinstance(result, ReturnValue):  # Special wrapper for return values
-            captured_output += str(result.value)  # Accumulate the printed output
+        if isinstance(stmt, GotoStatement):
+            taken = jumps[stmt.label] = jumps.get(stmt.label, 0) + 1
+            if taken == TIER_THRESHOLD:
+                import jit
+                jumps[stmt.label] -= 1  # Counted again as jit.run takes it
+                execution_queue.appendleft(stmt)
+                return jit.run(execution_queue, variables, context, output, returnPrints, markers, jumps=jumps)
+        result = eval_statement_iter(stmt, variables, context, execution_queue, output, returnPrints, markers)
+        if isinstance(result, ReturnValue):
+            if returnPrints:
+                output.write(str(result.value))
             break
-        elif isinstance(result, str):
-            captured_output += result  # Accumulate the printed output
-
-    return captured_output if returnPrints else result
+        elif isinstance(result, (str, BanterString)) and returnPrints:
+            output.write(str(result))
+    return result
 
 class ReturnValue:
     """Wrapper class to distinguish return values from regular evaluation results"""
     def __init__(self, value):
         self.value = value
 
-def eval_statement_iter(statement, variables, context, execution_queue, captured_output, returnPrints):
+class MarkerIndex:
+    """Maps marker labels to the block holding them and their offset in it.
+    Statements appended to the program later (e.g. by the REPL) are indexed on
+    the next lookup."""
+    def __init__(self, program):
+        self.program = program
+        self.labels = {}
+        self.indexed = 0
+        self.refresh()
+
+    def refresh(self):
+        """Index top-level statements added since the last refresh."""
+        program = self.program
+        if not isinstance(program, list):
+            if not self.indexed:
+                self._index(None, None, program)
+                self.indexed = 1
+            return
+        if len(program) < self.indexed:
+            # The program shrank, so earlier entries may be stale
+            self.labels.clear()
+            self.indexed = 0
+        for i in range(self.indexed, len(program)):
+            self._index(program, i, program[i])
+        self.indexed = len(program)
+
+    def _index(self, parent, key, node):
+        # Statements in program order, so the first marker with a label wins
+        if isinstance(node, list):
+            for i, stmt in enumerate(node):
+                self._index(node, i, stmt)
+        elif isinstance(node, MarkerStatement):
+            if parent is None:
+                return  # A bare marker program has no block to resume in
+            self.labels.setdefault(node.label, (parent, key))
+        elif hasattr(node, 'do'):
+            self._index(node, 'do', node.do)
+            if hasattr(node, 'alternate'):
+                self._index(node, 'alternate', node.alternate)
+
+    def resolve(self, label):
+        """Return (block, offset) for the marker with the given label."""
+        if isinstance(self.program, list) and len(self.program) != self.indexed:
+            self.refresh()
+        try:
+            parent, offset = self.labels[label]
+        except KeyError:
+            raise ValueError(f"Marker {label} not found")
+        if not isinstance(parent, list):
+            raise ValueError("Marker's parent is not a list")
+        return parent, offset
+
+RETAIN = 10000  # Top-level statements a GrowingProgram holds by default
+
+class GrowingProgram:
+    """One program built up input by input, as in the REPL.
+
+    Inputs are appended to a single list of top-level statements, so a goto can
+    reach the markers of any input still held and then runs on through the
+    inputs after it, as in one file. A label defined by several inputs resolves
+    to the latest. Once over `retain` statements are held, the oldest inputs
+    are dropped along with their markers.
+    """
+    def __init__(self, retain=RETAIN):
+        self.retain = retain
+        self.statements = []
+        self.offset = 0  # Position of statements[0] in the program
+        self.inputs = deque()  # (start position, labels, lets) per held input
+        self.labels = {}  # label -> (input start, block or None for top level, offset)
+
+    def append(self, statements):
+        """Add an input's statements to the end of the program."""
+        start = self.offset + len(self.statements)
+        found = MarkerIndex(statements).labels
+        for label, (parent, key) in found.items():
+            if parent is statements:
+                self.labels[label] = (start, None, start + key)
+            else:
+                self.labels[label] = (start, parent, key)
+        self.statements.extend(statements)
+        self.inputs.append((start, list(found), list(assignments(statements))))
+        self.trim()
+
+    def trim(self):
+        end = self.offset + len(self.statements)
+        while len(self.inputs) > 1 and end - self.inputs[0][0] > self.retain:
+            start, labels, _ = self.inputs.popleft()
+            for label in labels:
+                if self.labels[label][0] == start:
+                    del self.labels[label]
+        # Dropped statements are unreachable; delete them once they are half the list
+        dropped = self.inputs[0][0] - self.offset if self.inputs else len(self.statements)
+        if dropped > len(self.statements) // 2:
+            del self.statements[:dropped]
+            self.offset += dropped
+
+    def assignments(self):
+        """Yield every LetStatement in the inputs held."""
+        for _, _, lets in self.inputs:
+            yield from lets
+
+    def resolve(self, label):
+        """Return (block, offset) for the marker with the given label."""
+        try:
+            _, parent, offset = self.labels[label]
+        except KeyError:
+            raise ValueError(f"Marker {label} not found")
+        if parent is None:
+            return self.statements, offset - self.offset
+        if not isinstance(parent, list):
+            raise ValueError("Marker's parent is not a list")
+        return parent, offset
+
+    def markers(self, program):
+        """Markers for running the latest input as `program`, a copy of it
+        specialized by analysis: its own labels resolve within it."""
+        return ChainedMarkers(MarkerIndex(program), self)
+
+    def clear(self):
+        self.statements.clear()
+        self.offset = 0
+        self.inputs.clear()
+        self.labels.clear()
+
+class ChainedMarkers:
+    """Resolves each label in the first of several marker indexes holding it."""
+    def __init__(self, *indexes):
+        self.indexes = indexes
+
+    def resolve(self, label):
+        for index in self.indexes[:-1]:
+            if label in index.labels:
+                return index.resolve(label)
+        return self.indexes[-1].resolve(label)
+
+def assignments(node):
+    """Yield every LetStatement in a program."""
+    if isinstance(node, list):
+        for stmt in node:
+            yield from assignments(stmt)
+    elif isinstance(node, LetStatement):
+        yield node
+    elif isinstance(node, (IfStatement, IfElseStatement)):
+        yield from assignments(node.do)
+        if isinstance(node, IfElseStatement) and node.alternate:
+            yield from assignments(node.alternate)
+
+def jumps_back(program):
+    """Whether a goto in a program can jump to a marker at or before it, or out
+    of it, as to an earlier REPL input. Programs that can't never loop."""
+    labels = MarkerIndex(program).labels
+    seen = set()  # Labels of the markers passed so far
+    stack = [program]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, MarkerStatement):
+            seen.add(node.label)
+        elif isinstance(node, GotoStatement):
+            if node.label in seen or node.label not in labels:
+                return True
+        elif isinstance(node, (IfStatement, IfElseStatement)):
+            stack.append(getattr(node, 'alternate', None))
+            stack.append(node.do)
+    return False
+
+def eval_statement_iter(statement, variables, context, execution_queue, output, returnPrints, markers=None):
     if isinstance(statement, LetStatement):
         value = eval_expression(statement.value, variables)
-        variables[statement.mneumonic] = value
+        if statement.slot is not None:
+            variables.values[statement.slot] = value
+        else:
+            variables[statement.mneumonic] = value
         return None
 
     elif isinstance(statement, IfStatement):
@@ -76,81 +344,49 @@ def eval_statement_iter(statement, variables, context, execution_queue, captured
 
     elif isinstance(statement, PrintStatement):
         if statement.value is not None:
-            res = eval_expression(statement.value, variables)
-            global prints
-            if prints:
-                return str(res)+"\n"  # Capture the print value instead of printing
-            else:
-                print(res)  # Directly print if not capturing
+            output.write(f"{eval_expression(statement.value, variables)}\n")
         else:
-            print()  # Empty print statement
-            return "\n"
+            output.write("\n")  # Empty print statement
+        return None
 
     elif isinstance(statement, GotoStatement):
-        program = context[0]
-        marker_path = find_marker_position(program, statement.label)
-        if marker_path:
-            parent_path = marker_path[:-1]
-            parent = get_subtree_at_path(program, parent_path)
-            marker_index = marker_path[-1]
-            
-            if isinstance(parent, list):
-                # Clear the current queue and add remaining statements after marker
-                execution_queue.clear()
-                execution_queue.extend(parent[marker_index + 1:])
-            else:
-                raise ValueError("Marker's parent is not a list")
-        else:
-            raise ValueError(f"Marker {statement.label} not found")
+        if markers is None:
+            markers = MarkerIndex(context[0])
+        parent, marker_index = markers.resolve(statement.label)
+
+        # Clear the current queue and add remaining statements after marker
+        execution_queue.clear()
+        execution_queue.extend(parent[marker_index + 1:])
         return None
 
     elif isinstance(statement, MarkerStatement):
         return None
 
-    elif isinstance(statement, (Mneumonic, Operation, Comparison, bool, int, str)):
+    elif isinstance(statement, (Local, Mneumonic, Operation, Comparison, bool, int, str, BanterString)):
         return eval_expression(statement, variables)
 
     elif isinstance(statement, list):
         execution_queue.extendleft(reversed(statement))
         return None
 
-# Keep the existing helper functions unchanged
-def find_marker_position(node, label, path=None):
-    """Recursively find the position of a marker in the syntax tree."""
-    if path is None:
-        path = []
-
-    if isinstance(node, list):
-        for i, stmt in enumerate(node):
-            result = find_marker_position(stmt, label, path + [i])
-            if result:
-                return result
-    elif isinstance(node, MarkerStatement) and node.label == label:
-        return path
-    elif hasattr(node, 'do'):
-        do = find_marker_position(node.do, label, path + ['do'])
-        if do:
-            return do
-        if hasattr(node, 'alternate'):
-            alt = find_marker_position(node.alternate, label, path + ['alternate'])
-            if alt:
-                return alt
-    return None
-
-def get_subtree_at_path(tree, path):
-    """Get the subtree at the specified path"""
-    current = tree
-    for p in path:
-        if isinstance(p, str):
-            current = getattr(current, p)
-        else:
-            current = current[p]
-    return current
+    elif isinstance(statement, LoopStatement):
+        statement.run(variables)
+        if isinstance(statement.exit, list):
+            execution_queue.extendleft(reversed(statement.exit))
+        elif statement.exit is not None:
+            execution_queue.appendleft(statement.exit)
+        return None
 
 def eval_expression(expression, variables):
-    if isinstance(expression, (int, float, bool, str)):
+    if isinstance(expression, (int, float, bool, str, BanterString)):
         # Literal values (numbers or booleans)
         return expression
+    elif isinstance(expression, Local):
+        # Resolved mnemonic, read its slot in the frame
+        value = variables.values[expression.slot]
+        if value is UNDEFINED:
+            raise ValueError(f"Variable {expression.name} not defined")
+        return value
     elif isinstance(expression, Mneumonic):
         # Mnemonic refers to a variable, look it up in the variables
         if expression.name in variables:
@@ -170,19 +406,19 @@ def eval_operation(operation, variables):
     # Evaluate the operands first
     operands = [eval_expression(operand, variables) for operand in operation.operands]
 
-    types = set([type(op) for op in operands])
+    # Operations proven by analysis.analyze can't mix operand types
+    if not operation.proven:
+        types = set([type(op) for op in operands])
 
-    if len(types) > 1:
-        if len(types) == 2 and type(1) in types and type(1.0) in types:
-            pass
-        else:
-            raise TypeError("Operands must have the same type.") # None of that!
+        if len(types) > 1:
+            if len(types) == 2 and type(1) in types and type(1.0) in types:
+                pass
+            else:
+                raise TypeError("Operands must have the same type.") # None of that!
 
 
     if operation.operator == '+':
-        if isinstance(operands[0], str):
-            return operands[0][:-1] + operands[1][1:] # string concat'n is a little jank
-        return operands[0] + operands[1]
+        return operands[0] + operands[1]  # Strings concatenate too
     elif operation.operator == '-':
         return operands[0] - operands[1]
     elif operation.operator == '*':
@@ -201,13 +437,14 @@ def eval_comparison(comparison, variables):
     operand1 = eval_expression(comparison.operands[0], variables)
     operand2 = eval_expression(comparison.operands[1], variables)
 
-    operands = [eval_expression(operand, variables) for operand in comparison.operands]
-
-    types = set([type(op) for op in operands])
+    if not comparison.proven:
+        types = {type(operand1), type(operand2)}
 
-    if len(types) > 1: 
-        if bool in types and int in types:
-            return False
+        if len(types) > 1:
+            if bool in types and int in types:
+                return False
+            if BanterString in types:
+                operand1, operand2 = plain_text(operand1), plain_text(operand2)
 
     if comparison.operator == '==':
         return operand1 == operand2
@@ -0,0 +1,261 @@
+import analysis
+from BanterADT import *
+from frame import UNDEFINED
+from interpreter import TIER_THRESHOLD, ReturnValue, eval_statement_iter
+from loops import define, load_lines, native_loop, store_lines, variable_nodes
+from transpiler import expression_source, helper_defaults, local_name
+
+#################### Tiered Evaluation ####################
+#
+# Tiered runs start on the tree-walker and count how often each marker is
+# jumped to. A marker reached THRESHOLD times has its region (the statements
+# after it, up to the next marker in its block) compiled into a Python function
+# specialized to the types its variables had at that moment. Later jumps to the
+# marker run the function, which loops back to its own marker natively and
+# returns when control leaves the region:
+#
+#   (GOTO, label)   a goto to another marker, which may run compiled as well
+#   (NEXT, offset)  fell through to the marker at that offset in the block,
+#                   or past the end of the block
+#   (RETURN, value) a return statement
+#
+# The function checks the types of its variables on entry. When they differ it
+# deoptimizes, returning None, and the jump runs on the tree-walker; the region
+# is compiled again for the types seen so far, up to VERSIONS times.
+
+THRESHOLD = TIER_THRESHOLD  # Jumps to a marker before its region is compiled
+VERSIONS = 4  # Compilations of a region before it stays on the tree-walker
+
+GOTO, NEXT, RETURN = range(3)
+
+def run(execution_queue, variables, context, output, returnPrints, markers, threshold=THRESHOLD, jumps=None):
+    """eval_program's loop for tiered runs, once interpreter.eval_tiered has
+    counted `jumps`, gotos taken by label."""
+    regions = Regions(markers, variables, output, threshold)
+    for label, taken in (jumps or {}).items():
+        block, offset = markers.resolve(label)
+        key = id(block), offset
+        regions.jumps[key] = regions.jumps.get(key, 0) + taken
+    result = None
+    while execution_queue:
+        stmt = execution_queue.popleft()
+        if isinstance(stmt, GotoStatement):
+            result = regions.jump(stmt.label, execution_queue)
+        else:
+            result = eval_statement_iter(stmt, variables, context, execution_queue, output, returnPrints, markers)
+        if isinstance(result, ReturnValue):
+            if returnPrints:
+                output.write(str(result.value))
+            break
+        elif isinstance(result, (str, BanterString)) and returnPrints:
+            output.write(str(result))
+    return result
+
+class Regions:
+    """The compiled regions of one run, by the position of their marker."""
+
+    def __init__(self, markers, variables, output, threshold=THRESHOLD):
+        self.markers = markers
+        self.variables = variables
+        self.write = output.write
+        self.threshold = threshold
+        self.jumps = {}  # (id(block), offset) -> jumps to the marker there
+        self.compiled = {}  # (id(block), offset) -> Region, or None if it stays interpreted
+
+    def jump(self, label, execution_queue):
+        """Go to a marker, as a GotoStatement does; returns a ReturnValue if the
+        compiled code returned."""
+        block, offset = self.markers.resolve(label)
+        while True:
+            region = self.region(block, offset)
+            exit = region.run(self.variables, self.write) if region is not None else None
+            if exit is None:
+                execution_queue.clear()
+                execution_queue.extend(block[offset + 1:])
+                return None
+            kind, value = exit
+            if kind == GOTO:
+                block, offset = self.markers.resolve(value)
+            elif kind == NEXT and value < len(block):
+                offset = value
+            else:
+                execution_queue.clear()
+                return ReturnValue(value) if kind == RETURN else None
+
+    def region(self, block, offset):
+        key = id(block), offset
+        if key in self.compiled:
+            return self.compiled[key]
+        jumps = self.jumps[key] = self.jumps.get(key, 0) + 1
+        if jumps < self.threshold:
+            return None
+        region = self.compiled[key] = Region.build(self.markers, block, offset, self.variables)
+        return region
+
+def region_end(block, offset):
+    end = offset + 1
+    while end < len(block) and not isinstance(block[end], MarkerStatement):
+        end += 1
+    return end
+
+def compilable(node):
+    if isinstance(node, list):
+        return all(map(compilable, node))
+    elif isinstance(node, (IfStatement, IfElseStatement)):
+        return (isinstance(node.expr, Comparison) and compilable(node.do)
+                and compilable(getattr(node, 'alternate', None) or []))
+    elif isinstance(node, LoopStatement):
+        return node.exit is None or compilable(node.exit)
+    # Bare expressions are left out: their values are a run's result
+    return isinstance(node, (LetStatement, PrintStatement, GotoStatement, ReturnStatement, MarkerStatement))
+
+def expressions(node):
+    """Yield the expressions a region's statements evaluate, and its lets."""
+    if isinstance(node, list):
+        for stmt in node:
+            yield from expressions(stmt)
+    elif isinstance(node, LetStatement):
+        yield node
+    elif isinstance(node, (PrintStatement, ReturnStatement)):
+        if node.value is not None:
+            yield node.value
+    elif isinstance(node, (IfStatement, IfElseStatement)):
+        yield node.expr
+        yield from expressions(node.do)
+        yield from expressions(getattr(node, 'alternate', None) or [])
+    elif isinstance(node, LoopStatement):
+        yield node.expr
+        yield from node.body
+        yield from expressions(node.exit or [])
+
+class Region:
+    """A marker's region compiled for the types its variables had on entry."""
+
+    def __init__(self, markers, block, offset, statements):
+        self.markers = markers
+        self.block = block
+        self.offset = offset
+        self.statements = statements
+        self.lets = [item for item in expressions(statements) if isinstance(item, LetStatement)]
+        self.found = variable_nodes([item for item in expressions(statements)
+                                     if not isinstance(item, LetStatement)], self.lets)
+        self.types = {name: set() for name in self.found}  # Types seen on entry, None for unbound
+        self.versions = 0
+        self.function = None
+
+    @classmethod
+    def build(cls, markers, block, offset, variables):
+        """Compile the region after the marker at block[offset] for the
+        variables' types, or return None if it has to stay interpreted."""
+        statements = block[offset + 1:region_end(block, offset)]
+        if not statements or not compilable(statements):
+            return None
+        region = cls(markers, block, offset, statements)
+        region.widen(variables)
+        return region
+
+    def widen(self, variables):
+        """Add the variables' current types and compile again; returns whether
+        it was compiled."""
+        for name, types in self.types.items():
+            value = variables.get(name, UNDEFINED)
+            types.add(None if value is UNDEFINED else type(value))
+        if self.versions == VERSIONS:
+            self.function = None
+            return False
+        self.versions += 1
+        self.function = self.specialize()
+        return True
+
+    def run(self, variables, write):
+        """Run the region, returning its exit, or None if it deoptimized."""
+        if self.function is None:
+            return None
+        exit = self.function(variables, write)
+        if exit is None and self.widen(variables):
+            exit = self.function(variables, write)
+        return exit
+
+    def specialize(self):
+        # The entry types hold for as long as the region runs, since it is left
+        # by every goto to another marker
+        types = analysis.GrowingTypes()
+        types.join((name, frozenset(t for t in seen if t is not None)) for name, seen in self.types.items())
+        types.settle(self.lets)
+        statements = analysis.fold_statement(self.statements, types.env)
+        bound = {name for name, seen in self.types.items() if None not in seen}
+        return self.generate(statements, bound)
+
+    def generate(self, statements, bound):
+        loads, slots = load_lines(self.found)
+        guards = []
+        for name, types in self.types.items():
+            local = local_name(name)
+            checks = [f"{local} is UNDEFINED" if t is None else f"type({local}) is {t.__name__}"
+                      for t in sorted(types, key=lambda t: '' if t is None else t.__name__)]
+            guards.append(checks[0] if len(checks) == 1 else f"({' or '.join(checks)})")
+
+        label = self.block[self.offset].label
+        lines = ["def region(variables, write, UNDEFINED=UNDEFINED,"]
+        lines.append("        " + ", ".join(helper_defaults()) + "):")
+        lines.extend(f"    {line}" for line in loads)
+        if guards:
+            lines.append(f"    if not ({' and '.join(guards)}):")
+            lines.append("        return None")
+        lines.append("    try:")
+        lines.append("        while True:")
+        self.emit(lines, statements, 3, bound)
+        lines.append(f"            return {NEXT}, {region_end(self.block, self.offset)}")
+        lines.append("    finally:")
+        lines.extend(f"        {line}" for line in store_lines(self.found, slots))
+        return define(lines, 'region', f"<region @{label}>")
+
+    def emit(self, lines, node, indent, bound):
+        pad = "    " * indent
+        if isinstance(node, list):
+            for stmt in node:
+                self.emit(lines, stmt, indent, bound)
+
+        elif isinstance(node, LetStatement):
+            lines.append(f"{pad}{local_name(node.mneumonic)} = {expression_source(node.value, bound)}")
+
+        elif isinstance(node, PrintStatement):
+            value = "''" if node.value is None else f"format({expression_source(node.value, bound)})"
+            lines.append(f"{pad}write({value} + '\\n')")
+
+        elif isinstance(node, (IfStatement, IfElseStatement)):
+            lines.append(f"{pad}if {expression_source(node.expr, bound)}:")
+            self.emit_block(lines, node.do, indent + 1, bound)
+            if getattr(node, 'alternate', None):
+                lines.append(f"{pad}else:")
+                self.emit_block(lines, node.alternate, indent + 1, bound)
+
+        elif isinstance(node, GotoStatement):
+            if self.loops_back(node.label):
+                lines.append(f"{pad}continue")
+            else:
+                lines.append(f"{pad}return {GOTO}, {node.label!r}")
+
+        elif isinstance(node, ReturnStatement):
+            lines.append(f"{pad}return {RETURN}, {expression_source(node.value, bound)}")
+
+        elif isinstance(node, LoopStatement):
+            lines.extend(pad + line for line in native_loop(node, bound))
+            if node.exit is not None:
+                self.emit(lines, node.exit, indent, bound)
+
+        else:  # MarkerStatement
+            lines.append(f"{pad}pass")
+
+    def loops_back(self, label):
+        try:
+            block, offset = self.markers.resolve(label)
+        except ValueError:
+            return False  # Raised when the goto runs, as on the tree-walker
+        return block is self.block and offset == self.offset
+
+    def emit_block(self, lines, node, indent, bound):
+        start = len(lines)
+        self.emit(lines, node, indent, bound)
+        if len(lines) == start:
+            lines.append("    " * indent + "pass")
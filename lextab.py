@@ -0,0 +1,10 @@
+# lextab.py. This file automatically created by PLY (version 3.11). Don't edit!
+_tabversion   = '3.10'
+_lextokens    = set(('BE', 'BOOL', 'COMMA', 'COMP_OP', 'DEDENT', 'DIVIDE', 'ELSE', 'ENDMARKER', 'GOTO', 'IF', 'INDENT', 'INSTRUCTION', 'LET', 'LP', 'MARKER', 'MINUS', 'MNEUMONIC', 'NEWLINE', 'NUMBER', 'PLUS', 'PRINT', 'RETURN', 'RP', 'STRING', 'THEN', 'TIMES', 'WS'))
+_lexreflags   = 0
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_MNEUMONIC>[a-zA-Z_][a-zA-Z0-9_]*)|(?P<t_NUMBER>\\d+\\.\\d+|\\d+)|(?P<t_WS> +|\\t+)|(?P<t_NEWLINE>\\n+)|(?P<t_LP>\\()|(?P<t_RP>\\))|(?P<t_STRING>\\"([^\\\\\\n]|(\\\\.))*?\\")|(?P<t_COMP_OP><=|>=|==|!=|<|>)|(?P<t_INSTRUCTION>instruction)|(?P<t_BOOL>True|False)|(?P<t_ignore_COMMENT>\\#[^\\n]*)|(?P<t_RETURN>return)|(?P<t_PRINT>print)|(?P<t_THEN>then)|(?P<t_ELSE>else)|(?P<t_GOTO>goto)|(?P<t_LET>let)|(?P<t_BE>be)|(?P<t_IF>if)|(?P<t_PLUS>\\+)|(?P<t_TIMES>\\*)|(?P<t_COMMA>,)|(?P<t_MARKER>@)|(?P<t_MINUS>-)|(?P<t_DIVIDE>/)', [None, ('t_MNEUMONIC', 'MNEUMONIC'), ('t_NUMBER', 'NUMBER'), ('t_WS', 'WS'), ('t_NEWLINE', 'NEWLINE'), ('t_LP', 'LP'), ('t_RP', 'RP'), (None, 'STRING'), None, None, (None, 'COMP_OP'), (None, 'INSTRUCTION'), (None, 'BOOL'), (None, None), (None, 'RETURN'), (None, 'PRINT'), (None, 'THEN'), (None, 'ELSE'), (None, 'GOTO'), (None, 'LET'), (None, 'BE'), (None, 'IF'), (None, 'PLUS'), (None, 'TIMES'), (None, 'COMMA'), (None, 'MARKER'), (None, 'MINUS'), (None, 'DIVIDE')])]}
+_lexstateignore = {'INITIAL': ''}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexstateeoff = {}
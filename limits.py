@@ -0,0 +1,118 @@
+import sys
+import time
+
+from BanterADT import Local, Mneumonic, Operation
+from frame import Frame, UNDEFINED
+
+#################### Execution Limits ####################
+#
+# Engines only pay for limits when a run has some. They count the steps they
+# execute and call Budget.checkpoint every check_interval steps, or sooner when
+# the step limit is near; that is where time and total memory are measured.
+# Values that can grow geometrically are also measured as they are assigned,
+# so a string that doubles in size on every step is stopped right away.
+
+CHECK_INTERVAL = 1024  # Steps between checks of the clock and of total memory
+
+LIMIT_NAMES = {'steps': "Step limit", 'time': "Time limit", 'memory': "Memory limit"}
+
+class LimitExceeded(Exception):
+    """A run went over one of its Limits.
+
+    `limit` is 'steps', 'time' or 'memory', `steps` is the number of steps the
+    run had executed, and `marker` is the label of the marker it was running
+    from, or None before the first one.
+    """
+
+    def __init__(self, limit, steps=None, marker=None):
+        super().__init__(limit, steps, marker)
+        self.limit = limit
+        self.steps = steps
+        self.marker = marker
+
+    def at(self, steps, marker):
+        """Fill in where the run was, if the check that raised didn't know."""
+        if self.steps is None:
+            self.steps = steps
+        if self.marker is None:
+            self.marker = marker
+        return self
+
+    def __str__(self):
+        where = "" if self.marker is None else f" in marker {self.marker}"
+        return f"{LIMIT_NAMES[self.limit]} exceeded after {self.steps} steps{where}"
+
+def grows(expression):
+    """Whether assigning an expression over and over can grow a value geometrically.
+
+    That takes a + or * over at least two variable reads, as in `let s be s + s`;
+    values growing by a bounded amount per step are left to the periodic checks.
+    """
+    operators = set()
+    def reads(node):
+        if isinstance(node, (Mneumonic, Local)):
+            return 1
+        elif isinstance(node, Operation):
+            operators.add(node.operator)
+            return sum(reads(operand) for operand in node.operands)
+        return 0
+    return reads(expression) >= 2 and not operators.isdisjoint('+*')
+
+def total_size(variables):
+    """Total size in bytes of the values bound in a variables mapping or Frame."""
+    values = variables.values if isinstance(variables, Frame) else variables.values()
+    return sum(sys.getsizeof(value) for value in values if value is not UNDEFINED)
+
+class Limits:
+    """Bounds on a single run of a program; any of them may be None.
+
+    max_steps bounds the statements executed, counted the same way by every
+    engine, timeout is in seconds of wall-clock time, and max_memory bounds the
+    bytes held by variables.
+    """
+
+    def __init__(self, max_steps=None, timeout=None, max_memory=None, check_interval=CHECK_INTERVAL):
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.check_interval = check_interval
+
+    def __repr__(self):
+        return (f"Limits(max_steps={self.max_steps!r}, timeout={self.timeout!r}, "
+                f"max_memory={self.max_memory!r})")
+
+    def start(self):
+        """Return the Budget for a run starting now."""
+        return Budget(self)
+
+class Budget:
+    """One run's progress against its Limits."""
+
+    def __init__(self, limits):
+        self.max_steps = limits.max_steps
+        self.max_memory = limits.max_memory
+        self.check_interval = limits.check_interval
+        self.deadline = None if limits.timeout is None else time.monotonic() + limits.timeout
+
+    def checkpoint(self, executed, variables):
+        """Check the limits before running another step.
+
+        Returns the step count at which the engine should check again.
+        """
+        if self.max_steps is not None and executed >= self.max_steps:
+            raise LimitExceeded('steps', executed)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise LimitExceeded('time', executed)
+        if self.max_memory is not None and total_size(variables) > self.max_memory:
+            raise LimitExceeded('memory', executed)
+
+        next_check = executed + self.check_interval
+        if self.max_steps is not None:
+            next_check = min(next_check, self.max_steps)
+        return next_check
+
+    def check_value(self, value):
+        """Return a value about to be assigned, if it fits in the memory limit."""
+        if self.max_memory is not None and sys.getsizeof(value) > self.max_memory:
+            raise LimitExceeded('memory')
+        return value
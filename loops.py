@@ -0,0 +1,266 @@
+from dataclasses import replace
+
+from BanterADT import *
+from frame import UNDEFINED
+from interpreter import MarkerIndex
+from transpiler import expression_source, fail, helper_defaults, local_name, undefined
+from vm import OPERATIONS, COMPARISONS, UNCHECKED_OPERATIONS
+
+#################### Counted Loops ####################
+#
+# Banter has no loop statement, so loops are written with a marker, a guard
+# and a goto back to the marker. optimize finds the three shapes made only of
+# let statements between the marker and the back edge:
+#
+#   @N                    @N                          @N
+#   if cond, then         if cond, then               let ...
+#      let ...               goto instruction M       if cond, then
+#      goto instruction N let ...                        goto instruction N
+#   [else ...]            goto instruction N
+#
+# and replaces everything after the marker up to the back edge with one
+# LoopStatement. Its `run` is a Python function holding the loop as a native
+# while loop over Python locals. When the guard compares a variable stepped by
+# a constant amount against a bound, and every let adds or subtracts a value
+# the loop doesn't change, the function computes the number of iterations and
+# the variables' final values directly, for runs where they are all ints.
+#
+# The marker stays in place, so gotos from elsewhere still enter the loop, and
+# the variables and output are the same as running the original statements.
+# A LoopStatement counts as one statement: don't optimize programs run with
+# limits, a profiler or hooks.
+
+FLIPPED = {'<': '>', '>': '<', '<=': '>=', '>=': '<='}
+NEGATED = {'<': '>=', '>=': '<', '>': '<=', '<=': '>'}
+
+def iterations(operator, start, bound, step):
+    """How many steps of `step` it takes until `start operator bound` no longer
+    holds, or None if it always will."""
+    if operator == '<':
+        if not start < bound:
+            return 0
+        return -(-(bound - start) // step) if step > 0 else None
+    elif operator == '<=':
+        if not start <= bound:
+            return 0
+        return (bound - start) // step + 1 if step > 0 else None
+    elif operator == '>':
+        if not start > bound:
+            return 0
+        return -((bound - start) // -step) if step < 0 else None
+    else:  # '>='
+        if not start >= bound:
+            return 0
+        return (start - bound) // -step + 1 if step < 0 else None
+
+def is_goto(stmt, label):
+    return isinstance(stmt, GotoStatement) and stmt.label == label
+
+def has_marker(node):
+    if isinstance(node, list):
+        return any(has_marker(stmt) for stmt in node)
+    elif isinstance(node, MarkerStatement):
+        return True
+    elif hasattr(node, 'do'):
+        return has_marker(node.do) or has_marker(getattr(node, 'alternate', None))
+    return False
+
+def lets(block, start):
+    """Index of the first statement at or after start that isn't a let."""
+    while start < len(block) and isinstance(block[start], LetStatement):
+        start += 1
+    return start
+
+def match_loop(block, i):
+    """Return (LoopStatement, index after it) for a loop on the marker at
+    block[i], or None."""
+    label = block[i].label
+    guard = block[i + 1] if i + 1 < len(block) else None
+    if not isinstance(getattr(guard, 'expr', None), Comparison):
+        guard = None
+
+    # while: the guard's block is the body and the back edge
+    if (isinstance(guard, (IfStatement, IfElseStatement)) and isinstance(guard.do, list)
+            and len(guard.do) > 1 and is_goto(guard.do[-1], label)
+            and lets(guard.do, 0) == len(guard.do) - 1):
+        alternate = getattr(guard, 'alternate', None)
+        if alternate and has_marker(alternate):
+            return None
+        return loop(label, guard, False, True, guard.do[:-1], alternate or None), i + 2
+
+    # until: the guard jumps out, and the body follows it
+    if type(guard) is IfStatement:
+        exit = guard.do[-1] if isinstance(guard.do, list) else guard.do
+        end = lets(block, i + 2)
+        if (isinstance(exit, GotoStatement) and exit.label != label and not has_marker(guard.do)
+                and end > i + 2 and end < len(block) and is_goto(block[end], label)):
+            return loop(label, guard, True, True, block[i + 2:end], guard.do), end + 1
+
+    # do-while: the body comes first and the guard jumps back
+    end = lets(block, i + 1)
+    if (end > i + 1 and end < len(block) and type(block[end]) is IfStatement
+            and isinstance(block[end].expr, Comparison)):
+        back = block[end].do
+        if isinstance(back, list) and len(back) == 1:
+            back = back[0]
+        if is_goto(back, label):
+            return loop(label, block[end], False, False, block[i + 1:end], None), end + 1
+    return None
+
+def loop(label, guard, exit_when, test_first, body, exit):
+    node = LoopStatement(label=label, expr=guard.expr, exit_when=exit_when, test_first=test_first,
+                         body=body, exit=exit, lineno=guard.lineno)
+    return replace(node, run=compile_loop(node))
+
+def optimize(program):
+    """Return a copy of a program with its top-level counted loops replaced by
+    LoopStatements, for plain runs on the tree-walker."""
+    if not isinstance(program, list):
+        return program
+    # Only the marker a goto resolves to can head a loop
+    heads = {id(parent[key]) for parent, key in MarkerIndex(program).labels.values() if parent is program}
+    result = []
+    i = 0
+    while i < len(program):
+        stmt = program[i]
+        result.append(stmt)
+        found = match_loop(program, i) if id(stmt) in heads else None
+        if found is None:
+            i += 1
+        else:
+            result.append(found[0])
+            i = found[1]
+    return result
+
+#################### Native Loops ####################
+
+def names_in(expression, found):
+    if isinstance(expression, (Mneumonic, Local)):
+        found.setdefault(expression.name, expression)
+    elif isinstance(expression, (Operation, Comparison)):
+        for operand in expression.operands:
+            names_in(operand, found)
+    return found
+
+def is_int(expression):
+    return type(expression) is int
+
+def closed_form(node, assigned):
+    """Return (operator, induction name, bound, {name: [(sign, term)]}) when
+    the loop's result can be computed directly, or None."""
+    invariant = lambda term: is_int(term) or (isinstance(term, (Mneumonic, Local))
+                                              and term.name not in assigned)
+    steps = {}
+    for let in node.body:
+        value = let.value
+        if not isinstance(value, Operation) or value.operator not in '+-':
+            return None
+        left, right = value.operands
+        if isinstance(left, (Mneumonic, Local)) and left.name == let.mneumonic and invariant(right):
+            steps.setdefault(let.mneumonic, []).append((value.operator, right))
+        elif (value.operator == '+' and isinstance(right, (Mneumonic, Local))
+              and right.name == let.mneumonic and invariant(left)):
+            steps.setdefault(let.mneumonic, []).append(('+', left))
+        else:
+            return None
+
+    operator = node.expr.operator
+    left, right = node.expr.operands
+    if operator not in FLIPPED:
+        return None
+    if isinstance(right, (Mneumonic, Local)) and right.name in steps and invariant(left):
+        left, right, operator = right, left, FLIPPED[operator]
+    if not (isinstance(left, (Mneumonic, Local)) and left.name in steps and invariant(right)):
+        return None
+    if node.exit_when:
+        operator = NEGATED[operator]  # The condition for carrying on
+    return operator, left.name, right, steps
+
+def variable_nodes(expressions, lets):
+    """Map each name the expressions read or the lets assign to a node for it."""
+    found = {}
+    for expression in expressions:
+        names_in(expression, found)
+    for let in lets:
+        names_in(let.value, found)
+    for let in lets:
+        found.setdefault(let.mneumonic, Local(let.mneumonic, let.slot) if let.slot is not None
+                         else Mneumonic(let.mneumonic))
+    return found
+
+def load_lines(found):
+    """Lines binding each name's local from the variables mapping, and whether
+    they go through the frame's slots."""
+    # Programs run through frame.resolve read and write the frame's slots directly
+    slots = all(isinstance(node, Local) for node in found.values())
+    lines = ["values = variables.values"] if slots else []
+    for name, node in found.items():
+        source = f"values[{node.slot}]" if slots else f"variables.get({name!r}, UNDEFINED)"
+        lines.append(f"{local_name(name)} = {source}")
+    return lines, slots
+
+def store_lines(found, slots):
+    """Lines writing each name's local back, unless it was never bound."""
+    lines = []
+    for name, node in found.items():
+        local = local_name(name)
+        target = f"values[{node.slot}]" if slots else f"variables[{name!r}]"
+        lines.append(f"if {local} is not UNDEFINED:")
+        lines.append(f"    {target} = {local}")
+    return lines or ["pass"]
+
+def native_loop(node, bound=frozenset()):
+    """Lines running a LoopStatement's loop over locals, leaving out its exit."""
+    test = expression_source(node.expr, bound)
+    test = test if node.exit_when else f"not {test}"
+    lines = ["while True:"]
+    if node.test_first:
+        lines += [f"    if {test}:", "        break"]
+    lines += [f"    {local_name(let.mneumonic)} = {expression_source(let.value, bound)}" for let in node.body]
+    if not node.test_first:
+        lines += [f"    if {test}:", "        break"]
+    return lines
+
+def define(lines, name, filename):
+    """Run generated source for a function, and return the function."""
+    namespace = {'UNDEFINED': UNDEFINED, 'BanterString': BanterString, 'iterations': iterations, 'OPERATIONS': OPERATIONS,
+                 'COMPARISONS': COMPARISONS, 'UNCHECKED_OPERATIONS': UNCHECKED_OPERATIONS,
+                 'undefined': undefined, 'fail': fail}
+    exec(compile("\n".join(lines) + "\n", filename, "exec"), namespace)
+    return namespace[name]
+
+def compile_loop(node):
+    """Return a function running a LoopStatement's loop on a variables mapping."""
+    found = variable_nodes([node.expr], node.body)
+    assigned = {let.mneumonic for let in node.body}
+    loads, slots = load_lines(found)
+
+    lines = ["def loop(variables, UNDEFINED=UNDEFINED, iterations=iterations,"]
+    lines.append("        " + ", ".join(helper_defaults()) + "):")
+    lines.extend(f"    {line}" for line in loads)
+    lines.append("    try:")
+
+    form = closed_form(node, assigned)
+    if form is not None:
+        operator, induction, bound, steps = form
+        term = lambda term: repr(term) if is_int(term) else local_name(term.name)
+        step = {name: " + ".join(f"({'-' if sign == '-' else ''}{term(value)})" for sign, value in terms)
+                for name, terms in steps.items()}
+        checked = " and ".join(f"type({local_name(name)}) is int" for name in found)
+        lines.append(f"        if {checked}:")
+        start = local_name(induction)
+        if node.test_first:
+            lines.append(f"            count = iterations({operator!r}, {start}, {term(bound)}, {step[induction]})")
+        else:
+            lines.append(f"            count = iterations({operator!r}, {start} + {step[induction]}, "
+                         f"{term(bound)}, {step[induction]})")
+            lines.append("            count = None if count is None else count + 1")
+        lines.append("            if count is not None:")
+        for name in steps:
+            lines.append(f"                {local_name(name)} += count * ({step[name]})")
+        lines.append("                return")
+
+    lines.extend(f"        {line}" for line in native_loop(node))
+    lines.append("    finally:")
+    lines.extend(f"        {line}" for line in store_lines(found, slots))
+    return define(lines, 'loop', f"<loop @{node.label}>")
@@ -0,0 +1,359 @@
+import json
+import re
+import sys
+from bisect import bisect_left, bisect_right
+
+import banterlang
+from BanterADT import *
+
+#################### Document Blocks ####################
+#
+# A document is held as a list of blocks: a line starting at column 0 with the
+# indented, blank and comment lines after it, any `else` closing an if, and
+# any lines inside parentheses left open.
+# Each block is scanned and parsed on its own, so an edit only re-parses the
+# blocks it touches. Markers and gotos are tallied per label across blocks,
+# which finds gotos to missing markers without walking the whole document.
+# Blocks after the last edit keep the starts they had before it, lagging by the
+# lines it added, until an edit further on settles them, so typing in one
+# place doesn't move every block below it.
+
+ELSE_LINE = re.compile(r'else\b')
+CONTENT_LINE = re.compile(r'[ \t]*[^ \t\r#]')
+STRINGS_AND_COMMENTS = re.compile(r'"(?:[^"\\\n]|\\.)*"|#.*')
+MARKER_LINE = re.compile(r'[ \t]*@[ \t]*(\d+(?:\.\d+)?)')  # Markers in blocks that don't parse
+
+STATEMENTS = (LetStatement, IfStatement, IfElseStatement, ReturnStatement, PrintStatement,
+              GotoStatement, MarkerStatement)
+
+def starts_block(line):
+    return bool(line) and line[0] not in ' \t\r#' and not ELSE_LINE.match(line)
+
+def paren_balance(line):
+    if '(' not in line and ')' not in line:
+        return 0
+    line = STRINGS_AND_COMMENTS.sub('', line)
+    return line.count('(') - line.count(')')
+
+def number(text):
+    return float(text) if '.' in text else int(text)
+
+def statements(node):
+    """Yield every statement in a parsed block, nested ones included."""
+    if isinstance(node, list):
+        for stmt in node:
+            yield from statements(stmt)
+    elif isinstance(node, STATEMENTS):
+        yield node
+        if hasattr(node, 'do'):
+            yield from statements(node.do)
+            if getattr(node, 'alternate', None):
+                yield from statements(node.alternate)
+
+class Block:
+    """A run of lines parsed on its own; lines in it are counted from its start."""
+    __slots__ = ('start', 'size', 'content', 'errors', 'markers', 'gotos', 'expression')
+
+    def __init__(self, start, size):
+        self.start = start
+        self.size = size
+        self.content = False  # Whether it holds anything besides blank lines and comments
+        self.errors = []  # (line, message)
+        self.markers = []  # Labels
+        self.gotos = []  # (label, line)
+        self.expression = None  # Line of a bare expression, valid only at the start
+
+def parse_block(parser, lines, start):
+    block = Block(start, len(lines))
+    if not any(CONTENT_LINE.match(line) for line in lines):
+        return block
+    block.content = True
+    try:
+        program = parser.parse("\n".join(line.rstrip('\r') for line in lines) + "\n")
+    except SyntaxError as error:
+        line = getattr(error, 'line', None)
+        block.errors.append((len(lines) - 1 if line is None else line - 1, str(error)))
+        # Keep its markers, so gotos to them aren't reported while it is being edited
+        block.markers = [number(m.group(1)) for m in map(MARKER_LINE.match, lines) if m]
+        return block
+
+    if program and not isinstance(program[0], STATEMENTS):
+        block.expression = next(i for i, line in enumerate(lines) if CONTENT_LINE.match(line))
+    for stmt in statements(program):
+        if isinstance(stmt, MarkerStatement):
+            block.markers.append(stmt.label)
+        elif isinstance(stmt, GotoStatement):
+            block.gotos.append((stmt.label, stmt.lineno - 1))
+    return block
+
+class Document:
+    """A Banter source file being edited, with its diagnostics kept up to date."""
+
+    def __init__(self, text, parser=None):
+        self.parser = parser or banterlang.BanterParser(banterlang.Scanner())
+        self.lines = text.split('\n')
+        self.blocks = []
+        self.defined = {}  # label -> number of markers with it
+        self.uses = {}  # label -> {block: None} for blocks with gotos to it
+        self.failing = {}  # Blocks with errors, in no particular order
+        self.expressions = {}  # Blocks opening with a bare expression
+        self.shifted = 0  # Blocks from this one on start self.lag lines later than they say
+        self.lag = 0
+        self.replace_blocks(0, 0, 0, len(self.lines))
+
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+
+    def start(self, index):
+        """First line of the block at an index."""
+        block = self.blocks[index]
+        return block.start + self.lag if index >= self.shifted else block.start
+
+    def line_of(self, block):
+        """First line of a block."""
+        index = bisect_left(self.blocks, block.start, hi=self.shifted, key=lambda block: block.start)
+        settled = index < self.shifted and self.blocks[index] is block
+        return block.start if settled else block.start + self.lag
+
+    def block_at(self, line):
+        return max(bisect_right(range(len(self.blocks)), line, key=self.start) - 1, 0)
+
+    def settle(self, index):
+        """Bring the starts of the blocks before an index up to date, leaving
+        the ones from it on lagging."""
+        if index < self.shifted:
+            for block in self.blocks[index:self.shifted]:
+                block.start -= self.lag
+        else:
+            for block in self.blocks[self.shifted:index]:
+                block.start += self.lag
+        self.shifted = index
+
+    def edit(self, start, end, text):
+        """Replace the text between two (line, column) positions, as in an LSP
+        incremental change, and re-parse the blocks it touched."""
+        (first_line, first_column), (last_line, last_column) = start, end
+        new = (self.lines[first_line][:first_column] + text
+               + self.lines[last_line][last_column:]).split('\n')
+
+        first = self.block_at(first_line)
+        if first and first_line == self.start(first):
+            first -= 1  # The edit may have made its first line part of the block before
+        last = self.block_at(last_line)
+        region_start = self.start(first)
+        region_end = self.start(last) + self.blocks[last].size
+
+        self.lines[first_line:last_line + 1] = new
+        shift = len(new) - (last_line - first_line + 1)
+        self.settle(last + 1)
+        added = self.replace_blocks(first, last + 1, region_start, region_end + shift)
+        self.shifted = first + added
+        self.lag += shift
+
+    def replace_blocks(self, first, last, region_start, region_end):
+        """Replace blocks[first:last] with the blocks of lines[region_start:region_end],
+        and any blocks after that its parentheses run on into. Returns how many
+        blocks replaced them."""
+        lines = self.lines
+        blocks = []
+        start = region_start
+        depth = max(paren_balance(lines[region_start]), 0)
+        line = region_start + 1
+        while True:
+            if line == region_end and depth and last < len(self.blocks):
+                region_end += self.blocks[last].size
+                last += 1
+            if line == region_end or (not depth and starts_block(lines[line])):
+                blocks.append(parse_block(self.parser, lines[start:line], start))
+                start = line
+                if line == region_end:
+                    break
+            depth = max(depth + paren_balance(lines[line]), 0)
+            line += 1
+
+        for block in self.blocks[first:last]:
+            self.tally(block, -1)
+        self.blocks[first:last] = blocks
+        for block in blocks:
+            self.tally(block, 1)
+        return len(blocks)
+
+    def tally(self, block, sign):
+        for label in block.markers:
+            self.defined[label] = self.defined.get(label, 0) + sign
+        for label in dict.fromkeys(label for label, _ in block.gotos):  # A block may go to a label twice
+            if sign > 0:
+                self.uses.setdefault(label, {})[block] = None
+            else:
+                uses = self.uses[label]
+                uses.pop(block, None)
+                if not uses:
+                    del self.uses[label]
+        for table, flag in ((self.failing, block.errors), (self.expressions, block.expression is not None)):
+            if flag and sign > 0:
+                table[block] = None
+            elif flag:
+                del table[block]
+
+    def diagnostics(self):
+        """Return (line, message) per problem, sorted by line."""
+        found = []
+        for block in self.failing:
+            found.extend((self.line_of(block) + line, message) for line, message in block.errors)
+
+        for label, blocks in self.uses.items():
+            if not self.defined.get(label):
+                for block in blocks:
+                    found.extend((self.line_of(block) + line, f"Marker {label} not found")
+                                 for goto, line in block.gotos if goto == label)
+
+        if self.expressions:
+            opening = next((block for block in self.blocks if block.content), None)
+            for block in self.expressions:
+                if block is not opening:
+                    found.append((self.line_of(block) + block.expression,
+                                  "Only the start of a program can be a bare expression"))
+        return sorted(found)
+
+#################### Language Server ####################
+#
+# Speaks the Language Server Protocol's JSON-RPC over stdin and stdout, with
+# incremental document sync, and publishes a document's diagnostics after
+# every change. Positions are in UTF-16 code units, as LSP counts them.
+
+def read_message(stream):
+    """Read one Content-Length framed message, or return None at the end of input."""
+    length = None
+    while True:
+        header = stream.readline()
+        if not header:
+            return None
+        header = header.strip()
+        if not header:
+            break
+        name, _, value = header.decode('ascii').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return json.loads(stream.read(length))
+
+def write_message(stream, message):
+    body = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    stream.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+    stream.flush()
+
+def utf16_length(text):
+    return len(text) if text.isascii() else len(text.encode('utf-16-le')) // 2
+
+def column(line, character):
+    """The index in a line of an LSP position's character."""
+    if line.isascii():
+        return min(character, len(line))
+    units = 0
+    for index, char in enumerate(line):
+        if units >= character:
+            return index
+        units += 2 if ord(char) > 0xFFFF else 1
+    return len(line)
+
+class Server:
+    """A language server for Banter documents over a pair of binary streams."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.parser = banterlang.BanterParser(banterlang.Scanner())
+        self.documents = {}  # uri -> Document
+        self.shutdown = False
+
+    def serve(self):
+        """Handle messages until `exit`; returns the process exit status."""
+        while True:
+            message = read_message(self.reader)
+            if message is None or message.get('method') == 'exit':
+                return 0 if self.shutdown else 1
+            self.handle(message)
+
+    def handle(self, message):
+        method = message.get('method')
+        handler = getattr(self, 'on_' + method.replace('/', '_'), None) if method else None
+        request = 'id' in message
+        try:
+            if handler is None:
+                if request:
+                    self.respond(message['id'], error={'code': -32601, 'message': f"Unhandled method {method}"})
+                return
+            result = handler(message.get('params') or {})
+        except Exception as error:
+            if request:
+                self.respond(message['id'], error={'code': -32603, 'message': str(error)})
+            else:
+                sys.stderr.write(f"banter lsp: {method}: {error}\n")
+            return
+        if request:
+            self.respond(message['id'], result=result)
+
+    def respond(self, id, result=None, error=None):
+        message = {'jsonrpc': '2.0', 'id': id}
+        if error is not None:
+            message['error'] = error
+        else:
+            message['result'] = result
+        write_message(self.writer, message)
+
+    def notify(self, method, params):
+        write_message(self.writer, {'jsonrpc': '2.0', 'method': method, 'params': params})
+
+    def publish(self, uri):
+        document = self.documents.get(uri)
+        diagnostics = []
+        for line, message in document.diagnostics() if document else []:
+            diagnostics.append({
+                'range': {'start': {'line': line, 'character': 0},
+                          'end': {'line': line, 'character': utf16_length(document.lines[line])}},
+                'severity': 1,
+                'source': 'banter',
+                'message': message,
+            })
+        self.notify('textDocument/publishDiagnostics', {'uri': uri, 'diagnostics': diagnostics})
+
+    def on_initialize(self, params):
+        return {'capabilities': {'textDocumentSync': {'openClose': True, 'change': 2}},
+                'serverInfo': {'name': 'banter'}}
+
+    def on_initialized(self, params):
+        pass
+
+    def on_shutdown(self, params):
+        self.shutdown = True
+
+    def on_textDocument_didOpen(self, params):
+        document = params['textDocument']
+        self.documents[document['uri']] = Document(document['text'], self.parser)
+        self.publish(document['uri'])
+
+    def on_textDocument_didChange(self, params):
+        uri = params['textDocument']['uri']
+        for change in params['contentChanges']:
+            if 'range' not in change:
+                self.documents[uri] = Document(change['text'], self.parser)
+                continue
+            document = self.documents[uri]
+            document.edit(*(self.position(document, change['range'][end]) for end in ('start', 'end')),
+                          change['text'])
+        self.publish(uri)
+
+    def on_textDocument_didClose(self, params):
+        uri = params['textDocument']['uri']
+        self.documents.pop(uri, None)
+        self.publish(uri)
+
+    def position(self, document, position):
+        line = position['line']
+        if line >= len(document.lines):
+            return len(document.lines) - 1, len(document.lines[-1])
+        return line, column(document.lines[line], position['character'])
+
+def serve(reader=None, writer=None):
+    """Run a language server on stdin and stdout."""
+    return Server(reader or sys.stdin.buffer, writer or sys.stdout.buffer).serve()
@@ -0,0 +1,181 @@
+import dataclasses
+import hashlib
+import marshal
+import sys
+from collections import OrderedDict
+from functools import lru_cache
+
+from BanterADT import BanterString
+from cache import NODE_TAGS, VERSION_SOURCES, ProgramCache, decode, encode
+from interpreter import ReturnValue, eval_program
+from limits import total_size
+from output import TeeSink, default_sink
+
+#################### Result Cache ####################
+#
+# Banter programs can't read input, a clock or random numbers, so a program run
+# from the same bindings always returns the same value, prints the same output
+# and leaves the same bindings. A ResultCache keeps those for runs that
+# finished, keyed by a hash of the program's nodes, less their line numbers,
+# and the bindings it started from, and replays them instead of running the
+# program again.
+#
+# Entries are held in memory up to max_size bytes, evicting the least recently
+# used, and with a directory, also stored on disk in the format of the program
+# cache, so other processes and later runs share them. Stored results go stale
+# when any of RESULT_SOURCES changes. Runs that raised, including those stopped
+# by a limit, are never stored.
+
+MAX_MEMORY_SIZE = 64 * 1024 * 1024  # Bytes of results held in memory
+MAX_DISK_SIZE = 256 * 1024 * 1024  # Bytes of results per directory
+
+# Modules whose changes can alter a stored result
+RESULT_SOURCES = VERSION_SOURCES + (
+    'loops.py', 'jit.py', 'limits.py', 'output.py', 'session.py', 'batch.py', 'memo.py',
+)
+
+def limits_key(limits):
+    """The part of a run's Limits its result depends on: a run that finished
+    in time would finish again."""
+    return None if limits is None else (limits.max_steps, limits.max_memory)
+
+@lru_cache(maxsize=None)
+def compared_fields(node_type):
+    return tuple(item.name for item in dataclasses.fields(node_type) if item.compare)
+
+def fingerprint(node):
+    """A program encoded as encode() does, but without the fields its nodes'
+    equality ignores, such as line numbers, so programs that differ only in
+    layout or comments share results."""
+    if isinstance(node, list):
+        return [fingerprint(item) for item in node]
+    elif isinstance(node, tuple):
+        return (0,) + tuple(fingerprint(item) for item in node)
+    tag = NODE_TAGS.get(type(node))
+    if tag is None:
+        return node  # Literal
+    elif type(node) is BanterString:
+        return (tag, node.text())
+    return (tag,) + tuple(fingerprint(getattr(node, name)) for name in compared_fields(type(node)))
+
+class Result:
+    """What a finished run returned, printed and left bound."""
+    __slots__ = ('result', 'output', 'variables')
+
+    def __init__(self, result, output, variables):
+        self.result = result  # As eval_program returned it
+        self.output = output
+        self.variables = variables  # Name -> value after the run
+
+    def size(self):
+        value = self.result.value if isinstance(self.result, ReturnValue) else self.result
+        return sys.getsizeof(self.output) + sys.getsizeof(value) + total_size(self.variables)
+
+class ResultStore(ProgramCache):
+    """A directory of results, bounded in size like the program cache."""
+    suffix = '.bresult'
+    sources = RESULT_SOURCES
+
+    def load(self, key):
+        payload = self.read(key)
+        if payload is None:
+            return None
+        try:
+            returned, value, output, variables = decode(marshal.loads(payload))
+            return Result(ReturnValue(value) if returned else value, output, dict(variables))
+        except Exception:
+            self.remove(self.path(key))
+            return None
+
+    def store(self, key, result):
+        returned = isinstance(result.result, ReturnValue)
+        value = result.result.value if returned else result.result
+        try:
+            payload = marshal.dumps(encode([returned, value, result.output, list(map(list, result.variables.items()))]))
+        except ValueError:
+            return  # Not a value marshal can store
+        self.write(key, payload)
+
+class ResultCache:
+    """Results of finished runs by program and initial bindings."""
+
+    def __init__(self, directory=None, max_size=MAX_MEMORY_SIZE, max_disk_size=MAX_DISK_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = OrderedDict()  # key -> (Result, size), least recently used first
+        self.store = ResultStore(directory, max_disk_size) if directory is not None else None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(program, variables=None, *extra):
+        """Hash a program with the bindings it starts from; `extra` holds
+        anything else the run depends on, such as the engine."""
+        bindings = sorted((variables or {}).items())
+        canonical = repr((fingerprint(program), bindings, extra))
+        return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+    def get(self, key):
+        """Return the Result stored under a key, or None."""
+        found = self.entries.get(key)
+        if found is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return found[0]
+        result = self.store.load(key) if self.store is not None else None
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.remember(key, result)
+        return result
+
+    def put(self, key, result):
+        self.remember(key, result)
+        if self.store is not None:
+            self.store.store(key, result)
+
+    def remember(self, key, result):
+        size = result.size()
+        if size > self.max_size:
+            return
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        self.entries[key] = (result, size)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+
+    def clear(self):
+        """Forget the results held in memory."""
+        self.entries.clear()
+        self.size = 0
+
+    def run(self, program, variables=None, returnPrints=False, output=None, limits=None, context=None,
+            markers=None, profiler=None, hooks=None, tiered=False):
+        """eval_program, replaying the result of an identical earlier run if
+        there was one. Runs given a context or markers, which can change what
+        a goto finds, or a profiler or hooks, which must see the run, are run
+        without the cache."""
+        if context is not None or markers is not None or profiler is not None or hooks is not None:
+            return eval_program(program, variables, context, returnPrints, output, limits, profiler, hooks,
+                                markers, tiered)
+        if output is None:
+            output = default_sink(returnPrints)
+        if variables is None:
+            variables = {}
+        key = self.key(program, variables, returnPrints, limits_key(limits))
+
+        found = self.get(key)
+        if found is not None:
+            output.write(found.output)
+            output.flush()
+            variables.update(found.variables)
+            return output.getvalue() if returnPrints else found.result
+
+        tee = TeeSink(output)
+        result = eval_program(program, variables, returnPrints=returnPrints, output=tee, limits=limits,
+                              tiered=tiered)
+        self.put(key, Result(None if returnPrints else result, tee.captured(), dict(variables)))
+        return result
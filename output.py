@@ -0,0 +1,94 @@
+import sys
+
+#################### Output Sinks ####################
+#
+# Every engine sends printed lines to a sink instead of calling print(). A sink
+# has write(text), flush() and getvalue(), which returns what it captured.
+
+DEFAULT_BUFFER_SIZE = 64 * 1024  # Characters
+
+class StdoutSink:
+    """Writes output to a stream through a buffer, like C stdio.
+
+    Pending output is written once buffer_size characters have accumulated,
+    and after every line when line_buffered is set. By default output is line
+    buffered only when the stream is a terminal.
+    """
+
+    def __init__(self, stream=None, buffer_size=DEFAULT_BUFFER_SIZE, line_buffered=None):
+        self.stream = sys.stdout if stream is None else stream
+        self.buffer_size = buffer_size
+        if line_buffered is None:
+            isatty = getattr(self.stream, 'isatty', None)
+            line_buffered = bool(isatty and isatty())
+        self.line_buffered = line_buffered
+        self.chunks = []
+        self.pending = 0
+
+    def write(self, text):
+        self.chunks.append(text)
+        self.pending += len(text)
+        if self.pending >= self.buffer_size or self.line_buffered:
+            self.flush()
+
+    def flush(self):
+        if self.chunks:
+            self.stream.write("".join(self.chunks))
+            self.chunks.clear()
+            self.pending = 0
+        self.stream.flush()
+
+    def getvalue(self):
+        return ""
+
+class CaptureSink:
+    """Collects output in memory; appending is O(1) and getvalue joins once."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, text):
+        self.chunks.append(text)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return "".join(self.chunks)
+
+class TeeSink:
+    """Passes output on to another sink and keeps a copy of it."""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.chunks = []
+
+    def write(self, text):
+        self.chunks.append(text)
+        self.sink.write(text)
+
+    def flush(self):
+        self.sink.flush()
+
+    def getvalue(self):
+        return self.sink.getvalue()
+
+    def captured(self):
+        """Everything written through this sink."""
+        return "".join(self.chunks)
+
+class NullSink:
+    """Discards all output, for timing programs without their I/O."""
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return ""
+
+def default_sink(returnPrints=False):
+    """The sink eval_program uses when none is given."""
+    return CaptureSink() if returnPrints else StdoutSink()
@@ -0,0 +1,98 @@
+from BanterADT import *
+
+#################### Profiler ####################
+#
+# interpreter.eval_program(profiler=...) times every statement it executes and
+# records it against the marker region it ran in, i.e. the last marker reached
+# by falling through it or by a goto. Gotos are counted as they are taken. A
+# profiler accumulates over every run it is given, like the REPL's inputs.
+
+def describe(stmt):
+    """A one-line description of a statement."""
+    return str(stmt).splitlines()[0].strip()
+
+def region_name(label):
+    return "(start)" if label is None else f"@{label}"
+
+class Profiler:
+    """Hit counts and time per statement, per marker region and per goto."""
+
+    def __init__(self, name="program"):
+        self.name = name  # Root frame of the collapsed stacks
+        self.samples = {}  # (marker, id(stmt)) -> [stmt, hits, seconds]
+        self.entries = {}  # marker -> times the region was entered
+
+    def record(self, marker, stmt, seconds):
+        """Account one execution of stmt, in the region of the given marker."""
+        key = (marker, id(stmt))
+        sample = self.samples.get(key)
+        if sample is None:
+            sample = self.samples[key] = [stmt, 0, 0.0]  # Holding stmt keeps its id unique
+        sample[1] += 1
+        sample[2] += seconds
+        if isinstance(stmt, (MarkerStatement, GotoStatement)):
+            self.entries[stmt.label] = self.entries.get(stmt.label, 0) + 1
+
+    def statements(self):
+        """Return [stmt, hits, seconds] per statement, slowest first."""
+        totals = {}
+        for stmt, hits, seconds in self.samples.values():
+            if isinstance(stmt, list):
+                continue  # Nested blocks only queue their statements
+            total = totals.setdefault(id(stmt), [stmt, 0, 0.0])
+            total[1] += hits
+            total[2] += seconds
+        return sorted(totals.values(), key=lambda total: (-total[2], total[0].lineno or 0))
+
+    def regions(self):
+        """Return [marker, entries, seconds] per marker region, slowest first."""
+        totals = {}
+        for (marker, _), (_, _, seconds) in self.samples.items():
+            totals[marker] = totals.get(marker, 0.0) + seconds
+        regions = [[marker, self.entries.get(marker, 0), seconds] for marker, seconds in totals.items()]
+        return sorted(regions, key=lambda region: -region[2])
+
+    def gotos(self):
+        """Return [stmt, times taken] per goto, most taken first."""
+        gotos = [[stmt, hits] for stmt, hits, _ in self.statements() if isinstance(stmt, GotoStatement)]
+        return sorted(gotos, key=lambda goto: (-goto[1], goto[0].lineno or 0))
+
+    def report(self, limit=None):
+        """Format the profile as tables sorted by time, with at most `limit` statements."""
+        statements = self.statements()
+        total = sum(seconds for _, _, seconds in statements) or 1.0
+        lines = [f"{'line':>6} {'hits':>10} {'total ms':>10} {'per hit us':>11} {'%':>6}  statement"]
+        for stmt, hits, seconds in statements[:limit]:
+            line = '-' if stmt.lineno is None else stmt.lineno
+            lines.append(f"{line:>6} {hits:>10} {seconds * 1e3:10.3f} {seconds / hits * 1e6:11.2f} "
+                         f"{seconds / total * 100:6.1f}  {describe(stmt)}")
+
+        lines += ["", f"{'region':>8} {'entries':>10} {'total ms':>10} {'%':>6}"]
+        for marker, entries, seconds in self.regions():
+            lines.append(f"{region_name(marker):>8} {entries:>10} {seconds * 1e3:10.3f} "
+                         f"{seconds / total * 100:6.1f}")
+
+        gotos = self.gotos()
+        if gotos:
+            lines += ["", f"{'line':>6} {'taken':>10}  goto"]
+            for stmt, taken in gotos:
+                line = '-' if stmt.lineno is None else stmt.lineno
+                lines.append(f"{line:>6} {taken:>10}  {describe(stmt)}")
+        return "\n".join(lines) + "\n"
+
+    def collapsed(self):
+        """Format the profile as collapsed stacks, one `frames microseconds` line each,
+        for flamegraph.pl, speedscope and similar tools."""
+        weights = {}
+        for (marker, _), (stmt, _, seconds) in self.samples.items():
+            if isinstance(stmt, list):
+                continue
+            frames = [self.name]
+            if marker is not None:
+                frames.append(region_name(marker))
+            line = '' if stmt.lineno is None else f"line {stmt.lineno}: "
+            frames.append(f"{line}{describe(stmt)}".replace(';', ','))
+            stack = ';'.join(frames)
+            weights[stack] = weights.get(stack, 0.0) + seconds
+        return "".join(f"{stack} {round(seconds * 1e6)}\n" for stack, seconds in sorted(weights.items())
+                       if round(seconds * 1e6) > 0)
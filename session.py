@@ -0,0 +1,190 @@
+import importlib
+from collections import deque
+
+import analysis
+from cache import CacheEntry, ProgramCache
+from frame import Frame, resolve
+from interpreter import RETAIN, GrowingProgram, jumps_back
+
+# Evaluation engines by name, imported only when a session selects them
+ENGINES = {
+    'tree': 'interpreter',
+    'vm': 'vm',
+    'python': 'transpiler',
+}
+
+def load_engine(name):
+    """Return the module implementing an engine's eval_program."""
+    return importlib.import_module(ENGINES[name])
+
+class ParseFailed(Exception):
+    """A program could not be parsed.
+
+    `detail` is the parser's description of the error, or None when the source
+    was rejected before reaching the grammar (e.g. by the scanner).
+    """
+    def __init__(self, detail=None):
+        super().__init__(detail or "Syntax error in input")
+        self.detail = detail
+
+class Session:
+    """An interpreter with its own parser, variables, program context and output.
+
+    Sessions share no mutable state, so separate sessions can run programs on
+    separate threads at the same time. A single session is not thread safe.
+
+    On the tree engine everything run is one growing program, so a goto can
+    reach markers from earlier inputs. The last `retain` statements are held.
+    """
+
+    def __init__(self, engine='tree', output=None, use_cache=False, parser=None, limits=None,
+                 profiler=None, hooks=None, retain=RETAIN):
+        if profiler is not None and engine != 'tree':
+            raise ValueError("Profiling needs the tree engine")
+        if hooks is not None and engine != 'tree':
+            raise ValueError("Hooks need the tree engine")
+        self.engine = engine
+        self.engine_module = load_engine(engine)
+        self.output = output  # An output sink, or None for each run's default
+        self.limits = limits  # A limits.Limits applied to each run, or None
+        self.profiler = profiler  # A profiler.Profiler recording every run, or None
+        self.hooks = hooks  # A hooks.Hooks called back during every run, or None
+        self.use_cache = use_cache  # Cache parsed files given by filename
+        self.variables = Frame()
+        self.program = GrowingProgram(retain)  # Every input run, for the tree engine's gotos
+        self.types = analysis.GrowingTypes()  # Types over every input in self.program
+        self.history = deque(maxlen=retain)  # The latest statements run successfully
+        self._parser = parser  # Never share one between sessions on different threads
+
+    @property
+    def parser(self):
+        # Built on first use, so runs served from the cache never load PLY
+        if self._parser is None:
+            import banterlang
+            self._parser = banterlang.BanterParser(banterlang.Scanner())
+        return self._parser
+
+    def parse(self, source, filename=None):
+        """Parse source into a CacheEntry, through the file's cache if enabled."""
+        program_cache = self.program_cache(filename)
+        key = ProgramCache.key(source) if program_cache else None
+        if program_cache is not None:
+            entry = program_cache.load(key)
+            if entry is not None:
+                return entry
+
+        parser = self.parser
+        try:
+            program = parser.parse(source)
+        except Exception as error:
+            import banterlang
+            detail = str(error) if isinstance(error, banterlang.ParseError) else None
+            raise ParseFailed(detail) from error
+
+        entry = CacheEntry(key, program)
+        if program_cache is not None:
+            program_cache.store(entry)
+        return entry
+
+    def execute(self, entry, filename=None, returnPrints=False):
+        """Run a parsed program, continuing from this session's variables.
+
+        Returns what the engine's eval_program returns.
+        """
+        ast = entry.program
+        program = ast if isinstance(ast, list) else [ast]
+
+        # Code compiled for a file only holds for runs from empty bindings
+        fresh = not self.variables
+
+        options = {'returnPrints': returnPrints, 'output': self.output, 'limits': self.limits}
+        if self.engine == 'tree':
+            program = self.specialize(program)
+            if self.limits is None and self.profiler is None and self.hooks is None and jumps_back(program):
+                # Run counted goto loops natively, and compile code that turns
+                # out hot; only for programs that can loop, as both load the
+                # transpiler
+                import loops
+                program = loops.optimize(program)
+                options['tiered'] = True
+            options['markers'] = self.program.markers(program)
+        else:
+            # Fold constants and prove operand types for the current bindings
+            program = analysis.analyze(program, self.variables)
+            program = resolve(program, self.variables)
+
+        if self.engine == 'python' and entry.key is not None and fresh and self.limits is None:
+            result = self.run_transpiled(program, entry, filename, returnPrints)
+        else:
+            if self.profiler is not None:
+                options['profiler'] = self.profiler
+            if self.hooks is not None:
+                options['hooks'] = self.hooks
+            result = self.engine_module.eval_program(program, self.variables, **options)
+
+        self.remember(ast)
+        return result
+
+    async def execute_async(self, entry, output=None, run_time=None):
+        """Run a parsed program like execute, as a coroutine that yields to the
+        event loop (see cooperative.py). Printed lines go to `output`, an async
+        sink, by default wrapping this session's output. Needs the tree engine;
+        the profiler and hooks aren't called, and counted loops aren't run
+        natively, so any loop can be interrupted."""
+        if self.engine != 'tree':
+            raise ValueError("Cooperative runs need the tree engine")
+        import cooperative
+        ast = entry.program
+        program = self.specialize(ast if isinstance(ast, list) else [ast])
+        if output is None and self.output is not None:
+            output = cooperative.AsyncSink(self.output)
+        result = await cooperative.eval_program_async(program, self.variables, output=output, limits=self.limits,
+                                                      markers=self.program.markers(program), run_time=run_time)
+        self.remember(ast)
+        return result
+
+    def run(self, source, filename=None, returnPrints=False):
+        """Parse and run source; raises ParseFailed if it doesn't parse."""
+        return self.execute(self.parse(source, filename), filename, returnPrints)
+
+    async def run_async(self, source, filename=None, output=None, run_time=None):
+        """Parse and run source with execute_async."""
+        return await self.execute_async(self.parse(source, filename), output, run_time)
+
+    def specialize(self, program):
+        """Add an input to the tree engine's growing program, returning the copy
+        to run now."""
+        # Gotos from later inputs may run this one again after other inputs
+        # have changed the bindings, so the program keeps a general copy.
+        # The copy run now is specialized, assuming every held input may run.
+        self.program.append(resolve(program, self.variables))
+        env = self.types.widen(analysis.assignments(program), self.variables,
+                               self.program.assignments)
+        return resolve(analysis.analyze(program, env=env), self.variables)
+
+    def remember(self, ast):
+        if isinstance(ast, list):
+            self.history.extend(ast)
+        else:
+            self.history.append(ast)
+
+    def run_transpiled(self, program, entry, filename, returnPrints):
+        """Run a file on the python engine, reusing its transpiled code from the cache."""
+        transpiler = self.engine_module
+        if entry.code is None:
+            entry.code = transpiler.compile_code(program)
+            self.program_cache(filename).store(entry)
+        return transpiler.run(transpiler.load_function(entry.code), self.variables,
+                              returnPrints, self.output)
+
+    def program_cache(self, filename):
+        if filename and self.use_cache:
+            return ProgramCache.for_file(filename)
+        return None
+
+    def clear(self):
+        """Forget all variables and the program context."""
+        self.history.clear()
+        self.program.clear()
+        self.types.clear()
+        self.variables.clear()
@@ -0,0 +1,44 @@
+import io
+import json
+
+import batch
+from limits import Limits
+
+PROGRAMS = {
+    'ok.banter': 'let x be 2\nprint x * 3\nreturn "done"\n',
+    'syntax.banter': 'let x be\n',
+    'error.banter': 'print 1 / 0\n',
+    'loop.banter': '@1\ngoto instruction 1\n',
+    'nested/ok.banter': 'print "nested"\n',
+}
+
+def write_programs(directory):
+    for name, source in PROGRAMS.items():
+        path = directory / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(source)
+
+def records(directory, **options):
+    report = io.StringIO()
+    failures = batch.run_batch(batch.find_programs(str(directory)), report, jobs=2,
+                               limits=Limits(max_steps=1000), **options)
+    found = [json.loads(line) for line in report.getvalue().splitlines()]
+    return failures, {record['file'][len(str(directory)) + 1:]: record for record in found}
+
+def test_batch_reports_every_program(tmp_path):
+    write_programs(tmp_path)
+    failures, found = records(tmp_path)
+    assert failures == 3
+    assert {name: record['status'] for name, record in found.items()} == {
+        'ok.banter': 'ok', 'syntax.banter': 'syntax_error', 'error.banter': 'error',
+        'loop.banter': 'limit_exceeded', 'nested/ok.banter': 'ok'}
+    assert (found['ok.banter']['output'], found['ok.banter']['result']) == ("6\n", '"done"')
+    assert found['nested/ok.banter']['output'] == '"nested"\n'
+
+def test_batch_replays_stored_results(tmp_path):
+    write_programs(tmp_path / 'programs')
+    memo = str(tmp_path / 'results')
+    _, first = records(tmp_path / 'programs', memo=memo)
+    _, second = records(tmp_path / 'programs', memo=memo)
+    assert not first['ok.banter']['cached'] and second['ok.banter']['cached']
+    assert (second['ok.banter']['output'], second['ok.banter']['result']) == ("6\n", '"done"')
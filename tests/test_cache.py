@@ -0,0 +1,78 @@
+import os
+import threading
+
+import banterlang
+from cache import CacheEntry, ProgramCache
+
+SOURCE = 'let x be "a" + "b"\n@1\nif x == "ab", then\n   print x\nreturn 2.5\n'
+
+def stored(directory, source=SOURCE):
+    cache = ProgramCache(str(directory))
+    key = cache.key(source)
+    cache.store(CacheEntry(key, banterlang.parser.parse(source)))
+    return cache, key
+
+def test_round_trip(tmp_path):
+    cache, key = stored(tmp_path)
+    assert cache.load(key).program == banterlang.parser.parse(SOURCE)
+
+def test_corrupt_entries_are_misses(tmp_path):
+    cache, key = stored(tmp_path)
+    with open(cache.path(key), 'r+b') as file:
+        file.seek(-1, os.SEEK_END)
+        last = file.read(1)
+        file.seek(-1, os.SEEK_END)
+        file.write(bytes([last[0] ^ 1]))
+    assert cache.load(key) is None
+    assert not os.path.exists(cache.path(key))
+
+def test_undecodable_entries_are_misses(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    cache.write('key', b'not marshal')
+    assert cache.load('key') is None
+    assert not os.path.exists(cache.path('key'))
+
+def test_stale_entries_are_misses(tmp_path):
+    class Older(ProgramCache):
+        sources = ('cache.py',)
+    _, key = stored(tmp_path)
+    assert Older(str(tmp_path)).load(key) is None
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache, first = stored(tmp_path, "let a be 1\n")
+    size = os.path.getsize(cache.path(first))
+    cache.max_size = 2 * size
+    _, second = stored(tmp_path, "let b be 1\n")
+    os.utime(cache.path(first), (0, 0))
+    os.utime(cache.path(second), (1, 1))
+    cache.load(first)  # Used again, so the second is now the oldest
+    third = cache.key("let c be 1\n")
+    cache.store(CacheEntry(third, banterlang.parser.parse("let c be 1\n")))
+    assert cache.load(second) is None
+    assert cache.load(first) is not None and cache.load(third) is not None
+
+def test_writers_of_one_key_in_threads(tmp_path, monkeypatch):
+    cache = ProgramCache(str(tmp_path))
+    payloads = [bytes([n]) * 100000 for n in range(8)]
+    read = []
+    temporaries = []
+    replace = os.replace
+
+    def record(source, target):
+        temporaries.append(source)
+        replace(source, target)
+    monkeypatch.setattr(os, 'replace', record)
+
+    def write(payload):
+        for _ in range(20):
+            cache.write('key', payload)
+            read.append(cache.read('key'))
+
+    threads = [threading.Thread(target=write, args=(payload,)) for payload in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(payload in payloads for payload in read if payload is not None)
+    assert os.listdir(tmp_path) == ['key' + cache.suffix]
+    assert len(set(temporaries)) == len(temporaries) == 160  # A file of its own for every write
@@ -0,0 +1,117 @@
+import asyncio
+import glob
+import os
+from collections import deque
+
+import pytest
+
+import analysis
+import banterlang
+import frame
+import interpreter
+import jit
+import loops
+import transpiler
+import vectorized
+import vm
+from cooperative import AsyncSink, eval_program_async
+from hooks import Hooks
+from interpreter import MarkerIndex, ReturnValue
+from limits import Limits
+from output import CaptureSink
+from profiler import Profiler
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples')
+
+def example_sources():
+    sources = {}
+    for path in sorted(glob.glob(os.path.join(EXAMPLES, '*.banter'))):
+        with open(path) as file:
+            sources[os.path.basename(path)] = file.read()
+    # The full search would run for hours on the tree-walker
+    sources['prime.banter'] = sources['prime.banter'].replace("let maxPrimes be 1000000", "let maxPrimes be 30")
+    return sources
+
+SOURCES = example_sources()
+
+def plain(result):
+    if isinstance(result, ReturnValue):
+        result = result.value
+    if isinstance(result, banterlang.BanterString):
+        result = result.text()
+    return result
+
+def outcome(run, source):
+    """What running source prints and returns, or the error it raises."""
+    program = banterlang.parser.parse(source)
+    output = CaptureSink()
+    try:
+        result = run(program, {}, output)
+    except Exception as error:
+        return output.getvalue(), type(error), str(error)
+    return output.getvalue(), plain(result)
+
+def plain_run(engine):
+    def run(program, variables, output):
+        return engine.eval_program(program, variables, output=output)
+    return run
+
+tree = plain_run(interpreter)
+
+def specialized(engine):
+    def run(program, variables, output):
+        variables = frame.Frame(variables)
+        program = frame.resolve(analysis.analyze(program, variables), variables)
+        return engine.eval_program(program, variables, output=output)
+    return run
+
+def limited(engine):
+    def run(program, variables, output):
+        limits = Limits(max_steps=10 ** 9, max_memory=10 ** 9, check_interval=7)
+        return engine.eval_program(program, variables, output=output, limits=limits)
+    return run
+
+def tiered(program, variables, output):
+    program = program if isinstance(program, list) else [program]
+    # A threshold of one compiles every region a goto reaches
+    return jit.run(deque(program), variables, [program], output, False, MarkerIndex(program), threshold=1)
+
+def optimized(program, variables, output):
+    return interpreter.eval_program(loops.optimize(program), variables, output=output, tiered=True)
+
+def observed(program, variables, output):
+    return interpreter.eval_program(program, variables, output=output, profiler=Profiler(), hooks=Hooks())
+
+def cooperative(program, variables, output):
+    return asyncio.run(eval_program_async(program, variables, output=AsyncSink(output), yield_steps=3))
+
+ENGINES = {
+    'vm': plain_run(vm),
+    'python': plain_run(transpiler),
+    'tree+analysis': specialized(interpreter),
+    'vm+analysis': specialized(vm),
+    'python+analysis': specialized(transpiler),
+    'tree+limits': limited(interpreter),
+    'vm+limits': limited(vm),
+    'python+limits': limited(transpiler),
+    'tiered': tiered,
+    'loops': optimized,
+    'observed': observed,
+    'cooperative': cooperative,
+}
+
+@pytest.mark.parametrize('name', SOURCES)
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines_match_the_tree_walker(engine, name):
+    source = SOURCES[name]
+    assert outcome(ENGINES[engine], source) == outcome(tree, source)
+
+@pytest.mark.parametrize('name', SOURCES)
+def test_lanes_match_the_tree_walker(name):
+    program = banterlang.parser.parse(SOURCES[name])
+    expected = outcome(tree, SOURCES[name])
+    for lane in vectorized.eval_lanes(program, [{}] * vectorized.MIN_LANES):
+        if lane.error is None:
+            assert (lane.output, plain(lane.result)) == expected
+        else:
+            assert (lane.output, type(lane.error), str(lane.error)) == expected
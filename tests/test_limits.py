@@ -0,0 +1,71 @@
+import pytest
+
+from limits import LimitExceeded, Limits
+from output import CaptureSink
+from session import Session
+
+ENGINES = ['tree', 'vm', 'python']
+
+# Branches inside marker regions, taken on some passes and not others
+BRANCHES = """\
+let i be 0
+@1
+if i > 1000000, then
+    print i
+    print i
+    print i
+let i be i + 1
+goto instruction 1
+"""
+
+IF_ELSE = """\
+let i be 0
+@1
+if i < 3, then
+    let i be i + 1
+    let j be 1
+else
+    let i be i + 2
+if i > 50, then
+    goto instruction 2
+goto instruction 1
+@2
+let k be 0
+@3
+let k be k + 1
+goto instruction 3
+"""
+
+DOUBLING = """\
+let n be 0
+@1
+let s be "ab"
+@2
+let n be n + 1
+let s be s + s
+if n > 3, then
+    let t be n
+goto instruction 2
+"""
+
+def stopped(engine, source, limits):
+    session = Session(engine=engine, output=CaptureSink(), limits=limits)
+    with pytest.raises(LimitExceeded) as error:
+        session.run(source)
+    return error.value.limit, error.value.steps, error.value.marker
+
+@pytest.mark.parametrize('source', [BRANCHES, IF_ELSE])
+@pytest.mark.parametrize('max_steps', [1, 2, 3, 5, 7, 10, 37, 100, 1000])
+@pytest.mark.parametrize('check_interval', [1, 3, 64])
+def test_engines_stop_at_the_same_step(source, max_steps, check_interval):
+    limits = Limits(max_steps=max_steps, check_interval=check_interval)
+    results = {engine: stopped(engine, source, limits) for engine in ENGINES}
+    assert set(results.values()) == {('steps', max_steps, results['tree'][2])}
+
+@pytest.mark.parametrize('max_memory', [100, 300, 2000, 100000])
+@pytest.mark.parametrize('check_interval', [1, 3, 64])
+def test_engines_agree_on_memory(max_memory, check_interval):
+    limits = Limits(max_steps=10000, max_memory=max_memory, check_interval=check_interval)
+    results = {engine: stopped(engine, DOUBLING, limits) for engine in ENGINES}
+    assert len(set(results.values())) == 1
+    assert results['tree'][0] == 'memory'
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from lsp import Document
+
+SOURCE = """\
+let a be 1
+@1
+if a < 3, then
+   goto instruction 9
+   goto instruction 9
+   let a be a + 1
+else
+   print (a +
+      2)
+@2
+goto instruction 1
+# a comment
+
+let b be (a
+"""
+
+PIECES = ["\n", " ", "   ", "let c be 2", "goto instruction 9", "goto instruction 2", "@9", "(", ")",
+          "if a < 2, then\n   goto instruction 9\n   goto instruction 9", "else", "# note", "\"s\"", "a + 1"]
+
+def layout(document):
+    return [(document.start(index), block.size) for index, block in enumerate(document.blocks)]
+
+def random_edit(rng, lines):
+    first = rng.randrange(len(lines))
+    last = min(first + rng.choice([0, 0, 1, 2]), len(lines) - 1)
+    start = (first, rng.randint(0, len(lines[first])))
+    end = (last, rng.randint(0, len(lines[last])))
+    if end < start:
+        start, end = end, start
+    return start, end, rng.choice(PIECES + [""])
+
+def test_removing_a_block_with_repeated_gotos():
+    document = Document("if 1 < 2, then\n   goto instruction 9\n   goto instruction 9\nlet a be 1\n")
+    document.edit((1, 0), (1, 0), " ")
+    assert document.diagnostics() == Document(document.text).diagnostics()
+
+@pytest.mark.parametrize('seed', range(6))
+def test_edits_match_a_full_parse(seed):
+    rng = random.Random(seed)
+    document = Document(SOURCE)
+    for _ in range(150):
+        document.edit(*random_edit(rng, document.lines))
+        fresh = Document(document.text)
+        assert document.diagnostics() == fresh.diagnostics()
+        assert layout(document) == layout(fresh)
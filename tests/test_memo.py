@@ -0,0 +1,73 @@
+import glob
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import banterlang
+import memo
+from hooks import Hooks
+from interpreter import MarkerIndex
+from output import CaptureSink
+from profiler import Profiler
+
+ROOT = os.path.dirname(os.path.abspath(memo.__file__))
+
+def test_layout_and_comments_share_a_key():
+    plain = banterlang.parser.parse('let x be 1\nprint x + 1\n')
+    spaced = banterlang.parser.parse('# Counting\n\nlet x be 1\n\n\nprint x + 1  # Two\n')
+    other = banterlang.parser.parse('let x be 1\nprint x + 2\n')
+    assert memo.ResultCache.key(plain) == memo.ResultCache.key(spaced)
+    assert memo.ResultCache.key(plain) != memo.ResultCache.key(other)
+
+def test_replayed_from_disk(tmp_path):
+    program = banterlang.parser.parse('let x be 2\nprint x * 3\nreturn x\n')
+    memo.ResultCache(str(tmp_path)).run(program, output=CaptureSink())
+    cache = memo.ResultCache(str(tmp_path))
+    output = CaptureSink()
+    assert cache.run(program, output=output).value == 2
+    assert (output.getvalue(), cache.hits) == ("6\n", 1)
+
+@pytest.mark.parametrize('option, make', [
+    ('context', lambda program: []),
+    ('markers', MarkerIndex),
+    ('profiler', lambda program: Profiler()),
+    ('hooks', lambda program: Hooks()),
+])
+def test_runs_with_context_or_observers_are_not_cached(option, make):
+    program = banterlang.parser.parse('let x be 2\nprint x * 3\n')
+    cache = memo.ResultCache()
+    for _ in range(2):
+        output = CaptureSink()
+        cache.run(program, output=output, **{option: make(program)})
+        assert output.getvalue() == "6\n"
+    assert (cache.hits, cache.misses, len(cache.entries)) == (0, 0, 0)
+
+# Run in a copy of the interpreter's sources, printing the cache hits
+RUN = """\
+import sys
+import banterlang, memo
+from output import CaptureSink
+cache = memo.ResultCache(sys.argv[1])
+cache.run(banterlang.parser.parse('let x be 2\\nprint x * 3\\n'), output=CaptureSink())
+print(cache.hits)
+"""
+
+def hits(sources, directory):
+    run = subprocess.run([sys.executable, '-c', RUN, str(directory)], cwd=sources,
+                         capture_output=True, text=True, check=True)
+    return int(run.stdout)
+
+@pytest.mark.parametrize('edited', [None, 'interpreter.py', 'loops.py', 'jit.py', 'limits.py', 'output.py', 'memo.py'])
+def test_editing_a_dependency_invalidates_results(tmp_path, edited):
+    sources = tmp_path / 'sources'
+    sources.mkdir()
+    for path in glob.glob(os.path.join(ROOT, '*.py')):
+        shutil.copy(path, sources)
+    assert hits(sources, tmp_path / 'memo') == 0
+    if edited is not None:
+        with open(sources / edited, 'a') as file:
+            file.write("\n# Edited\n")
+    assert hits(sources, tmp_path / 'memo') == (edited is None)
@@ -0,0 +1,27 @@
+import time
+
+import banterlang
+
+TOLERANCE = 3.0  # Generous, as timings on a busy machine are noisy; quadratic parsing grows 8x
+
+def generate_program(statements):
+    lines = ["let total be 0", "@1"]
+    for n in range(statements // 3):
+        lines.append(f"let x{n % 100} be total + {n}")
+        lines.append(f"if x{n % 100} > total, then")
+        lines.append(f"   let total be x{n % 100} - 1")
+    return "\n".join(lines) + "\n"
+
+def time_per_statement(statements, repeat=3):
+    source = generate_program(statements)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        banterlang.parser.parse(source)
+        best = min(best, time.perf_counter() - start)
+    return best / statements
+
+def test_parsing_is_linear():
+    banterlang.parser.parse(generate_program(300))  # Warm up
+    small, large = time_per_statement(1000), time_per_statement(8000)
+    assert large / small < TOLERANCE
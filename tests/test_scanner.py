@@ -0,0 +1,50 @@
+import glob
+import os
+import random
+
+import pytest
+
+from banterlang import IndentLexer, Scanner
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples')
+
+FRAGMENTS = ['let', 'x', 'be', '1', '2.5', 'if', 'then', 'else', ',', 'print', 'return', 'goto', 'instruction',
+             '@', '3', '"s"', '"a\\"b"', '"unterminated', '+', '-', '*', '/', '(', ')', '<', '<=', '==', '!=',
+             '>', '=', 'True', 'False', '#c', '\n', '\n', '\n', '  ', '    ', ' ', '.', '?', '_y9',
+             '\n  ', '\n    ', '\r']
+
+def example_sources():
+    sources = []
+    for path in sorted(glob.glob(os.path.join(EXAMPLES, '*.banter'))):
+        with open(path) as file:
+            sources.append(file.read())
+    return sources
+
+def tokens(lexer, source):
+    """The tokens lexer makes of source, ending with the error it raises if any."""
+    stream = []
+    try:
+        lexer.input(source)
+        while (token := lexer.token()) is not None:
+            stream.append((token.type, token.value, token.lineno, token.lexpos))
+    except SyntaxError as error:  # IndentationError included
+        stream.append((type(error), str(error)))
+    return stream
+
+@pytest.mark.parametrize('source', example_sources())
+def test_examples_scan_as_they_lex(source):
+    assert tokens(Scanner(), source) == tokens(IndentLexer(), source)
+
+@pytest.mark.parametrize('seed', range(4))
+def test_fragments_scan_as_they_lex(seed):
+    rng = random.Random(seed)
+    examples = example_sources()
+    for _ in range(500):
+        if rng.random() < 0.3:
+            source = list(rng.choice(examples))
+            for _ in range(rng.randint(0, 3)):
+                source.insert(rng.randrange(len(source) + 1), rng.choice(FRAGMENTS))
+            source = ''.join(source)
+        else:
+            source = ''.join(rng.choice(FRAGMENTS) + rng.choice(['', ' ']) for _ in range(rng.randint(0, 30)))
+        assert tokens(Scanner(), source) == tokens(IndentLexer(), source), source
@@ -0,0 +1,41 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from output import CaptureSink
+from session import ENGINES, Session
+
+TASKS = 40
+THREADS = 8
+
+def generate_program(seed):
+    return (f"let seed be {seed}\n"
+            f"let i be 0\n"
+            f"let total be offset\n"
+            f"@1\n"
+            f"if i < {20 + seed % 20}, then\n"
+            f"    let total be total + seed * i\n"
+            f"    print total\n"
+            f"    let i be i + 1\n"
+            f"    goto instruction 1\n"
+            f"return total\n")
+
+def run_task(engine, seed):
+    session = Session(engine=engine, output=CaptureSink())
+    # Split over two runs, so the second depends on the session's variables
+    session.run(f"let offset be {seed}\n")
+    session.run(generate_program(seed))
+    return session.output.getvalue(), dict(session.variables)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_sessions_in_threads_do_not_interfere(engine):
+    expected = [run_task(engine, seed) for seed in range(TASKS)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible to expose races
+    try:
+        with ThreadPoolExecutor(THREADS) as pool:
+            results = list(pool.map(lambda seed: run_task(engine, seed), range(TASKS)))
+    finally:
+        sys.setswitchinterval(interval)
+    assert results == expected
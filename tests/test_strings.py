@@ -0,0 +1,99 @@
+import sys
+import threading
+
+import pytest
+
+import analysis
+from BanterADT import BanterString
+from banterlang import parser
+from interpreter import eval_program
+from output import CaptureSink
+from session import Session
+
+THREADS = 6
+
+# Run after `let s be "ab"`, so s holds the shared literal and isn't folded
+SHARED = """\
+let n be 0
+@1
+let t be s + "y"
+let u be s + "z"
+let v be t + "w"
+if n < 3000, then
+    let n be n + 1
+    goto instruction 1
+print t
+print u
+print v
+"""
+
+def run_threads(target):
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads often, to expose races
+    threads = [threading.Thread(target=target) for _ in range(THREADS)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+def test_sessions_share_a_parsed_program():
+    session = Session()
+    entries = [session.parse('let s be "ab"\n'), session.parse(SHARED)]
+    outputs = []
+
+    def run():
+        for _ in range(20):
+            output = CaptureSink()
+            session = Session(output=output)
+            for entry in entries:
+                session.execute(entry)
+            outputs.append(output.getvalue())
+
+    run_threads(run)
+    assert outputs == ['"aby"\n"abz"\n"abyw"\n'] * (THREADS * 20)
+    assert entries[0].program[0].value._buffer is None  # The literal was never extended
+
+def test_concatenation_across_threads():
+    base = BanterString("a") + BanterString("b")
+    wrong = []
+
+    def run():
+        for i in range(60000):
+            suffix = BanterString(str(i))
+            if (base + suffix).text() != "ab" + str(i):
+                wrong.append(i)
+
+    run_threads(run)
+    assert not wrong and base.text() == "ab"
+
+def test_literals_keep_their_text():
+    literal = BanterString("x")
+    built = literal + BanterString("y")
+    assert literal._buffer is None
+    assert (built + BanterString("z"), built + BanterString("w")) == (BanterString("xyz"), BanterString("xyw"))
+    assert str(built) == '"xy"'
+
+def test_folded_strings_keep_their_text():
+    program = analysis.analyze(parser.parse('let a be "x" + "y"\nlet b be a + "z"\nprint b\n'), {})
+    folded = program[0].value
+    assert folded == BanterString("xy") and folded._buffer is None
+    output = CaptureSink()
+    eval_program(program, {}, output=output)
+    assert output.getvalue() == '"xyz"\n' and folded._buffer is None
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+@pytest.mark.parametrize('source, message', [
+    ('return "a" - "b"', "unsupported operand type(s) for -: 'str' and 'str'"),
+    ('return "a" * "b"', "can't multiply sequence by non-int of type 'str'"),
+    ('return "a" / "b"', "unsupported operand type(s) for /: 'str' and 'str'"),
+    ('return "a" < 1', "'<' not supported between instances of 'str' and 'int'"),
+    ('return 1 < "a"', "'<' not supported between instances of 'int' and 'str'"),
+    ('return "a" >= 2.5', "'>=' not supported between instances of 'str' and 'float'"),
+])
+def test_operator_errors(engine, source, message):
+    with pytest.raises(TypeError) as error:
+        Session(engine=engine).run(source + "\n")
+    assert str(error.value) == message
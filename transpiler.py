@@ -0,0 +1,351 @@
+from BanterADT import *
+from compiler import *
+from interpreter import ReturnValue
+from limits import grows
+from output import default_sink
+
+#################### Runtime Support ####################
+
+def undefined(name):
+    raise ValueError(f"Variable {name} not defined")
+
+def fail(error):
+    raise error
+
+OPERATOR_HELPERS = {'+': '_add', '-': '_sub', '*': '_mul', '/': '_div'}
+
+COMPARISON_HELPERS = {
+    '==': '_eq', '!=': '_ne', '>': '_gt', '<': '_lt', '>=': '_ge', '<=': '_le',
+}
+
+# Operations with proven operand types (see analysis.py) skip the helpers' checks
+UNCHECKED_OPERATOR_HELPERS = {'/': '_divide'}
+
+def helper_defaults():
+    """Keyword defaults binding the helpers expression_source calls, for the
+    signature of a generated function."""
+    helpers = [f"{helper}=OPERATIONS[{op!r}]" for op, helper in OPERATOR_HELPERS.items()]
+    helpers += [f"{helper}=COMPARISONS[{op!r}]" for op, helper in COMPARISON_HELPERS.items()]
+    helpers += [f"{helper}=UNCHECKED_OPERATIONS[{op!r}]" for op, helper in UNCHECKED_OPERATOR_HELPERS.items()]
+    return helpers
+
+HEADER = """\
+from BanterADT import BanterString
+from frame import UNDEFINED
+from interpreter import ReturnValue
+from limits import LimitExceeded
+from transpiler import undefined, fail
+from vm import OPERATIONS, COMPARISONS, UNCHECKED_OPERATIONS
+from sys import getsizeof
+"""
+
+#################### Code Generation ####################
+#
+# The lowered instruction list is split into basic blocks at every jump target.
+# Each basic block becomes one state of a `while True` loop, dispatched on `pc`
+# with a binary search, and Banter variables become Python locals that are
+# loaded from and written back to the variables mapping.
+
+def local_name(name):
+    return f"v_{name}"
+
+def target_name(target):
+    """Name assigned by a LET instruction, whether or not it was resolved."""
+    return target.name if isinstance(target, Local) else target
+
+def collect_names(code):
+    names = {}
+    def visit(expression):
+        if isinstance(expression, (Mneumonic, Local)):
+            names.setdefault(expression.name)
+        elif isinstance(expression, (Operation, Comparison)):
+            for operand in expression.operands:
+                visit(operand)
+
+    for op, a, b in code.instructions:
+        if op == LET:
+            names.setdefault(target_name(a))
+            visit(b)
+        elif op in (IF, IF_ELSE, PRINT, RETURN, EXPR):
+            visit(a)
+    return list(names)
+
+def expression_source(expression, bound=frozenset()):
+    """Python source evaluating an expression over the locals of local_name.
+    Names in `bound` are known to be bound, so they are read unchecked."""
+    if isinstance(expression, BanterString):
+        return f"BanterString({expression.text()!r})"
+    elif isinstance(expression, (int, float, bool, str)):
+        return repr(expression)
+
+    elif isinstance(expression, (Mneumonic, Local)):
+        local = local_name(expression.name)
+        if expression.name in bound:
+            return local
+        return f"({local} if {local} is not UNDEFINED else undefined({expression.name!r}))"
+
+    elif isinstance(expression, Operation):
+        if expression.operator not in OPERATOR_HELPERS:
+            return f"fail(ValueError({f'Unknown operator: {expression.operator}'!r}))"
+        left, right = (expression_source(operand, bound) for operand in expression.operands)
+        if not expression.proven:
+            return f"{OPERATOR_HELPERS[expression.operator]}({left}, {right})"
+        elif expression.operator in UNCHECKED_OPERATOR_HELPERS:
+            return f"{UNCHECKED_OPERATOR_HELPERS[expression.operator]}({left}, {right})"
+        return f"({left} {expression.operator} {right})"
+
+    elif isinstance(expression, Comparison):
+        if expression.operator not in COMPARISON_HELPERS:
+            return f"fail(ValueError({f'Unknown comparison operator: {expression.operator}'!r}))"
+        left, right = (expression_source(operand, bound) for operand in expression.operands)
+        if expression.proven:
+            return f"({left} {expression.operator} {right})"
+        return f"{COMPARISON_HELPERS[expression.operator]}({left}, {right})"
+
+    message = f"Unknown expression type: {type(expression)}"
+    return f"fail(ValueError({message!r}))"
+
+class _Writer:
+
+    def __init__(self):
+        self.lines = []
+
+    def line(self, indent, text):
+        self.lines.append("    " * indent + text)
+
+    def source(self):
+        return "\n".join(self.lines) + "\n"
+
+def _emit_entry(out, code, start, end, indent, limits=None, names=(), layout=None):
+    """Emit the code run when pc is `start`.
+
+    With limits, `layout` maps each step segment's start to its steps and, if it
+    starts a basic block, the block's end. A block charges its first segment's
+    steps up front and runs through, charging each later segment as it reaches
+    it; a segment a check falls inside runs a copy checking before each step.
+    """
+    if layout is None:
+        _emit_block(out, code, start, end, indent)
+        return
+    steps, block_end = layout[start]
+    if block_end is None:
+        _emit_block(out, code, start, end, indent, limits, names, checked=True)
+        return
+    if steps:
+        out.line(indent, f"if executed + {steps} > next_check:")
+        _emit_block(out, code, start, end, indent + 1, limits, names, checked=True)
+        out.line(indent, f"executed += {steps}")
+    _emit_block(out, code, start, block_end, indent, limits, names, layout=layout)
+
+def _emit_block(out, code, start, end, indent, limits=None, names=(), checked=False, layout=None):
+    """Emit the straight-line code for instructions [start, end)."""
+    variables = ", ".join(f"{name!r}: {local_name(name)}" for name in names)
+    for pc in range(start, end):
+        op, a, b = code.instructions[pc]
+        if layout is not None and pc != start and layout.get(pc, (0,))[0]:
+            steps = layout[pc][0]
+            out.line(indent, f"if executed + {steps} > next_check:")
+            out.line(indent + 1, f"pc = {pc}")
+            out.line(indent + 1, "continue")
+            out.line(indent, f"executed += {steps}")
+        if checked and op in STEP_OPS:
+            out.line(indent, "if executed >= next_check:")
+            out.line(indent + 1, f"next_check = checkpoint(executed, {{{variables}}})")
+            out.line(indent, "executed += 1")
+
+        if op == LET:
+            local = local_name(target_name(a))
+            out.line(indent, f"{local} = {expression_source(b)}")
+            if limits is not None and limits.max_memory is not None and grows(b):
+                out.line(indent, f"if getsizeof({local}) > {limits.max_memory}:")
+                out.line(indent + 1, "raise LimitExceeded('memory')")
+
+        elif op == IF:
+            out.line(indent, f"if not {expression_source(a)}:")
+            out.line(indent + 1, f"pc = {b}")
+            out.line(indent + 1, "continue")
+            out.line(indent, "depth += 1")
+
+        elif op == IF_ELSE:
+            out.line(indent, "depth += 1")
+            out.line(indent, f"if not {expression_source(a)}:")
+            out.line(indent + 1, f"pc = {b}")
+            out.line(indent + 1, "continue")
+
+        elif op == GOTO:
+            if limits is not None:
+                out.line(indent, f"marker = {b!r}")
+            out.line(indent, "depth = 0")
+            out.line(indent, f"pc = {a}")
+            out.line(indent, "continue")
+            return
+
+        elif op == END_BLOCK:
+            out.line(indent, "if not depth:")
+            out.line(indent + 1, "return result")
+            out.line(indent, "depth -= 1")
+            out.line(indent, f"pc = {a}")
+            out.line(indent, "continue")
+            return
+
+        elif op == PRINT:
+            value = "''" if a is None else expression_source(a)
+            out.line(indent, f"emit({value})")
+
+        elif op == RETURN:
+            out.line(indent, f"return ReturnValue({expression_source(a)})")
+            return
+
+        elif op == EXPR:
+            target = "result = " if b else ""
+            out.line(indent, f"{target}expression({expression_source(a)})")
+
+        elif op == ENTER:
+            out.line(indent, "depth += 1")
+
+        elif op == FAIL:
+            out.line(indent, f"raise {type(a).__name__}({str(a)!r})")
+            return
+
+        elif op == MARKER:
+            out.line(indent, f"marker = {a!r}")
+
+        else:  # HALT
+            out.line(indent, "return result")
+            return
+
+    # Fell off the end of the block into the next one
+    out.line(indent, f"pc = {end}")
+    out.line(indent, "continue")
+
+def _emit_dispatch(out, code, blocks, bounds, indent, limits=None, names=(), layout=None):
+    if len(blocks) == 1:
+        _emit_entry(out, code, blocks[0], bounds[blocks[0]], indent, limits, names, layout)
+        return
+
+    if len(blocks) <= 4:
+        for i, start in enumerate(blocks):
+            if i == 0:
+                out.line(indent, f"if pc == {start}:")
+            elif i < len(blocks) - 1:
+                out.line(indent, f"elif pc == {start}:")
+            else:
+                out.line(indent, "else:")
+            _emit_entry(out, code, start, bounds[start], indent + 1, limits, names, layout)
+        return
+
+    middle = len(blocks) // 2
+    out.line(indent, f"if pc < {blocks[middle]}:")
+    _emit_dispatch(out, code, blocks[:middle], bounds, indent + 1, limits, names, layout)
+    out.line(indent, "else:")
+    _emit_dispatch(out, code, blocks[middle:], bounds, indent + 1, limits, names, layout)
+
+def generate_source(program, name="banter_program", source_name=None, limits=None):
+    """Return Python source defining a function that runs the given program.
+
+    The function takes the variables mapping, a callable receiving each printed
+    value, and a callable receiving the value of bare expression statements.
+    Generated with limits, a limits.Limits, it also takes the checkpoint method
+    of the run's Budget.
+    """
+    code = compile_program(program, markers=limits is not None)
+    names = collect_names(code)
+    blocks = basic_blocks(code)
+    layout = None
+    if limits is not None:
+        # A LET checked against the memory limit ends its segment, so a memory
+        # error counts the steps up to it
+        checked = set()
+        if limits.max_memory is not None:
+            checked = {pc for pc, (op, a, b) in enumerate(code.instructions) if op == LET and grows(b)}
+        block_ends = dict(zip(blocks, blocks[1:] + [len(code.instructions)]))
+        blocks = segments(code, checked)
+    bounds = dict(zip(blocks, blocks[1:] + [len(code.instructions)]))
+    if limits is not None:
+        layout = {start: (segment_steps(code, start, bounds[start]), block_ends.get(start)) for start in blocks}
+
+    helpers = helper_defaults()
+
+    out = _Writer()
+    if source_name:
+        out.line(0, f"# Generated from {source_name}")
+    out.lines.extend(HEADER.splitlines())
+    out.line(0, "")
+    parameters = "variables, emit, expression"
+    if limits is not None:
+        parameters += ", checkpoint"
+    out.line(0, f"def {name}({parameters}, UNDEFINED=UNDEFINED,")
+    out.line(2, ", ".join(helpers) + "):")
+    for banter_name in names:
+        out.line(1, f"{local_name(banter_name)} = variables.get({banter_name!r}, UNDEFINED)")
+    out.line(1, "result = None")
+    out.line(1, "pc = 0")
+    out.line(1, "depth = 0")
+    if limits is not None:
+        out.line(1, "executed = next_check = 0")
+        out.line(1, "marker = None")
+    out.line(1, "try:")
+    out.line(2, "while True:")
+    _emit_dispatch(out, code, blocks, bounds, 3, limits, names, layout)
+    if limits is not None:
+        out.line(1, "except LimitExceeded as error:")
+        out.line(2, "raise error.at(executed, marker)")
+    out.line(1, "finally:")
+    if not names:
+        out.line(2, "pass")
+    for banter_name in names:
+        local = local_name(banter_name)
+        out.line(2, f"if {local} is not UNDEFINED:")
+        out.line(3, f"variables[{banter_name!r}] = {local}")
+    return out.source()
+
+def compile_code(program, filename="<banter>", limits=None):
+    """Transpile a program into a code object that defines the program's function."""
+    return compile(generate_source(program, limits=limits), filename, "exec")
+
+def load_function(code):
+    """Return the function defined by a code object from compile_code."""
+    namespace = {}
+    exec(code, namespace)
+    return namespace["banter_program"]
+
+def compile_function(program, filename="<banter>", limits=None):
+    """Transpile a program and return the resulting Python function."""
+    return load_function(compile_code(program, filename, limits))
+
+def run(function, variables, returnPrints=False, output=None, budget=None):
+    """Call a transpiled program, mirroring interpreter.eval_program's result.
+
+    Functions generated with limits must be given a budget.
+    """
+    if output is None:
+        output = default_sink(returnPrints)
+    write = output.write
+
+    def capture(value):
+        if returnPrints and isinstance(value, (str, BanterString)):
+            write(str(value))
+        return value
+
+    emit = lambda value: write(f"{value}\n")
+    try:
+        if budget is None:
+            result = function(variables, emit, capture)
+        else:
+            result = function(variables, emit, capture, budget.checkpoint)
+        if returnPrints and isinstance(result, ReturnValue):
+            write(str(result.value))
+    finally:
+        output.flush()
+    return output.getvalue() if returnPrints else result
+
+def eval_program(program, variables=None, context=None, returnPrints=False, output=None, limits=None):
+    """Transpile and run a program; a drop-in replacement for interpreter.eval_program."""
+    if variables is None:
+        variables = {}
+    if context is not None and (not context or context[0] is not program):
+        context.insert(0, program)
+
+    function = compile_function(program, limits=limits)
+    budget = None if limits is None else limits.start()
+    return run(function, variables, returnPrints, output, budget)
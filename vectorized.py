@@ -0,0 +1,360 @@
+from BanterADT import *
+from interpreter import MarkerIndex, ReturnValue, assignments, eval_program
+from output import CaptureSink
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Every lane runs on the tree-walker
+
+#################### Lanes ####################
+#
+# eval_lanes runs one program once per table row of initial bindings, such as
+# an autograder's test inputs, with the rows as lanes of NumPy arrays. Each
+# variable is held as three arrays over the lanes: its kind (unbound, bool,
+# int or float) and its value as an int64 and as a float64.
+#
+# Lanes at the same point of the program share a group, which runs a statement
+# for all its lanes at once. An if splits a group by the lanes' outcome, a goto
+# moves it, and a return retires its lanes. Groups that reach the same point
+# merge again; the group furthest behind in the program runs first, so lanes
+# looping longer than the rest catch up with them.
+#
+# A lane leaves for the tree-walker, carrying on from where it is, as soon as a
+# statement would raise, hold a string, lose precision against Python's
+# numbers or run with fewer than MIN_LANES lanes, or when a statement isn't
+# vectorized (bare expressions). Rows binding anything but numbers and bools
+# run on the tree-walker from the start.
+
+MIN_LANES = 8  # Smaller groups run lane by lane
+
+UNBOUND, BOOL, INT, FLOAT = range(4)
+
+KINDS = {bool: BOOL, int: INT, float: FLOAT}
+
+INT_LIMIT = 2 ** 62  # Ints held; sums of two of them fit in an int64
+EXACT_LIMIT = 2 ** 53  # Ints converted to floats exactly
+
+class LaneResult:
+    """A lane's result, as eval_program would return it with a ReturnValue
+    unwrapped, its printed output, and the exception it raised, if any."""
+    __slots__ = ('result', 'output', 'error')
+
+    def __init__(self, result=None, output='', error=None):
+        self.result = result
+        self.output = output
+        self.error = error
+
+    def __repr__(self):
+        return f"LaneResult(result={self.result!r}, output={self.output!r}, error={self.error!r})"
+
+def eval_lanes(program, bindings):
+    """Run a parsed program once for each mapping of initial variable bindings
+    in `bindings`. Returns a LaneResult per mapping, the same as running the
+    program with eval_program on a copy of each."""
+    bindings = [dict(row) for row in bindings]
+    sinks = [CaptureSink() for _ in bindings]
+    results = [LaneResult() for _ in bindings]
+    markers = MarkerIndex(program)
+
+    vector = []
+    for lane, row in enumerate(bindings):
+        if np is not None and isinstance(program, list) and program and all(vectorizable(v) for v in row.values()):
+            vector.append(lane)
+        else:
+            run_scalar(program, row, sinks[lane], markers, results[lane])
+
+    if vector:
+        Lanes(program, bindings, vector, sinks, results, markers).run()
+    for result, sink in zip(results, sinks):
+        result.output = sink.getvalue()
+    return results
+
+def vectorizable(value):
+    return type(value) in KINDS and (type(value) is not int or abs(value) < INT_LIMIT)
+
+def run_scalar(program, variables, sink, markers, result):
+    try:
+        value = eval_program(program, variables, output=sink, markers=markers)
+        result.result = value.value if isinstance(value, ReturnValue) else value
+    except Exception as error:
+        result.error = error
+
+#################### Program Layout ####################
+
+class Layout:
+    """The blocks of a program by id and the order of its statements.
+
+    A point in the program is a tuple of (block id, offset) pairs, innermost
+    first, like the tree-walker's queue: the statements from each offset on,
+    one block after another.
+    """
+
+    def __init__(self, program):
+        self.blocks = {}
+        self.order = {}  # id(statement) -> position in a depth-first walk
+        self.branches = {}  # id(branch) -> its block, wrapped in a list if a single statement
+        self.walk(program)
+
+    def walk(self, block):
+        self.blocks[id(block)] = block
+        for stmt in block:
+            self.order[id(stmt)] = len(self.order)
+            if isinstance(stmt, list):
+                self.walk(stmt)  # Runs on the tree-walker, but may hold markers
+            for branch in (getattr(stmt, 'do', None), getattr(stmt, 'alternate', None)):
+                if branch is not None:
+                    self.walk(self.branch(branch))
+
+    def branch(self, node):
+        block = self.branches.get(id(node))
+        if block is None:
+            block = self.branches[id(node)] = node if isinstance(node, list) else [node]
+        return block
+
+    def statement(self, point):
+        block, offset = point[0]
+        return self.blocks[block][offset]
+
+    def key(self, point):
+        return self.order[id(self.statement(point))]
+
+    def normalize(self, point):
+        """Drop finished blocks; an empty point is the end of the run."""
+        while point and point[0][1] >= len(self.blocks[point[0][0]]):
+            point = point[1:]
+        return point
+
+    def next(self, point):
+        block, offset = point[0]
+        return self.normalize(((block, offset + 1),) + point[1:])
+
+    def enter(self, branch, point):
+        """The point running a branch of the statement at point, then what follows it."""
+        return self.normalize(((id(self.branch(branch)), 0),) + self.next(point))
+
+    def remaining(self, point):
+        """The statements left to run from a point, for the tree-walker."""
+        return [stmt for block, offset in point for stmt in self.blocks[block][offset:]]
+
+class Vector:
+    """An expression's values over a group's lanes; `bad` marks lanes that
+    have to be evaluated by the tree-walker."""
+    __slots__ = ('kinds', 'ints', 'floats', 'bad')
+
+    def __init__(self, kinds, ints, floats, bad):
+        self.kinds = kinds
+        self.ints = ints
+        self.floats = floats
+        self.bad = bad
+
+    def as_floats(self):
+        return np.where(self.kinds == FLOAT, self.floats, self.ints.astype(np.float64))
+
+    def values(self):
+        """The lanes' values as Python objects."""
+        converters = {BOOL: bool, INT: int, FLOAT: float}
+        return [converters[kind](value if kind == FLOAT else integer) if kind != UNBOUND else None
+                for kind, integer, value in zip(self.kinds.tolist(), self.ints.tolist(), self.floats.tolist())]
+
+#################### Vectorized Evaluation ####################
+
+class Lanes:
+    """The lanes of an eval_lanes run that start vectorized."""
+
+    def __init__(self, program, bindings, lanes, sinks, results, markers):
+        self.program = program
+        self.layout = Layout(program)
+        self.sinks = sinks
+        self.results = results
+        self.markers = markers
+
+        names = {name for row in bindings for name in row}
+        names.update(let.mneumonic for let in assignments(program))
+        count = len(bindings)
+        self.kinds = {name: np.zeros(count, np.int8) for name in names}
+        self.ints = {name: np.zeros(count, np.int64) for name in names}
+        self.floats = {name: np.zeros(count, np.float64) for name in names}
+        for lane in lanes:
+            for name, value in bindings[lane].items():
+                self.kinds[name][lane] = KINDS[type(value)]
+                if type(value) is float:
+                    self.floats[name][lane] = value
+                else:
+                    self.ints[name][lane] = value
+        self.groups = {((id(program), 0),): [np.array(lanes, np.intp)]}
+
+    def run(self):
+        layout = self.layout
+        with np.errstate(all='ignore'):
+            while self.groups:
+                point = min(self.groups, key=layout.key)
+                parts = self.groups.pop(point)
+                lanes = parts[0] if len(parts) == 1 else np.concatenate(parts)
+                if len(lanes) < MIN_LANES:
+                    self.scalar(point, lanes)
+                else:
+                    self.step(point, lanes, layout.statement(point))
+
+    def move(self, point, lanes):
+        if not len(lanes):
+            return
+        if point:
+            self.groups.setdefault(point, []).append(lanes)
+        # Lanes that ran off the end finished with a statement, so their result is None
+
+    def scalar(self, point, lanes):
+        """Run lanes on the tree-walker from a point."""
+        program = self.layout.remaining(point)
+        for lane in lanes.tolist():
+            variables = {}
+            for name, kinds in self.kinds.items():
+                kind = kinds[lane]
+                if kind == FLOAT:
+                    variables[name] = float(self.floats[name][lane])
+                elif kind != UNBOUND:
+                    value = int(self.ints[name][lane])
+                    variables[name] = bool(value) if kind == BOOL else value
+            run_scalar(program, variables, self.sinks[lane], self.markers, self.results[lane])
+
+    def split(self, point, lanes, vector):
+        """Send lanes whose vector went bad to the tree-walker; return the rest
+        and the vector over them."""
+        if not vector.bad.any():
+            return lanes, vector
+        self.scalar(point, lanes[vector.bad])
+        good = ~vector.bad
+        return lanes[good], Vector(vector.kinds[good], vector.ints[good], vector.floats[good], vector.bad[good])
+
+    def step(self, point, lanes, stmt):
+        layout = self.layout
+
+        if isinstance(stmt, LetStatement):
+            lanes, vector = self.split(point, lanes, self.evaluate(stmt.value, lanes))
+            name = stmt.mneumonic
+            self.kinds[name][lanes] = vector.kinds
+            self.ints[name][lanes] = vector.ints
+            self.floats[name][lanes] = vector.floats
+            self.move(layout.next(point), lanes)
+
+        elif isinstance(stmt, (IfStatement, IfElseStatement)) and isinstance(stmt.expr, Comparison):
+            lanes, vector = self.split(point, lanes, self.evaluate(stmt.expr, lanes))
+            taken = vector.ints != 0
+            self.move(layout.enter(stmt.do, point), lanes[taken])
+            alternate = getattr(stmt, 'alternate', None)
+            if alternate:
+                self.move(layout.enter(alternate, point), lanes[~taken])
+            else:
+                self.move(layout.next(point), lanes[~taken])
+
+        elif isinstance(stmt, GotoStatement):
+            try:
+                block, offset = self.markers.resolve(stmt.label)
+            except ValueError:
+                self.scalar(point, lanes)  # Raises there
+                return
+            self.move(layout.normalize(((id(block), offset + 1),)), lanes)
+
+        elif isinstance(stmt, PrintStatement):
+            if stmt.value is None or isinstance(stmt.value, BanterString):
+                text = "\n" if stmt.value is None else f"{stmt.value}\n"
+                for lane in lanes.tolist():
+                    self.sinks[lane].write(text)
+            else:
+                lanes, vector = self.split(point, lanes, self.evaluate(stmt.value, lanes))
+                for lane, value in zip(lanes.tolist(), vector.values()):
+                    self.sinks[lane].write(f"{value}\n")
+            self.move(layout.next(point), lanes)
+
+        elif isinstance(stmt, ReturnStatement):
+            if isinstance(stmt.value, BanterString):
+                values = [stmt.value] * len(lanes)
+            else:
+                lanes, vector = self.split(point, lanes, self.evaluate(stmt.value, lanes))
+                values = vector.values()
+            for lane, value in zip(lanes.tolist(), values):
+                self.results[lane].result = value
+
+        elif isinstance(stmt, MarkerStatement):
+            self.move(layout.next(point), lanes)
+
+        else:
+            self.scalar(point, lanes)
+
+    def evaluate(self, expression, lanes):
+        count = len(lanes)
+        if isinstance(expression, (bool, int, float)) and vectorizable(expression):
+            kind = KINDS[type(expression)]
+            return Vector(np.full(count, kind, np.int8),
+                          np.full(count, 0 if kind == FLOAT else expression, np.int64),
+                          np.full(count, expression if kind == FLOAT else 0.0, np.float64),
+                          np.zeros(count, bool))
+
+        elif isinstance(expression, (Mneumonic, Local)):
+            if expression.name not in self.kinds:
+                return Vector(np.zeros(count, np.int8), np.zeros(count, np.int64),
+                              np.zeros(count, np.float64), np.ones(count, bool))
+            kinds = self.kinds[expression.name][lanes]
+            return Vector(kinds, self.ints[expression.name][lanes], self.floats[expression.name][lanes],
+                          kinds == UNBOUND)
+
+        elif (isinstance(expression, Operation) and expression.operator in '+-*/'
+              and len(expression.operands) == 2):
+            return self.operation(expression.operator, *(self.evaluate(operand, lanes)
+                                                         for operand in expression.operands))
+
+        elif isinstance(expression, Comparison):
+            return self.comparison(expression.operator, *(self.evaluate(operand, lanes)
+                                                          for operand in expression.operands))
+
+        # Strings, ints too wide and anything unknown
+        return Vector(np.zeros(count, np.int8), np.zeros(count, np.int64),
+                      np.zeros(count, np.float64), np.ones(count, bool))
+
+    def operation(self, operator, left, right):
+        bad = left.bad | right.bad
+        numeric_left = (left.kinds == INT) | (left.kinds == FLOAT)
+        numeric_right = (right.kinds == INT) | (right.kinds == FLOAT)
+        bad |= ~((left.kinds == right.kinds) | (numeric_left & numeric_right))  # A TypeError
+        floating = (left.kinds == FLOAT) | (right.kinds == FLOAT)
+        integral = ~floating
+
+        if operator == '/':
+            divisor = right.as_floats()
+            bad |= divisor == 0  # Division by zero
+            # Python divides ints exactly before rounding
+            bad |= integral & ((np.abs(left.ints) > EXACT_LIMIT) | (np.abs(right.ints) > EXACT_LIMIT))
+            floats = left.as_floats() / divisor
+            return Vector(np.full(len(bad), FLOAT, np.int8), np.zeros(len(bad), np.int64), floats, bad)
+
+        if operator == '*':
+            bad |= integral & (np.abs(left.ints.astype(np.float64)) * np.abs(right.ints.astype(np.float64))
+                               >= INT_LIMIT)
+            ints = left.ints * right.ints
+            floats = left.as_floats() * right.as_floats()
+        elif operator == '+':
+            ints = left.ints + right.ints
+            floats = left.as_floats() + right.as_floats()
+        else:
+            ints = left.ints - right.ints
+            floats = left.as_floats() - right.as_floats()
+        bad |= integral & (np.abs(ints) >= INT_LIMIT)
+        return Vector(np.where(floating, FLOAT, INT).astype(np.int8), np.where(floating, 0, ints),
+                      np.where(floating, floats, 0.0), bad)
+
+    def comparison(self, operator, left, right):
+        bad = left.bad | right.bad
+        floating = (left.kinds == FLOAT) | (right.kinds == FLOAT)
+        # Python compares ints with floats exactly
+        bad |= floating & (((left.kinds != FLOAT) & (np.abs(left.ints) > EXACT_LIMIT))
+                           | ((right.kinds != FLOAT) & (np.abs(right.ints) > EXACT_LIMIT)))
+        compare = COMPARE[operator]
+        result = np.where(floating, compare(left.as_floats(), right.as_floats()), compare(left.ints, right.ints))
+        # A bool compared with an int is never equal, nor anything else
+        result &= ~(((left.kinds == BOOL) & (right.kinds == INT)) | ((left.kinds == INT) & (right.kinds == BOOL)))
+        return Vector(np.full(len(bad), BOOL, np.int8), result.astype(np.int64), np.zeros(len(bad), np.float64),
+                      bad)
+
+if np is not None:
+    COMPARE = {'==': np.equal, '!=': np.not_equal, '<': np.less, '<=': np.less_equal,
+               '>': np.greater, '>=': np.greater_equal}
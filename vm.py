@@ -0,0 +1,308 @@
+import operator
+import sys
+
+from BanterADT import *
+from compiler import *
+from frame import UNDEFINED
+from interpreter import ReturnValue
+from limits import LimitExceeded, grows
+from output import default_sink
+
+#################### Expression Closures ####################
+
+def _check_operands(x, y):
+    tx, ty = type(x), type(y)
+    if tx is not ty and not (tx in (int, float) and ty in (int, float)):
+        raise TypeError("Operands must have the same type.") # None of that!
+
+def _add(x, y):
+    _check_operands(x, y)
+    return x + y
+
+def _sub(x, y):
+    _check_operands(x, y)
+    return x - y
+
+def _mul(x, y):
+    _check_operands(x, y)
+    return x * y
+
+def _div(x, y):
+    _check_operands(x, y)
+    if y == 0:
+        raise ValueError("Division by zero")
+    return x / y
+
+def _comparison(compare):
+    def apply(x, y):
+        tx, ty = type(x), type(y)
+        if tx is not ty:
+            if tx is bool and ty is int or tx is int and ty is bool:
+                return False
+            if tx is BanterString or ty is BanterString:
+                return compare(plain_text(x), plain_text(y))
+        return compare(x, y)
+    return apply
+
+def _divide(x, y):
+    if y == 0:
+        raise ValueError("Division by zero")
+    return x / y
+
+OPERATIONS = {'+': _add, '-': _sub, '*': _mul, '/': _div}
+
+# Variants for operations whose operand types analysis.analyze has proven
+UNCHECKED_OPERATIONS = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': _divide}
+
+COMPARISONS = {
+    '==': _comparison(operator.eq),
+    '!=': _comparison(operator.ne),
+    '>': _comparison(operator.gt),
+    '<': _comparison(operator.lt),
+    '>=': _comparison(operator.ge),
+    '<=': _comparison(operator.le),
+}
+
+UNCHECKED_COMPARISONS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+}
+
+def _raiser(error):
+    def fail(variables):
+        raise error
+    return fail
+
+def compile_expression(expression):
+    """Turn an expression AST into a closure taking the variables mapping."""
+    if isinstance(expression, (int, float, bool, str, BanterString)):
+        return lambda variables: expression
+
+    elif isinstance(expression, Local):
+        name, slot = expression.name, expression.slot
+        def load_local(variables):
+            value = variables.values[slot]
+            if value is UNDEFINED:
+                raise ValueError(f"Variable {name} not defined")
+            return value
+        return load_local
+
+    elif isinstance(expression, Mneumonic):
+        name = expression.name
+        def load(variables):
+            try:
+                return variables[name]
+            except KeyError:
+                raise ValueError(f"Variable {name} not defined") from None
+        return load
+
+    elif isinstance(expression, Operation):
+        if expression.operator not in OPERATIONS:
+            return _raiser(ValueError(f"Unknown operator: {expression.operator}"))
+        apply = (UNCHECKED_OPERATIONS if expression.proven else OPERATIONS)[expression.operator]
+        left, right = map(compile_expression, expression.operands)
+        return lambda variables: apply(left(variables), right(variables))
+
+    elif isinstance(expression, Comparison):
+        if expression.operator not in COMPARISONS:
+            return _raiser(ValueError(f"Unknown comparison operator: {expression.operator}"))
+        compare = (UNCHECKED_COMPARISONS if expression.proven else COMPARISONS)[expression.operator]
+        left, right = map(compile_expression, expression.operands)
+        return lambda variables: compare(left(variables), right(variables))
+
+    return _raiser(ValueError(f"Unknown expression type: {type(expression)}"))
+
+def _checked(evaluate, max_memory):
+    getsizeof = sys.getsizeof
+    def check(variables):
+        value = evaluate(variables)
+        if getsizeof(value) > max_memory:
+            raise LimitExceeded('memory')
+        return value
+    return check
+
+STORE_LOCAL = -1  # Assembled form of LET for a resolved Local; a: slot
+STEP = -2         # Only in runs with limits; a: steps in its segment, b: its checked copy
+TICK = -3         # Only in checked copies; a step, checked before it runs
+JUMP = -4         # Only in checked copies; a: target
+
+def assemble(code, budget=None):
+    """Replace the expression operands of a Code object with closures.
+
+    Given a limits.Budget, each step segment starts with a STEP instruction
+    charging its steps, and is followed by a checked copy run in its place when
+    a check falls inside it (see compiler.py). Values that can grow are checked
+    against the memory limit as they are assigned.
+    """
+    assembled = []
+    checked = set()  # LETs checked against the memory limit
+    for op, a, b in code.instructions:
+        if op in (IF, IF_ELSE, RETURN):
+            a = compile_expression(a)
+        elif op == LET:
+            value, b = b, compile_expression(b)
+            if budget is not None and budget.max_memory is not None and grows(value):
+                b = _checked(b, budget.max_memory)
+                checked.add(len(assembled))
+            if isinstance(a, Local):
+                op, a = STORE_LOCAL, a.slot
+        elif op == PRINT and a is not None:
+            a = compile_expression(a)
+        elif op == EXPR:
+            a = compile_expression(a)
+        assembled.append((op, a, b))
+
+    if budget is None:
+        return assembled
+
+    # A checked LET ends its segment, so a memory error counts the steps up to it
+    starts = segments(code, checked)
+    bounds = dict(zip(starts, starts[1:] + [len(assembled)]))
+    moved = []  # New pc of each instruction
+    stepped = []
+    copies = []
+    for start in starts:
+        segment = len(stepped)
+        steps = segment_steps(code, start, bounds[start])
+        if steps:
+            stepped.append((STEP, steps, len(copies)))
+            for pc in range(start, bounds[start]):
+                if code.instructions[pc][0] in STEP_OPS:
+                    copies.append((TICK, None, None))
+                copies.append(assembled[pc])
+            if code.instructions[bounds[start] - 1][0] not in TERMINATORS:
+                copies.append((JUMP, bounds[start], None))
+        for instruction in assembled[start:bounds[start]]:
+            moved.append(len(stepped))
+            stepped.append(instruction)
+        moved[start] = segment  # Jumps to a segment land on its STEP
+
+    offset = len(stepped)
+    stepped += copies
+    for pc, (op, a, b) in enumerate(stepped):
+        if op in (IF, IF_ELSE):
+            stepped[pc] = (op, a, moved[b])
+        elif op in (GOTO, END_BLOCK, JUMP):
+            stepped[pc] = (op, moved[a], b)
+        elif op == STEP:
+            stepped[pc] = (op, a, offset + b)
+    return stepped
+
+#################### Dispatch Loop ####################
+
+def run(instructions, variables, returnPrints=False, output=None, budget=None):
+    """Execute assembled instructions, mirroring interpreter.eval_program's result.
+
+    Instructions assembled with a budget must be run with the same budget.
+    """
+    if output is None:
+        output = default_sink(returnPrints)
+    write = output.write
+    result = None
+    pc = 0
+    depth = 0
+    executed = next_check = 0
+    marker = None
+
+    try:
+        while True:
+            op, a, b = instructions[pc]
+
+            if op == STORE_LOCAL:
+                variables.values[a] = b(variables)
+                pc += 1
+
+            elif op == LET:
+                variables[a] = b(variables)
+                pc += 1
+
+            elif op == IF:
+                if a(variables):
+                    depth += 1
+                    pc += 1
+                else:
+                    pc = b
+
+            elif op == GOTO:
+                depth = 0
+                pc = a
+                marker = b
+
+            elif op == END_BLOCK:
+                if not depth:
+                    break
+                depth -= 1
+                pc = a
+
+            elif op == IF_ELSE:
+                depth += 1
+                pc = pc + 1 if a(variables) else b
+
+            elif op == PRINT:
+                write("\n" if a is None else f"{a(variables)}\n")
+                pc += 1
+
+            elif op == RETURN:
+                result = ReturnValue(a(variables))
+                if returnPrints:
+                    write(str(result.value))
+                break
+
+            elif op == EXPR:
+                value = a(variables)
+                if returnPrints and isinstance(value, (str, BanterString)):
+                    write(str(value))
+                if b:
+                    result = value
+                pc += 1
+
+            elif op == ENTER:
+                depth += 1
+                pc += 1
+
+            elif op == FAIL:
+                raise a
+
+            elif op == STEP:
+                if executed + a > next_check:
+                    pc = b
+                else:
+                    executed += a
+                    pc += 1
+
+            elif op == TICK:
+                if executed >= next_check:
+                    next_check = budget.checkpoint(executed, variables)
+                executed += 1
+                pc += 1
+
+            elif op == MARKER:
+                marker = a
+                pc += 1
+
+            elif op == JUMP:
+                pc = a
+
+            else:  # HALT
+                break
+    except LimitExceeded as error:
+        raise error.at(executed, marker)
+    finally:
+        output.flush()
+
+    return output.getvalue() if returnPrints else result
+
+def eval_program(program, variables=None, context=None, returnPrints=False, output=None, limits=None):
+    """Compile and run a program; a drop-in replacement for interpreter.eval_program."""
+    if variables is None:
+        variables = {}
+    if context is not None and (not context or context[0] is not program):
+        context.insert(0, program)
+
+    code = compile_program(program, markers=limits is not None)
+    budget = None if limits is None else limits.start()
+    return run(assemble(code, budget), variables, returnPrints, output, budget)